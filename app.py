@@ -1,40 +1,263 @@
-import os
-from flask import Flask, render_template, request, jsonify, session
-from flask_socketio import SocketIO
-from dotenv import load_dotenv
+from flask import Blueprint, Flask, current_app, g, render_template, request, jsonify, session
+from flask_socketio import SocketIO, join_room, leave_room
+from models import demand_curve
 from models.game_state import GameState
-from models.user import User
 from config.config import get_config
-from services import test_player_service
+from config.logging_config import configure_logging
+from services import test_player_service, wire_format
+from services.profiling import profiler
+from services.admission import PLAYER, PROFESSOR, admission
+from services.compression import compressor
+from services.deadline_scheduler import TimerWheel
+from services.equilibrium_executor import equilibrium_executor
+from services.metrics import (REGISTRY, CONNECTED_CLIENTS, EMIT_BYTES, EMIT_PAYLOAD_BYTES, EMIT_RECIPIENTS,
+                              EMIT_SECONDS, REQUEST_SECONDS, Gauge)
+import functools
+import time
 import uuid
-import random
 import threading
 
-# Load environment variables from .env file if present
-load_dotenv()
-
-# Get configuration based on environment
-config = get_config()
-
-app = Flask(__name__)
-app.config['SECRET_KEY'] = config.SECRET_KEY
-app.config['DEBUG'] = config.DEBUG
-app.config['TESTING'] = config.TESTING
-app.config['ENV'] = config.ENV
-socketio = SocketIO(app)
+bp = Blueprint('game', __name__)
+socketio = SocketIO()
 
 # Initialize game state
 game_state = GameState()
 
-# List of fun names for test users - MOVED to test_player_service.py
-# TEST_PLAYER_NAMES = test_player_service.TEST_PLAYER_NAMES
+# Read at scrape time, so they follow game_state across resets
+Gauge('olg_players', 'Players in the game', func=lambda: len(game_state.users))
+Gauge('olg_pending_decisions', 'Players the current round is waiting for',
+      func=lambda: len(game_state.pending_decisions))
+
+# Routes can run on several threads at once (see asgi.py): everything that changes the
+# game, or walks all of its players, holds this lock, as do round advances and deadlines
+game_lock = threading.RLock()
+
+def with_game_lock(func):
+    """Run a route, or a background job, while holding game_lock."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with game_lock:
+            return func(*args, **kwargs)
+    return wrapper
+
+def create_app(config=None):
+    """
+    Application factory.
+    
+    Args:
+        config: configuration class to use (defaults to the one selected by FLASK_ENV)
+        
+    Returns:
+        The configured Flask app, with the game routes and Socket.IO attached
+    """
+    config = config or get_config()
+    configure_logging(config.LOG_LEVEL, config.LOG_FORMAT, config.LOG_RATE_LIMIT, config.LOG_RATE_PERIOD)
+    
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = config.SECRET_KEY
+    app.config['DEBUG'] = config.DEBUG
+    app.config['TESTING'] = config.TESTING
+    app.config['ENV'] = config.ENV
+    app.config['PORT'] = config.PORT
+    
+    equilibrium_executor.start(config.EQUILIBRIUM_WORKERS, config.EQUILIBRIUM_INLINE_THRESHOLD)
+    demand_curve.configure(config.DEMAND_CURVE_RATES, config.DEMAND_CURVE_MAX_POINTS)
+    compressor.configure(config.COMPRESSION_MIN_BYTES, config.COMPRESSION_LEVEL, config.COMPRESSION_CACHE_ENTRIES)
+    admission.configure(config.ADMISSION_RATE, config.ADMISSION_BURST, config.ADMISSION_MAX_CONCURRENT,
+                        config.ADMISSION_MAX_QUEUE, config.ADMISSION_QUEUE_TIMEOUT)
+    
+    # Imported here: the blueprints use this module's decorators and game state
+    from routes import deadlines, export, figures, preview, profiling, roster
+    app.register_blueprint(bp)
+    for module in (deadlines, export, figures, preview, profiling, roster):
+        app.register_blueprint(module.bp)
+    socketio.init_app(app, async_mode=config.SOCKETIO_ASYNC_MODE)
+    return app
+
+def __getattr__(name):
+    """Create the default app on first access of ``app.app`` (e.g. by a WSGI server)."""
+    if name == 'app':
+        globals()['app'] = create_app()
+        return globals()['app']
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# How events are delivered and where slow work runs. The defaults use Flask-SocketIO
+# and plain threads; other serving modes (see asgi.py) swap them via configure_dispatch().
+_dispatch = {'emit': None, 'manager': None, 'background': None}
+
+def configure_dispatch(emit=None, manager=None, background=None):
+    """
+    Route broadcasts and background work elsewhere; call with no arguments to restore the defaults.
+    
+    Args:
+        emit: callable(event, data, **kwargs) delivering an event to clients
+        manager: the Socket.IO client manager behind ``emit`` (used to count recipients)
+        background: callable(func) that runs ``func`` off the request path
+    """
+    _dispatch.update(emit=emit, manager=manager, background=background)
+
+# Payload and wire sizes are measured on the first broadcast of each event and every
+# EMIT_SIZE_SAMPLE-th after it, so most emits serialize their payload only once;
+# bytes sent by the emits in between are counted at the last measured size
+EMIT_SIZE_SAMPLE = 16
+_emit_counts = {}
+_wire_sizes = {}  # (event, encoding) -> bytes per client at the last sample
+
+def _sample_size(event):
+    count = _emit_counts.get(event, 0)
+    _emit_counts[event] = count + 1
+    return count % EMIT_SIZE_SAMPLE == 0
+
+def _bytes_per_client(event, encoding, payload, sampled):
+    if sampled or (event, encoding) not in _wire_sizes:
+        _wire_sizes[event, encoding] = wire_format.wire_size(event, payload)
+    return _wire_sizes[event, encoding]
+
+def broadcast(event, data, **kwargs):
+    """
+    Emit an event to clients, recording the payload size, recipient count, bytes sent and fan-out time.
+    
+    Broadcasts to every client also reach the clients that chose a compact wire
+    format (see services/wire_format.py): each encoding's room gets its own
+    encoded copy and the JSON emit skips those clients.
+    """
+    emit = _dispatch['emit'] or socketio.emit
+    manager = _dispatch['manager'] or socketio.server.manager
+    namespace = kwargs.get('namespace') or '/'
+    room = kwargs.get('to', kwargs.get('room'))
+    rooms = manager.rooms.get(namespace, {})
+    recipients = rooms.get(room, ())
+    sampled = _sample_size(event)
+    EMIT_RECIPIENTS.observe(len(recipients), event=event)
+    skipped = []
+    with EMIT_SECONDS.time(event=event):
+        for encoding in wire_format.COMPACT_ENCODINGS if room is None else ():
+            sids = list(rooms.get(wire_format.room(encoding), ()))
+            if sids:
+                payload = wire_format.encode(data, encoding)
+                emit(event, payload, **dict(kwargs, to=wire_format.room(encoding)))
+                EMIT_BYTES.inc(_bytes_per_client(event, encoding, payload, sampled) * len(sids),
+                               event=event, encoding=encoding)
+                skipped += sids
+        if skipped:
+            kwargs['skip_sid'] = skipped
+        emit(event, data, **kwargs)
+    json_recipients = len(recipients) - len(skipped)
+    if sampled or json_recipients > 0:
+        size = _bytes_per_client(event, 'json', data, sampled)
+        if sampled:
+            EMIT_PAYLOAD_BYTES.observe(size - wire_format.envelope_size(event), event=event)
+        if json_recipients > 0:
+            EMIT_BYTES.inc(size * json_recipients, event=event, encoding='json')
+
+def run_in_background(func):
+    """Run slow work (e.g. an equilibrium solve) without holding up the response."""
+    if _dispatch['background'] is not None:
+        return _dispatch['background'](func)
+    thread = threading.Thread(target=func)
+    thread.daemon = True  # Make sure the thread doesn't block app shutdown
+    thread.start()
+    return thread
 
-@app.route('/')
+def client_key():
+    """
+    Who a request comes from, for rate limits and name reservations: its
+    browser session, or its address if it carries no session cookie (new
+    clients get a session for their next requests).
+    """
+    client_id = session.setdefault('client_id', uuid.uuid4().hex)
+    if current_app.config['SESSION_COOKIE_NAME'] not in request.cookies:
+        return f'address:{request.remote_addr}'
+    return client_id
+
+def admitted(func=None, *, rate_limited=True):
+    """
+    Apply admission control (services/admission.py) to a route: per-client rate
+    limits and a bounded queue, with professor actions first. Requests turned
+    away get a 429 with a Retry-After header.
+    
+    Each browser session gets its own token bucket, so a client can't reset its
+    limit, or use up another player's, by sending a different user_id (a whole
+    class behind one address still gets a bucket per student). Requests
+    without a session cookie share one bucket per address (see client_key), so
+    dropping the cookie doesn't buy a fresh bucket. Routes that
+    submit for many players at once pass ``rate_limited=False``: they still wait
+    for a slot, but aren't charged against a single client's bucket.
+    
+    Professor priority goes to any session that has opened /professor; the game
+    has no logins, so this orders a classroom's requests rather than securing them.
+    """
+    if func is None:
+        return functools.partial(admitted, rate_limited=rate_limited)
+    
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        priority = PROFESSOR if session.get('is_professor') else PLAYER
+        client = client_key() if rate_limited else None
+        rejection = admission.enter(request.endpoint, client, priority)
+        if rejection is not None:
+            response = jsonify({'success': False, 'error': 'Server busy, please retry',
+                                'reason': rejection.reason, 'retry_after': rejection.retry_after})
+            response.status_code = 429
+            response.headers['Retry-After'] = str(rejection.retry_after)
+            return response
+        try:
+            return func(*args, **kwargs)
+        finally:
+            admission.leave()
+    return wrapper
+
+@bp.before_app_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    # Profile this request if the professor armed the profiler for the next requests
+    if profiler.armed is not None and not request.path.startswith('/api/profiling'):
+        g.profile_capture = profiler.capture('requests')
+        g.profile_capture.__enter__()
+
+@bp.teardown_app_request
+def stop_request_profile(exc):
+    capture = g.pop('profile_capture', None)
+    if capture is not None:
+        capture.__exit__(None, None, None)
+
+@bp.after_app_request
+def record_request_metrics(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        # Label by route pattern, not URL, to keep the number of series bounded
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_SECONDS.observe(time.perf_counter() - started, method=request.method,
+                                route=route, status=str(response.status_code))
+    return response
+
+@bp.after_app_request
+def compress_response(response):
+    """Compress large JSON responses for clients that accept it (see services/compression.py)."""
+    if (response.status_code != 200 or response.mimetype != 'application/json'
+            or response.is_streamed or response.direct_passthrough or 'Content-Encoding' in response.headers):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = request.accept_encodings.best_match(compressor.encodings)
+    body = compressor.compress(response.get_data(), encoding)
+    if body is not None:
+        response.set_data(body)
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+@bp.route('/metrics')
+def metrics():
+    """Prometheus scrape endpoint"""
+    return current_app.response_class(REGISTRY.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+@bp.route('/')
 def index():
     """Main entry point for the game"""
     return render_template('index.html')
 
-@app.route('/player')
+@bp.route('/player')
+@admitted
+@with_game_lock
 def player_view():
     """Player dashboard view"""
     user_id = request.args.get('user_id')
@@ -47,10 +270,14 @@ def player_view():
     # Auto-register new users when they access the dashboard
     new_player = False
     if user_id not in game_state.users:
+        # The name may have been taken (or reserved) since the login page checked it
+        if display_name and game_state.is_name_taken(display_name, user_id):
+            return render_template('login.html', name_taken=True)
         game_state.add_user(user_id, name=display_name, avatar=avatar)
         new_player = True
     elif display_name:  # Update existing user's name if provided
-        game_state.users[user_id].name = display_name
+        if not game_state.rename_user(user_id, display_name):
+            current_app.logger.info("Kept the name of %s: %r is taken", user_id, display_name)
         if avatar:
             game_state.users[user_id].avatar = avatar
     
@@ -62,18 +289,23 @@ def player_view():
             "avatar": avatar,
             "stage": game_state.users[user_id].age_stage
         }
-        socketio.emit('player_joined', {"player": player_info})
+        broadcast('player_joined', {"player": player_info})
     
     return render_template('player_dashboard.html', user_id=user_id)
 
-@app.route('/professor')
+@bp.route('/professor')
 def professor_view():
     """Professor/admin dashboard view"""
     # Set professor status in session
     session['is_professor'] = True
     return render_template('professor_dashboard.html')
 
-@app.route('/api/submit_decision', methods=['POST'])
+# Largest batch /api/submit_decisions accepts in one request
+MAX_DECISION_BATCH = 1000
+
+@bp.route('/api/submit_decision', methods=['POST'])
+@admitted
+@with_game_lock
 def submit_decision():
     """API endpoint for players to submit their decisions"""
     data = request.json
@@ -90,104 +322,76 @@ def submit_decision():
         amount = float(amount)
         
         # Store demand curve if provided (for Young agents submitting borrowing decisions)
-        if decision_type == 'borrow' and demand_curve and isinstance(demand_curve, list):
-            # Get user object
-            user = game_state.users.get(user_id)
-            if user:
-                # Store the demand curve points in the user object
-                user.demand_curve = demand_curve
-                app.logger.info(f"Stored demand curve with {len(demand_curve)} points for user {user_id}")
+        if decision_type == 'borrow' and demand_curve and user_id in game_state.users:
+            try:
+                game_state.set_demand_curve(user_id, demand_curve)
+            except ValueError as e:
+                return jsonify({'success': False, 'error': f'Invalid demand curve: {e}'}), 400
+            current_app.logger.debug("Stored demand curve with %d points for user %s", len(demand_curve), user_id)
         
         # Save decision in game state
         success = game_state.record_decision(user_id, decision_type, amount)
         if success:
-            # Get updated aggregated data using the compute_aggregates method
-            aggregates = game_state.compute_aggregates()
-            
-            # Create aggregate demand data if we have a young borrower with a demand curve
-            aggregate_demand = None
+            # Notify other clients of the update
+            event_data = decision_event(user_id=user_id, decision_type=decision_type)
             if decision_type == 'borrow' and demand_curve:
-                # Generate aggregate demand data for standard interest rates
-                standard_rates = [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
-                aggregate_demand = []
-                
-                # Calculate aggregate borrowing for each standard interest rate
-                young_users = [u for u in game_state.users.values() 
-                              if u.age_stage == 'Y' and hasattr(u, 'demand_curve') and u.demand_curve]
-                
-                for rate in standard_rates:
-                    total_borrowing = 0
-                    for user in young_users:
-                        # Find the borrowing amount at this interest rate in the player's demand curve
-                        exact_match = next((point for point in user.demand_curve 
-                                        if abs(point['interestRate'] - rate) < 0.001), None)
-                        
-                        if exact_match:
-                            total_borrowing += exact_match['borrowingAmount']
-                        else:
-                            # Interpolate between points
-                            lower_points = [p for p in user.demand_curve if p['interestRate'] < rate]
-                            upper_points = [p for p in user.demand_curve if p['interestRate'] > rate]
-                            
-                            if lower_points and upper_points:
-                                lower_point = max(lower_points, key=lambda p: p['interestRate'])
-                                upper_point = min(upper_points, key=lambda p: p['interestRate'])
-                                
-                                rate_range = upper_point['interestRate'] - lower_point['interestRate']
-                                if rate_range > 0:
-                                    position = (rate - lower_point['interestRate']) / rate_range
-                                    borrowing = lower_point['borrowingAmount'] + position * (
-                                        upper_point['borrowingAmount'] - lower_point['borrowingAmount']
-                                    )
-                                    total_borrowing += borrowing
-                                else:
-                                    total_borrowing += lower_point['borrowingAmount']
-                            elif lower_points:
-                                total_borrowing += max(lower_points, key=lambda p: p['interestRate'])['borrowingAmount']
-                            elif upper_points:
-                                total_borrowing += min(upper_points, key=lambda p: p['interestRate'])['borrowingAmount']
-                    
-                    aggregate_demand.append({
-                        'interestRate': rate,
-                        'borrowingAmount': total_borrowing
-                    })
-            
-            # Create event data with all necessary info for client updates
-            event_data = {
-                'user_id': user_id, 
-                'decision_type': decision_type,
-                'aggregates': aggregates,
-                'waiting_for': list(game_state.pending_decisions)
-            }
-            
-            # Add aggregate demand data if available
-            if aggregate_demand:
-                event_data['aggregate_demand'] = aggregate_demand
-            
-            # Notify other clients of the update with the enhanced data
-            socketio.emit('decision_submitted', event_data)
+                event_data['aggregate_demand'] = game_state.aggregate_demand()
+            broadcast('decision_submitted', event_data)
             return jsonify({'success': True})
         else:
             return jsonify({'success': False, 'error': 'Invalid decision'}), 400
     except ValueError:
         return jsonify({'success': False, 'error': 'Amount must be a number'}), 400
 
-@app.route('/api/current_state')
+@bp.route('/api/submit_decisions', methods=['POST'])
+@admitted(rate_limited=False)
+@with_game_lock
+def submit_decisions():
+    """
+    API endpoint for submitting many players' decisions at once (TA tools, kiosks, load tests).
+    
+    JSON body: a list of {user_id, decision_type, amount, demand_curve} objects, or
+    {"decisions": [...]}. Each decision is validated on its own; the accepted ones
+    are announced in a single decision_submitted event.
+    """
+    data = request.json
+    decisions = data.get('decisions') if isinstance(data, dict) else data
+    if not isinstance(decisions, list) or not decisions:
+        return jsonify({'success': False, 'error': 'Expected a list of decisions'}), 400
+    if len(decisions) > MAX_DECISION_BATCH:
+        return jsonify({'success': False,
+                        'error': f'At most {MAX_DECISION_BATCH} decisions per request'}), 400
+    
+    results = game_state.record_decisions(decisions)
+    accepted = [result['user_id'] for result in results if result['success']]
+    if accepted:
+        event_data = decision_event(user_ids=accepted)
+        if any(result['success'] and decision.get('decision_type') == 'borrow' and decision.get('demand_curve')
+               for result, decision in zip(results, decisions)):
+            event_data['aggregate_demand'] = game_state.aggregate_demand()
+        broadcast('decision_submitted', event_data)
+    
+    return jsonify({'success': len(accepted) == len(results), 'accepted': len(accepted), 'results': results})
+
+def decision_event(**fields):
+    """
+    The decision_submitted payload: ``fields`` plus the current aggregates and how many players are still pending.
+    
+    Only the players who just decided are listed (in ``fields``), not everyone still
+    pending: clients that show the waiting list drop them from the list they got with
+    the round, so each event stays small however large the class.
+    """
+    fields.update(aggregates=game_state.compute_aggregates(),
+                  waiting_count=len(game_state.pending_decisions))
+    return fields
+
+@bp.route('/api/current_state')
+@with_game_lock
 def get_current_state():
     """API endpoint to get the current game state"""
     user_id = request.args.get('user_id')
     
     # User registration is handled by the /player endpoint when the dashboard is loaded
-    # Removed auto-registration from here to avoid duplication
-    # if user_id:
-    #     if user_id not in game_state.users:
-    #         game_state.add_user(user_id)
-    #         player_info = { ... }
-    #         socketio.emit('player_joined', {"player": player_info})
-    #     state = game_state.get_user_state(user_id)
-    # else:
-    #     state = game_state.get_full_state()
-
     if user_id:
         if user_id in game_state.users:
             state = game_state.get_user_state(user_id)
@@ -202,7 +406,9 @@ def get_current_state():
     
     return jsonify(state)
 
-@app.route('/api/check_unique_user', methods=['POST'])
+@bp.route('/api/check_unique_user', methods=['POST'])
+@admitted
+@with_game_lock
 def check_unique_user():
     """API endpoint to check if a user ID or name is already taken"""
     data = request.json
@@ -210,7 +416,13 @@ def check_unique_user():
     display_name = data.get('display_name')
     
     id_exists = user_id in game_state.users
-    name_exists = any(user.name == display_name for user in game_state.users.values() if display_name)
+    name_exists = False
+    if display_name:
+        # A free name is held for a new user for a short while so nobody else can take it before they join
+        if id_exists:
+            name_exists = game_state.is_name_taken(display_name, user_id)
+        else:
+            name_exists = not game_state.reserve_name(display_name, user_id, holder=client_key())
     
     return jsonify({
         'unique': not (id_exists or name_exists),
@@ -218,7 +430,9 @@ def check_unique_user():
         'name_exists': name_exists
     })
 
-@app.route('/api/add_test_players', methods=['POST'])
+@bp.route('/api/add_test_players', methods=['POST'])
+@admitted
+@with_game_lock
 def add_test_players():
     """API endpoint to add test users using the test player service"""
     try:
@@ -236,7 +450,7 @@ def add_test_players():
         users_added = test_player_service.add_test_players(game_state, count, optimal_decisions)
                 
         # Notify all clients of the update
-        socketio.emit('players_added', {'count': count, 'users': users_added})
+        broadcast('players_added', {'count': count, 'users': users_added})
         
         return jsonify({
             'success': True, 
@@ -244,18 +458,20 @@ def add_test_players():
             'users': users_added
         })
     except Exception as e:
-        app.logger.error(f"Error adding test users: {str(e)}")
+        current_app.logger.error(f"Error adding test users: {str(e)}")
         # Consider more specific error handling/logging
         return jsonify({'success': False, 'error': 'Failed to add test users due to an internal error'}), 500
 
-@app.route('/api/set_policy', methods=['POST'])
+@bp.route('/api/set_policy', methods=['POST'])
+@admitted
+@with_game_lock
 def set_policy():
     if not session.get('is_professor'):
         return jsonify({'success': False, 'message': 'Unauthorized'})
     
     try:
         data = request.json
-        app.logger.info(f"Received policy update data: {data}")
+        current_app.logger.info(f"Received policy update data: {data}")
         
         # Standardize tax rates format - always use a tax_rates object
         tax_rates = data.get('tax_rates', {})
@@ -281,7 +497,7 @@ def set_policy():
         # Handle interest rate if provided
         interest_rate = data.get('interest_rate')
         if interest_rate is not None:
-            app.logger.info(f"Setting fixed interest rate: {interest_rate}")
+            current_app.logger.info(f"Setting fixed interest rate: {interest_rate}")
             game_state.interest_rate = float(interest_rate)
         
         # Get income parameters with defaults
@@ -290,7 +506,7 @@ def set_policy():
         income_old = data.get('income_old', 0.0)
         
         # Log the values being sent to set_policy
-        app.logger.info(f"Setting policy with: tax_rate_young={tax_rate_young}, "
+        current_app.logger.info(f"Setting policy with: tax_rate_young={tax_rate_young}, "
                         f"tax_rate_middle={tax_rate_middle}, "
                         f"tax_rate_old={tax_rate_old}, "
                         f"borrowing_limit={borrowing_limit}")
@@ -353,12 +569,15 @@ def set_policy():
         }
         
         # Send initial update to clients with current values
-        app.logger.info(f"Sending initial policy update to clients. Borrowing limit: {policy_update['policy']['borrowing_limit']}")
-        socketio.emit('policy_updated', policy_update)
+        current_app.logger.info(f"Sending initial policy update to clients. Borrowing limit: {policy_update['policy']['borrowing_limit']}")
+        broadcast('policy_updated', policy_update)
         
         # Only if the interest rate is not manually set, we need to calculate the equilibrium
         if interest_rate is None:
-            # Launch a background thread to calculate the equilibrium
+            logger = current_app.logger
+            
+            # Calculate the equilibrium in the background
+            @with_game_lock
             def background_equilibrium_calculation():
                 try:
                     # Calculate equilibrium interest rate
@@ -382,68 +601,82 @@ def set_policy():
                         'is_equilibrium_update': True
                     }
                     
-                    app.logger.info(f"Equilibrium calculation complete. New interest rate: {new_rate}")
+                    logger.info(f"Equilibrium calculation complete. New interest rate: {new_rate}")
                     
                     # Send the updated interest rate to all clients
-                    socketio.emit('policy_updated', updated_policy)
+                    broadcast('policy_updated', updated_policy)
                 except Exception as e:
-                    app.logger.error(f"Error in background equilibrium calculation: {str(e)}")
-                    app.logger.exception("Full traceback:")
+                    logger.error(f"Error in background equilibrium calculation: {str(e)}")
+                    logger.exception("Full traceback:")
             
-            # Start the background thread
-            app.logger.info("Starting background equilibrium calculation...")
-            thread = threading.Thread(target=background_equilibrium_calculation)
-            thread.daemon = True  # Make sure the thread doesn't block app shutdown
-            thread.start()
+            current_app.logger.info("Starting background equilibrium calculation...")
+            run_in_background(background_equilibrium_calculation)
             
         return jsonify({'success': True})
     except Exception as e:
-        app.logger.error(f"Error setting policy: {str(e)}")
-        app.logger.exception("Full traceback:")
+        current_app.logger.error(f"Error setting policy: {str(e)}")
+        current_app.logger.exception("Full traceback:")
         return jsonify({'success': False, 'message': 'Failed to set policy due to an internal error'})
 
-@app.route('/api/advance_round', methods=['POST'])
+@bp.route('/api/advance_round', methods=['POST'])
+@admitted
 def advance_round():
     """API endpoint for professor to advance to the next round"""
     try:
         data = request.json or {}
-        force = data.get('force', False)
+        error = advance_game_round(force=data.get('force', False))
+        if error:
+            return jsonify({'success': False, 'error': error}), 400
         
-        # Force auto-generation of test user decisions first
-        test_user_ids = [user_id for user_id in game_state.pending_decisions 
-                          if game_state.is_test_user(user_id) and user_id in game_state.users]
+        return jsonify({'success': True, 'round': game_state.current_round})
+            
+    except Exception as e:
+        current_app.logger.error(f"Error advancing round: {str(e)}")
+        current_app.logger.exception("Exception during round advancement:")
+        return jsonify({'success': False, 'error': 'An internal error has occurred.'}), 500
+
+@profiler.wrap('advance_round')
+def advance_game_round(force=False, expected_round=None):
+    """
+    Close the current round and start the next one; the equilibrium is solved in the background.
+    
+    Pending test players get default decisions; pending human players only do with ``force``.
+    
+    Args:
+        force: fill in the decisions of human players who haven't submitted
+        expected_round: only advance if this is still the current round
+        
+    Returns:
+        None once advanced, or why the round could not be advanced
+    """
+    with game_lock:
+        if expected_round is not None and game_state.current_round != expected_round:
+            return f'Round {expected_round} has already been advanced'
         
-        app.logger.info(f"Handling {len(test_user_ids)} pending test users before advancing round...")
+        pending = game_state.pending_decisions
+        
+        # Force auto-generation of test user decisions first
+        current_app.logger.info("Handling %d pending test users before advancing round...", pending.count('test'))
         
         # First try using the game_state's built-in method
         game_state.generate_test_player_decisions()
         
-        # If that didn't clear all test users, use direct override approach
-        remaining_test_users = [user_id for user_id in game_state.pending_decisions 
-                                if game_state.is_test_user(user_id) and user_id in game_state.users]
-        
-        if remaining_test_users:
-            app.logger.info(f"Still have {len(remaining_test_users)} test users that need force-decisions")
-            for user_id in remaining_test_users:
-                force_minimal_decision(user_id)
+        # If that didn't clear all test users, fill in defaults for the rest in one batch
+        if pending.count('test'):
+            current_app.logger.info("Still have %d test users that need force-decisions", pending.count('test'))
+            game_state.fill_pending(pending.ids('test'))
         
         # Make sure no human users are left in pending decisions
-        remaining_human_users = [game_state.users[uid].name for uid in game_state.pending_decisions 
-                                 if not game_state.is_test_user(uid) and uid in game_state.users]
+        remaining_human_users = [game_state.users[uid].name for uid in pending.ids('human')]
         
         if remaining_human_users and not force:
-            app.logger.warning(f"Cannot advance round: waiting for human users: {remaining_human_users}")
-            return jsonify({
-                'success': False, 
-                'error': f'Waiting for decisions from human users: {", ".join(remaining_human_users)}'
-            }), 400
+            current_app.logger.warning("Cannot advance round: waiting for human users: %s", remaining_human_users)
+            return f'Waiting for decisions from human users: {", ".join(remaining_human_users)}'
         
-        # If there are human users pending but force is True, remove them from pending
+        # If there are human users pending but force is True, fill in their decisions
         if remaining_human_users and force:
-            app.logger.info(f"Force advancing round with {len(remaining_human_users)} human users pending")
-            for uid in list(game_state.pending_decisions):
-                if not game_state.is_test_user(uid) and uid in game_state.users:
-                    force_minimal_decision(uid)
+            current_app.logger.info("Force advancing round with %d human users pending", len(remaining_human_users))
+            game_state.fill_pending(pending.ids('human'))
         
         # At this point we should be ready to run the round
         # But we'll split this into two phases:
@@ -451,7 +684,7 @@ def advance_round():
         # 2. Then do the slower equilibrium calculation in the background and update when done
 
         # PHASE 1: Fast round advancement
-        app.logger.info(f"Running initial phase of round {game_state.current_round}...")
+        current_app.logger.info(f"Running initial phase of round {game_state.current_round}...")
         
         # Store round data (with current interest rate, will be updated later)
         round_data = {
@@ -474,7 +707,7 @@ def advance_round():
             user.advance_age()
         
         # Reset pending decisions for the new round
-        game_state.pending_decisions = set(game_state.users.keys())
+        game_state.reset_pending()
         
         # Immediately generate decisions for test users for the next round
         game_state.generate_test_player_decisions()
@@ -500,13 +733,16 @@ def advance_round():
         }
 
         # Send the initial notification to all clients
-        socketio.emit('round_advanced', initial_event_data)
+        broadcast('round_advanced', initial_event_data)
         
         # Start the background phase
+        logger = current_app.logger
+        
+        @with_game_lock
         def background_equilibrium_for_round():
             try:
                 # PHASE 2: Calculate the equilibrium interest rate (slow operation)
-                app.logger.info("Computing equilibrium interest rate in background...")
+                logger.info("Computing equilibrium interest rate in background...")
                 new_rate = game_state.calculate_equilibrium()
                 
                 # Update the stored rate
@@ -537,48 +773,80 @@ def advance_round():
                 }
                 
                 # Send the updated interest rate to all clients
-                socketio.emit('policy_updated', updated_event_data)
-                app.logger.info(f"Background equilibrium calculation complete: {new_rate}")
+                broadcast('policy_updated', updated_event_data)
+                logger.info(f"Background equilibrium calculation complete: {new_rate}")
             except Exception as e:
-                app.logger.error(f"Error in background equilibrium calculation: {str(e)}")
-                app.logger.exception("Exception during background equilibrium calculation:")
+                logger.error(f"Error in background equilibrium calculation: {str(e)}")
+                logger.exception("Exception during background equilibrium calculation:")
         
-        # Start the background thread
-        thread = threading.Thread(target=background_equilibrium_for_round)
-        thread.daemon = True
-        thread.start()
+        # Run phase 2 off the request path
+        run_in_background(background_equilibrium_for_round)
         
-        return jsonify({'success': True, 'round': game_state.current_round})
-            
-    except Exception as e:
-        app.logger.error(f"Error advancing round: {str(e)}")
-        app.logger.exception("Exception during round advancement:")
-        return jsonify({'success': False, 'error': 'An internal error has occurred.'}), 500
+        
+        # Start the next round's decision window
+        schedule_deadline()
+        return None
+
+# Decision deadlines of every game, keyed by GameState; expired ones run off the wheel's thread
+deadlines = TimerWheel(runner=run_in_background)
+
+def schedule_deadline():
+    """(Re)start the current round's decision deadline, or clear it if no decision window is set."""
+    game = game_state
+    if not game.decision_window:
+        deadlines.cancel(game)
+        game.decision_deadline = None
+    else:
+        app = current_app._get_current_object()
+        round_number = game.current_round
+        
+        def expire():
+            with app.app_context():
+                expire_deadline(game, round_number)
+        
+        game.decision_deadline = deadlines.schedule(game, game.decision_window, expire)
+    broadcast('deadline_updated', {'round': game.current_round, 'deadline': game.deadline_state()})
 
-@app.route('/api/reset_game', methods=['POST'])
+def expire_deadline(game, round_number):
+    """Deadline callback: fill in every pending decision in one batch and, if enabled, advance the round."""
+    with game_lock:
+        if game is not game_state or game.current_round != round_number:
+            return  # The game was reset or the round advanced meanwhile
+        game.decision_deadline = None
+        filled = game.fill_pending()
+        current_app.logger.info("Decision deadline for round %d passed: filled in %d decisions",
+                                round_number, len(filled))
+        if filled:
+            broadcast('decision_submitted', decision_event(user_ids=filled, deadline_expired=True))
+        if game.auto_advance:
+            advance_game_round(force=True, expected_round=round_number)
+
+@bp.route('/api/reset_game', methods=['POST'])
+@with_game_lock
 def reset_game():
     """API endpoint to completely reset the game state"""
     try:
         global game_state
+        deadlines.cancel(game_state)
         # Create a brand new game state
         game_state = GameState()
         
         # Notify all clients of the reset
-        socketio.emit('game_reset', {})
+        broadcast('game_reset', {})
         
         return jsonify({
             'success': True,
             'message': 'Game has been reset to initial state'
         })
     except Exception as e:
-        app.logger.error(f"Error resetting game: {str(e)}")
-        app.logger.exception("Exception during game reset:")
+        current_app.logger.error(f"Error resetting game: {str(e)}")
+        current_app.logger.exception("Exception during game reset:")
         return jsonify({
             'success': False,
             'error': 'Failed to reset game due to an internal error.'
         }), 500
 
-@app.route('/api/get_game_state', methods=['GET'])
+@bp.route('/api/get_game_state', methods=['GET'])
 def get_game_state():
     try:
         # Create a simplified version of the game state with only what's needed for the dashboard
@@ -602,93 +870,39 @@ def get_game_state():
         }
         return jsonify({'success': True, 'game_state': state})
     except Exception as e:
-        app.logger.error(f"Error getting game state: {str(e)}")
-        app.logger.exception("Exception during game state retrieval:")
+        current_app.logger.error(f"Error getting game state: {str(e)}")
+        current_app.logger.exception("Exception during game state retrieval:")
         return jsonify({'success': False, 'message': 'Failed to retrieve game state due to an internal error.'})
 
 @socketio.on('connect')
 def handle_connect():
     """Handle new socket connection"""
-    print('Client connected')
+    CONNECTED_CLIENTS.inc()
+    current_app.logger.debug("Client connected: %s", request.sid)
 
 @socketio.on('disconnect')
 def handle_disconnect():
     """Handle socket disconnection"""
-    print('Client disconnected')
+    CONNECTED_CLIENTS.dec()
+    current_app.logger.debug("Client disconnected: %s", request.sid)
 
-# Add this after imports but before route definitions
-def force_minimal_decision(user_id):
-    """
-    Force a minimal safe decision for a user who hasn't submitted one.
-    This is used for advancing rounds when some users haven't decided.
-    
-    Args:
-        user_id: ID of the user to force a decision for
-        
-    Returns:
-        bool: True if decision was successfully forced, False otherwise
-    """
-    if user_id not in game_state.users:
-        app.logger.warning(f"Cannot force decision for unknown user: {user_id}")
-        return False
-        
-    user = game_state.users[user_id]
-    app.logger.info(f"Forcing safe decision for {user.name} ({user.age_stage})")
-    
-    try:
-        if user.age_stage == 'Y':
-            # For Young: minimal safe borrowing
-            success = game_state.record_decision(user_id, 'borrow', 1.0)
-            
-            # Create minimal demand curve if needed
-            if success and not hasattr(user, 'demand_curve') or not user.demand_curve:
-                # Create a simple demand curve with minimal borrowing
-                minimal_demand_curve = []
-                interest_rates = [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
-                
-                if game_state.make_optimal_decisions:
-                    # For optimal decisions - maximum borrowing at each rate
-                    for rate in interest_rates:
-                        max_borrowing = game_state.borrowing_limit / (1 + rate/100)
-                        minimal_demand_curve.append({
-                            'interestRate': rate,
-                            'borrowingAmount': round(max_borrowing, 1)
-                        })
-                else:
-                    # Simple conservative curve
-                    for rate in interest_rates:
-                        # Calculate adjusted borrowing limit based on interest rate
-                        adjusted_borrowing_limit = game_state.borrowing_limit / (1 + rate/100)
-                        # Use a small percentage of the adjusted limit
-                        borrowing_amount = min(1.0, adjusted_borrowing_limit * 0.05)
-                        minimal_demand_curve.append({
-                            'interestRate': rate,
-                            'borrowingAmount': round(borrowing_amount, 1)
-                        })
-                
-                # Store the minimal demand curve
-                user.demand_curve = minimal_demand_curve
-                
-            return success
-                
-        elif user.age_stage == 'M':
-            # Middle-aged: minimal safe saving
-            return game_state.record_decision(user_id, 'save', 1.0)
-            
-        elif user.age_stage == 'O':
-            # Old: consume all (only option)
-            return game_state.record_decision(user_id, 'consume', 0)
-            
-        else:
-            app.logger.warning(f"Unknown age stage {user.age_stage} for user {user_id}")
-            return False
-            
-    except Exception as e:
-        app.logger.error(f"Error forcing decision for {user_id}: {str(e)}")
-        return False
+@socketio.on('set_encoding')
+def handle_set_encoding(encoding):
+    """Switch this client's broadcasts to another wire format ('json', 'compact' or, if installed, 'msgpack')."""
+    if encoding not in wire_format.ENCODINGS:
+        return {'success': False, 'error': f'Unsupported encoding: {encoding}',
+                'encodings': list(wire_format.ENCODINGS)}
+    for other in wire_format.COMPACT_ENCODINGS:
+        leave_room(wire_format.room(other))
+    if encoding != 'json':
+        # The code table goes out before the first compact payload can
+        socketio.emit('wire_format', wire_format.describe(encoding), to=request.sid)
+        join_room(wire_format.room(encoding))
+    return {'success': True, 'encoding': encoding}
 
 if __name__ == '__main__':
-    # For development - use production WSGI server in production
-    port = config.PORT
-    debug = config.DEBUG
-    socketio.run(app, host='0.0.0.0', port=port, debug=debug)
+    # For development - use production WSGI server in production.
+    # Run the importable module rather than __main__, so the blueprints share its game state
+    import app as game
+    app = game.create_app()
+    game.socketio.run(app, host='0.0.0.0', port=app.config['PORT'], debug=app.config['DEBUG'])
@@ -0,0 +1,225 @@
+"""
+Asyncio (ASGI) serving mode for the OLG game.
+
+Socket.IO runs on python-socketio's AsyncServer, so each idle student
+websocket is a coroutine rather than a thread or greenlet. The Flask routes
+are served unchanged: every HTTP request runs in a thread pool and its body
+is streamed back to the event loop, and the slow work the routes hand to
+run_in_background (equilibrium solves) goes to a separate pool, so a long
+solve never stalls the loop or the request workers.
+
+Run with any ASGI server, for example:
+
+    uvicorn asgi:app --port 5001
+    python asgi.py            # uses uvicorn if it is installed
+"""
+import asyncio
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import socketio
+
+import app as game
+from config.config import get_config
+from services import wire_format
+from services.admission import admission
+from services.metrics import CONNECTED_CLIENTS
+
+
+class WsgiToAsgi:
+    """Serve a WSGI app over ASGI HTTP, running each request in a thread pool."""
+
+    # Chunks buffered between the WSGI thread and the event loop
+    QUEUE_SIZE = 16
+
+    def __init__(self, wsgi_app, executor):
+        self.wsgi_app = wsgi_app
+        self.executor = executor
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return
+
+        body = bytearray()
+        while True:
+            message = await receive()
+            body += message.get('body', b'')
+            if not message.get('more_body'):
+                break
+
+        loop = asyncio.get_running_loop()
+        chunks = asyncio.Queue(self.QUEUE_SIZE)
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                                   for name, value in headers]
+
+        def put(item):
+            # Blocks the WSGI thread while the client is slower than the app
+            asyncio.run_coroutine_threadsafe(chunks.put(item), loop).result()
+
+        def run():
+            result = self.wsgi_app(self._environ(scope, bytes(body)), start_response)
+            try:
+                for chunk in result:
+                    if chunk:
+                        put(chunk)
+            finally:
+                if hasattr(result, 'close'):
+                    result.close()
+
+        async def produce():
+            try:
+                await loop.run_in_executor(self.executor, run)
+            finally:
+                await chunks.put(None)
+
+        producer = asyncio.ensure_future(produce())
+        started = False
+        while True:
+            chunk = await chunks.get()
+            if not started and (chunk is not None or 'status' in response):
+                await send({'type': 'http.response.start', 'status': response['status'],
+                            'headers': response['headers']})
+                started = True
+            if chunk is None:
+                break
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+
+        try:
+            await producer
+        except Exception:
+            if not started:
+                await send({'type': 'http.response.start', 'status': 500,
+                            'headers': [(b'content-type', b'text/plain')]})
+                await send({'type': 'http.response.body', 'body': b'Internal Server Error'})
+                return
+            raise
+        await send({'type': 'http.response.body', 'body': b''})
+
+    @staticmethod
+    def _environ(scope, body):
+        server = scope.get('server') or ('localhost', 80)
+        environ = {
+            'REQUEST_METHOD': scope['method'],
+            'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+            'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+            'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+            'SERVER_NAME': str(server[0]),
+            'SERVER_PORT': str(server[1]),
+            'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.version': (1, 0),
+            'wsgi.url_scheme': scope.get('scheme', 'http'),
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.errors': sys.stderr,
+            'wsgi.multithread': True,
+            'wsgi.multiprocess': False,
+            'wsgi.run_once': False
+        }
+        if scope.get('client'):
+            environ['REMOTE_ADDR'] = scope['client'][0]
+
+        for raw_name, raw_value in scope.get('headers', []):
+            name = raw_name.decode('latin-1').upper().replace('-', '_')
+            value = raw_value.decode('latin-1')
+            if name == 'CONTENT_TYPE':
+                environ['CONTENT_TYPE'] = value
+                continue
+            if name == 'CONTENT_LENGTH':
+                continue
+            key = f'HTTP_{name}'
+            environ[key] = f"{environ[key]},{value}" if key in environ else value
+        return environ
+
+
+def create_asgi_app(config=None, http_workers=None, background_workers=None):
+    """
+    Build the ASGI application: Socket.IO on an AsyncServer, everything else
+    through the Flask app.
+
+    Args:
+        config: configuration class (defaults to the one selected by FLASK_ENV)
+        http_workers: threads serving Flask requests (defaults to ASGI_HTTP_WORKERS)
+        background_workers: threads for background solves (defaults to ASGI_BACKGROUND_WORKERS)
+    """
+    config = config or get_config()
+    # Flask-SocketIO is bypassed in this mode, so don't let it pull in eventlet
+    flask_app = game.create_app(type('AsgiConfig', (config,), {'SOCKETIO_ASYNC_MODE': 'threading'}))
+
+    http_workers = http_workers or config.ASGI_HTTP_WORKERS
+    http_executor = ThreadPoolExecutor(http_workers, thread_name_prefix='olg-http')
+    if admission.max_concurrent > 0:
+        # Requests queued for admission hold a worker thread while they wait; leave
+        # one thread over so professor requests can always reach the queue
+        admission.configure(max_queue=max(0, min(admission.max_queue,
+                                                 http_workers - admission.max_concurrent - 1)))
+    background_executor = ThreadPoolExecutor(background_workers or config.ASGI_BACKGROUND_WORKERS,
+                                             thread_name_prefix='olg-background')
+    sio = socketio.AsyncServer(async_mode='asgi')
+
+    @sio.event
+    async def connect(sid, environ):
+        CONNECTED_CLIENTS.inc()
+        flask_app.logger.debug("Client connected: %s", sid)
+
+    @sio.event
+    async def disconnect(sid, *args):
+        CONNECTED_CLIENTS.dec()
+        flask_app.logger.debug("Client disconnected: %s", sid)
+
+    @sio.event
+    async def set_encoding(sid, encoding):
+        if encoding not in wire_format.ENCODINGS:
+            return {'success': False, 'error': f'Unsupported encoding: {encoding}',
+                    'encodings': list(wire_format.ENCODINGS)}
+        for other in wire_format.COMPACT_ENCODINGS:
+            await sio.leave_room(sid, wire_format.room(other))
+        if encoding != 'json':
+            await sio.emit('wire_format', wire_format.describe(encoding), to=sid)
+            await sio.enter_room(sid, wire_format.room(encoding))
+        return {'success': True, 'encoding': encoding}
+
+    def startup():
+        loop = asyncio.get_running_loop()
+
+        def emit(event, data, **kwargs):
+            coroutine = sio.emit(event, data, **kwargs)
+            try:
+                on_loop = asyncio.get_running_loop() is loop
+            except RuntimeError:
+                on_loop = False
+            if on_loop:
+                loop.create_task(coroutine)
+            else:
+                # Routes run in worker threads; hand the emit to the loop and wait for the fan-out
+                asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+
+        game.configure_dispatch(emit=emit, manager=sio.manager, background=background_executor.submit)
+
+    def shutdown():
+        game.configure_dispatch()
+        background_executor.shutdown(wait=False)
+        http_executor.shutdown(wait=False)
+
+    return socketio.ASGIApp(sio, other_asgi_app=WsgiToAsgi(flask_app, http_executor),
+                            on_startup=startup, on_shutdown=shutdown)
+
+
+def __getattr__(name):
+    """Create the default ASGI app on first access of ``asgi.app`` (e.g. by uvicorn)."""
+    if name == 'app':
+        globals()['app'] = create_asgi_app()
+        return globals()['app']
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+if __name__ == '__main__':
+    try:
+        import uvicorn
+    except ImportError:
+        sys.exit("The ASGI serving mode needs an ASGI server: pip install uvicorn")
+    uvicorn.run(create_asgi_app(), host='0.0.0.0', port=get_config().PORT)
@@ -0,0 +1,182 @@
+"""
+pytest configuration for the hot-path benchmark suite.
+
+Benchmarks are skipped unless pytest is run with --benchmark:
+
+    python -m pytest benchmarks --benchmark
+    python -m pytest benchmarks --benchmark --bench-sizes 10,1000 --bench-threshold 0.5
+    python -m pytest benchmarks --benchmark --bench-update-baseline
+
+Each benchmark is compared with the stored baseline (benchmarks/baseline.json)
+and fails when its time or peak memory exceeds the baseline by more than the
+threshold plus a small absolute slack, so that timer and scheduler noise on
+millisecond benchmarks doesn't fail them. Sizes without a baseline entry are
+recorded but never fail.
+"""
+import gc
+import json
+import os
+import platform
+import time
+import tracemalloc
+
+import pytest
+
+from services.policy_sweep import build_game
+
+DEFAULT_SIZES = '10,100,1000,10000,100000'
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+# Allowed relative regression; timings of the same build vary by a third between runs
+DEFAULT_THRESHOLD = 0.5
+
+# Keep repeating a measurement until it has run for at least this long...
+MIN_MEASURE_SECONDS = 0.05
+# ...taking the best of this many repeats, unless one call is already slow
+REPEATS = 5
+SLOW_CALL_SECONDS = 1.0
+# Time and peak memory differences below these are noise, never regressions
+TIME_SLACK_SECONDS = 0.002
+MEMORY_SLACK_BYTES = 64 * 1024
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('benchmark', 'hot-path benchmarks')
+    group.addoption('--benchmark', action='store_true', default=False,
+                    help='run the hot-path benchmarks (skipped otherwise)')
+    group.addoption('--bench-sizes', default=DEFAULT_SIZES,
+                    help=f'comma separated player counts (default {DEFAULT_SIZES})')
+    group.addoption('--bench-threshold', type=float, default=DEFAULT_THRESHOLD,
+                    help=f'allowed relative regression against the baseline (default {DEFAULT_THRESHOLD})')
+    group.addoption('--bench-baseline', default=DEFAULT_BASELINE,
+                    help='baseline JSON file')
+    group.addoption('--bench-update-baseline', action='store_true', default=False,
+                    help='write the measured results to the baseline file instead of comparing')
+
+
+def _option(config, name, default=None):
+    # The options only exist when this conftest is loaded at startup
+    # (i.e. pytest was pointed at benchmarks/)
+    return config.getoption(name, default=default)
+
+
+def pytest_generate_tests(metafunc):
+    if 'players' in metafunc.fixturenames:
+        sizes = [int(size) for size in str(_option(metafunc.config, 'bench_sizes', DEFAULT_SIZES)).split(',')]
+        metafunc.parametrize('players', sizes)
+
+
+def pytest_collection_modifyitems(config, items):
+    if _option(config, 'benchmark', False):
+        return
+    skip = pytest.mark.skip(reason='benchmarks only run with --benchmark')
+    for item in items:
+        if 'bench' in getattr(item, 'fixturenames', ()):
+            item.add_marker(skip)
+
+
+class BenchmarkRecorder:
+    """Measures callables and checks them against a stored baseline."""
+
+    def __init__(self, config):
+        self.threshold = _option(config, 'bench_threshold', DEFAULT_THRESHOLD)
+        self.path = _option(config, 'bench_baseline', DEFAULT_BASELINE)
+        self.update = _option(config, 'bench_update_baseline', False)
+        self.results = {}
+        self.baseline = {}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                self.baseline = json.load(f).get('results', {})
+
+    def measure(self, name, func, setup=None):
+        """
+        Time ``func`` (best per-call time over several repeats) and record the
+        peak memory it allocates. ``setup`` runs untimed before every call.
+
+        Returns the result dict and fails the test on a regression.
+        """
+        seconds = self._best_time(func, setup)
+        peak = self._peak_memory(func, setup)
+        result = {'seconds': seconds, 'peak_bytes': peak}
+        self.results[name] = result
+
+        reference = self.baseline.get(name)
+        if reference and not self.update:
+            limit = 1 + self.threshold
+            failures = [
+                f"{key} {reference[key]:.6g} -> {result[key]:.6g}"
+                for key, slack in (('seconds', TIME_SLACK_SECONDS), ('peak_bytes', MEMORY_SLACK_BYTES))
+                if reference.get(key) and result[key] > reference[key] * limit + slack
+            ]
+            if failures:
+                pytest.fail(f"{name} regressed more than {self.threshold:.0%}: {'; '.join(failures)}")
+        return result
+
+    @staticmethod
+    def _best_time(func, setup):
+        # Like timeit, keep the cyclic GC out of the timings: how often it runs
+        # depends on everything else alive in the process, not on the code under test
+        gc_was_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return BenchmarkRecorder._timed_repeats(func, setup)
+        finally:
+            if gc_was_enabled:
+                gc.enable()
+
+    @staticmethod
+    def _timed_repeats(func, setup):
+        best = float('inf')
+        for _ in range(REPEATS):
+            calls, elapsed = 0, 0.0
+            while elapsed < MIN_MEASURE_SECONDS:
+                if setup:
+                    setup()
+                start = time.perf_counter()
+                func()
+                elapsed += time.perf_counter() - start
+                calls += 1
+            best = min(best, elapsed / calls)
+            if best > SLOW_CALL_SECONDS:
+                break
+        return best
+
+    @staticmethod
+    def _peak_memory(func, setup):
+        if setup:
+            setup()
+        tracemalloc.start()
+        try:
+            func()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return peak
+
+    def write(self):
+        results = dict(self.baseline)
+        results.update(self.results)
+        with open(self.path, 'w') as f:
+            json.dump({
+                'python': platform.python_version(),
+                'machine': platform.machine(),
+                'results': dict(sorted(results.items()))
+            }, f, indent=2)
+
+
+@pytest.fixture(scope='session')
+def bench(request):
+    recorder = BenchmarkRecorder(request.config)
+    yield recorder
+    if recorder.update and recorder.results:
+        recorder.write()
+
+
+_games = {}
+
+
+@pytest.fixture
+def game(players):
+    """A seeded game with ``players`` test players in all three stages (built once per size)."""
+    if players not in _games:
+        _games[players] = build_game({}, num_test_players=players, seed=0)
+    return _games[players]
@@ -0,0 +1,325 @@
+"""
+In-process load test for the OLG game server.
+
+Builds the app with create_app() and drives it through the Flask test client
+and the Flask-SocketIO test client, so no server needs to be running. N
+simulated students open a Socket.IO connection, join through /player and
+submit a decision every round while the professor advances rounds. The report
+covers request throughput, latency percentiles and histograms per endpoint,
+how long each Socket.IO broadcast takes to fan out to every client, and the
+bytes each client receives per broadcast in the chosen wire encoding.
+
+Only 2xx responses count toward latencies and throughput. Other responses
+are counted per endpoint and status code, and make the run exit with status 1.
+Admission control is off, so the run measures the server rather than its
+rate limits.
+
+Example:
+    python -m benchmarks.load_test --students 300 --rounds 3 --concurrency 8 \\
+        --output load.json --compare baseline_load.json
+    python -m benchmarks.load_test --students 500 --rounds 2 --encoding compact
+"""
+import argparse
+import contextlib
+import io
+import json
+import logging
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import app as app_module
+from config.config import TestingConfig
+from services import wire_format
+from services.metrics import EMIT_BYTES
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+HISTOGRAM_BUCKETS_MS = [0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, float('inf')]
+
+DEMAND_CURVE = [
+    {'interestRate': 0, 'borrowingAmount': 40},
+    {'interestRate': 2, 'borrowingAmount': 35},
+    {'interestRate': 5, 'borrowingAmount': 25},
+    {'interestRate': 10, 'borrowingAmount': 5}
+]
+
+
+class LoadTestConfig(TestingConfig):
+    # The Socket.IO test client does not need (or want) eventlet
+    SOCKETIO_ASYNC_MODE = 'threading'
+    # All simulated students share one address, so per-client limits would reject most of them
+    ADMISSION_RATE = 0
+    ADMISSION_MAX_CONCURRENT = 0
+
+
+def summarize(samples):
+    """Percentiles and a bucketed histogram (milliseconds) for a list of durations in seconds."""
+    if not samples:
+        return {'count': 0}
+    ordered = sorted(samples)
+
+    def percentile(p):
+        return ordered[min(len(ordered) - 1, int(p * len(ordered)))] * 1000
+
+    histogram = [0] * len(HISTOGRAM_BUCKETS_MS)
+    for sample in ordered:
+        ms = sample * 1000
+        histogram[next(i for i, bound in enumerate(HISTOGRAM_BUCKETS_MS) if ms <= bound)] += 1
+
+    return {
+        'count': len(ordered),
+        'mean_ms': sum(ordered) / len(ordered) * 1000,
+        'p50_ms': percentile(0.50),
+        'p95_ms': percentile(0.95),
+        'p99_ms': percentile(0.99),
+        'max_ms': ordered[-1] * 1000,
+        'histogram_ms': {str(bound): count for bound, count in zip(HISTOGRAM_BUCKETS_MS, histogram)}
+    }
+
+
+class LoadTest:
+    """Drives one simulated class session against an in-process app."""
+
+    def __init__(self, students, rounds, concurrency, batch=0, encoding='json'):
+        self.students = students
+        self.rounds = rounds
+        self.concurrency = concurrency
+        self.batch = batch
+        self.encoding = encoding
+        self.latencies = defaultdict(list)
+        self.failures = defaultdict(lambda: defaultdict(int))  # endpoint -> status -> count
+        self.broadcasts = defaultdict(list)
+        self.phases = {}
+        self._lock = threading.Lock()
+
+        self.app = app_module.create_app(LoadTestConfig)
+        self.socketio = app_module.socketio
+        self._instrument_broadcasts()
+
+    def _instrument_broadcasts(self):
+        """Time every broadcast (all encodings); the test clients receive synchronously inside it."""
+        original_broadcast = app_module.broadcast
+        # The Socket.IO test client reassembles binary attachments in a single
+        # module-level slot, so binary (compact) emits must not overlap
+        serialize = threading.Lock() if self.encoding != 'json' else contextlib.nullcontext()
+
+        def timed_broadcast(event, *args, **kwargs):
+            start = time.perf_counter()
+            with serialize:
+                result = original_broadcast(event, *args, **kwargs)
+            with self._lock:
+                self.broadcasts[event].append(time.perf_counter() - start)
+            return result
+
+        app_module.broadcast = timed_broadcast
+
+    @staticmethod
+    def _bytes_sent():
+        """Bytes sent so far per event, over all wire encodings."""
+        sent = defaultdict(int)
+        for _, (event, _encoding), _, value in EMIT_BYTES.samples():
+            sent[event] += value
+        return sent
+
+    def _request(self, client, endpoint, method, url, **kwargs):
+        start = time.perf_counter()
+        response = client.open(url, method=method, **kwargs)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            if 200 <= response.status_code < 300:
+                self.latencies[endpoint].append(elapsed)
+            else:
+                self.failures[endpoint][response.status_code] += 1
+        return response
+
+    def _phase(self, name, tasks):
+        """Run tasks (callables taking a Flask test client) across worker threads."""
+        local = threading.local()
+
+        def run(task):
+            if not hasattr(local, 'client'):
+                local.client = self.app.test_client()
+            return task(local.client)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            list(executor.map(run, tasks))
+        elapsed = time.perf_counter() - start
+        self.phases[name] = {'requests': len(tasks), 'seconds': elapsed,
+                             'throughput_rps': len(tasks) / elapsed if elapsed else 0.0}
+
+    def _join_task(self, user_id):
+        def task(client):
+            self._request(client, 'player', 'GET',
+                          f'/player?user_id={user_id}&display_name=Student%20{user_id}&avatar=fox')
+        return task
+
+    @staticmethod
+    def _decision_body(user_id):
+        user = app_module.game_state.users.get(user_id)
+        if user is None:
+            return None
+        body = {'user_id': user_id}
+        if user.age_stage == 'Y':
+            body.update(decision_type='borrow', amount=10.0, demand_curve=DEMAND_CURVE)
+        elif user.age_stage == 'M':
+            body.update(decision_type='save', amount=5.0)
+        else:
+            body.update(decision_type='consume', amount=0)
+        return body
+
+    def _decision_task(self, user_id):
+        def task(client):
+            body = self._decision_body(user_id)
+            if body is not None:
+                self._request(client, 'submit_decision', 'POST', '/api/submit_decision', json=body)
+        return task
+
+    def _batch_task(self, user_ids):
+        def task(client):
+            bodies = [body for body in map(self._decision_body, user_ids) if body is not None]
+            if bodies:
+                self._request(client, 'submit_decisions', 'POST', '/api/submit_decisions', json=bodies)
+        return task
+
+    def _decision_tasks(self, user_ids):
+        if not self.batch:
+            return [self._decision_task(uid) for uid in user_ids]
+        return [self._batch_task(user_ids[i:i + self.batch]) for i in range(0, len(user_ids), self.batch)]
+
+    def run(self):
+        professor = self.app.test_client()
+        professor.get('/professor')
+        self._request(professor, 'reset_game', 'POST', '/api/reset_game')
+
+        clients = [self.socketio.test_client(self.app) for _ in range(self.students + 1)]
+        if self.encoding != 'json':
+            for client in clients:
+                client.emit('set_encoding', self.encoding)
+        bytes_before = self._bytes_sent()
+        user_ids = [f'load_{i}' for i in range(self.students)]
+
+        start = time.perf_counter()
+        self._phase('join', [self._join_task(uid) for uid in user_ids])
+        for round_number in range(self.rounds):
+            self._phase(f'decisions_round_{round_number + 1}', self._decision_tasks(user_ids))
+            before = set(threading.enumerate())
+            self._request(professor, 'advance_round', 'POST', '/api/advance_round', json={'force': True})
+            self._wait_for_threads(set(threading.enumerate()) - before)
+            self._request(professor, 'current_state', 'GET', '/api/current_state')
+            for client in clients:
+                client.get_received()
+        total = time.perf_counter() - start
+
+        received = sum(len(client.get_received()) for client in clients)
+        bytes_sent = self._bytes_sent()
+        for client in clients:
+            client.disconnect()
+
+        requests = sum(len(samples) for samples in self.latencies.values())
+        return {
+            'students': self.students,
+            'rounds': self.rounds,
+            'concurrency': self.concurrency,
+            'batch': self.batch,
+            'encoding': self.encoding,
+            'total_seconds': total,
+            'throughput_rps': requests / total if total else 0.0,
+            'phases': self.phases,
+            'endpoints': {name: summarize(samples) for name, samples in self.latencies.items()},
+            'failures': {name: {str(status): count for status, count in statuses.items()}
+                         for name, statuses in self.failures.items()},
+            'broadcasts': {event: dict(summarize(samples), recipients=len(clients),
+                                       bytes_per_client=(bytes_sent[event] - bytes_before[event])
+                                       / (len(samples) * len(clients)))
+                           for event, samples in self.broadcasts.items()},
+            'undrained_events': received
+        }
+
+    @staticmethod
+    def _wait_for_threads(threads, timeout=30.0):
+        """Let the equilibrium thread started by advance_round finish and broadcast."""
+        deadline = time.monotonic() + timeout
+        for thread in threads:
+            thread.join(max(0.0, deadline - time.monotonic()))
+
+
+def compare(results, baseline, tolerance):
+    """Return a list of human-readable regressions against a baseline report."""
+    regressions = []
+    for section in ('endpoints', 'broadcasts'):
+        for name, stats in results.get(section, {}).items():
+            old = baseline.get(section, {}).get(name)
+            if not old or not old.get('count'):
+                continue
+            for key in ('p50_ms', 'p95_ms', 'p99_ms'):
+                if stats[key] > old[key] * (1 + tolerance):
+                    regressions.append(f"{section}/{name} {key}: {old[key]:.2f} -> {stats[key]:.2f}")
+    if results['throughput_rps'] < baseline.get('throughput_rps', 0) * (1 - tolerance):
+        regressions.append(f"throughput_rps: {baseline['throughput_rps']:.1f} -> {results['throughput_rps']:.1f}")
+    return regressions
+
+
+def print_report(results):
+    print(f"{results['students']} students, {results['rounds']} rounds, "
+          f"{results['throughput_rps']:.1f} req/s over {results['total_seconds']:.2f} s")
+    print(f"\n{'endpoint':<24}{'count':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}"
+          f"{'B/client':>10}")
+    for section in ('endpoints', 'broadcasts'):
+        for name, stats in sorted(results[section].items()):
+            label = name if section == 'endpoints' else f"emit:{name}"
+            size = f"{stats['bytes_per_client']:>10.0f}" if 'bytes_per_client' in stats else ''
+            print(f"{label:<24}{stats['count']:>7}{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}"
+                  f"{stats['p99_ms']:>10.2f}{stats['max_ms']:>10.2f}{size}")
+    if results['failures']:
+        print("\nFailed requests (not counted above):")
+        for name, statuses in sorted(results['failures'].items()):
+            print(f"  {name}: " + ', '.join(f"{count} x {status}" for status, count in sorted(statuses.items())))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='In-process load test of the OLG game server.')
+    parser.add_argument('--students', type=int, default=100, help='simulated students')
+    parser.add_argument('--rounds', type=int, default=3, help='rounds to play')
+    parser.add_argument('--concurrency', type=int, default=4, help='concurrent request threads')
+    parser.add_argument('--batch', type=int, default=0,
+                        help='submit decisions N at a time through /api/submit_decisions (default: one per request)')
+    parser.add_argument('--encoding', choices=wire_format.ENCODINGS, default='json',
+                        help='wire format the simulated clients ask for (default: json)')
+    parser.add_argument('--output', help='write the JSON report to this path')
+    parser.add_argument('--compare', help='baseline JSON report to compare against')
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help='allowed relative slowdown before a metric counts as a regression')
+    parser.add_argument('--verbose', action='store_true', help='show game and app logging output')
+    args = parser.parse_args(argv)
+
+    if not args.verbose:
+        logging.disable(logging.INFO)
+    output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    with output:
+        results = LoadTest(args.students, args.rounds, args.concurrency, args.batch, args.encoding).run()
+
+    print_report(results)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+    failed = bool(results['failures'])
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\nRegressions:")
+            for line in regressions:
+                print(f"  {line}")
+            failed = True
+        else:
+            print("\nNo regressions against baseline")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+"""
+Cold-start benchmark for the OLG game server.
+
+Starts fresh interpreters that import app.py and build the application with
+create_app(), the way a newly scaled-out worker does, and reports how long
+that takes. Use --importtime to list the slowest imports of one cold start.
+
+Example:
+    python -m benchmarks.startup --runs 20 --output startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STARTUP_SCRIPT = (
+    "import time; start = time.perf_counter(); "
+    "import app; imported = time.perf_counter(); "
+    "app.create_app(); created = time.perf_counter(); "
+    "print(imported - start, created - start)"
+)
+
+
+def measure_once():
+    """Run one cold start and return (import seconds, create_app seconds, process seconds)."""
+    start = time.perf_counter()
+    output = subprocess.run([sys.executable, '-c', STARTUP_SCRIPT], cwd=ROOT, check=True,
+                            capture_output=True, text=True).stdout
+    process_time = time.perf_counter() - start
+    import_time, create_time = (float(value) for value in output.split()[-2:])
+    return import_time, create_time, process_time
+
+
+def slowest_imports(limit=15):
+    """Return the ``limit`` imports with the largest cumulative time in one cold start."""
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import app; app.create_app()'],
+                            cwd=ROOT, check=True, capture_output=True, text=True).stderr
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        rows.append((int(cumulative) / 1e6, name.strip()))
+    return sorted(rows, reverse=True)[:limit]
+
+
+def summarize(values):
+    ordered = sorted(values)
+    return {
+        'median': statistics.median(ordered),
+        'min': ordered[0],
+        'max': ordered[-1],
+        'p95': ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure cold-start time of the OLG game server.')
+    parser.add_argument('--runs', type=int, default=10, help='number of fresh interpreters to start')
+    parser.add_argument('--importtime', action='store_true', help='also list the slowest imports')
+    parser.add_argument('--output', help='write results as JSON to this path')
+    args = parser.parse_args(argv)
+
+    samples = [measure_once() for _ in range(args.runs)]
+    results = {
+        'runs': args.runs,
+        'import_app': summarize([s[0] for s in samples]),
+        'create_app': summarize([s[1] for s in samples]),
+        'process': summarize([s[2] for s in samples])
+    }
+
+    for name in ('import_app', 'create_app', 'process'):
+        stats = results[name]
+        print(f"{name:<11} median {stats['median'] * 1000:7.1f} ms   "
+              f"p95 {stats['p95'] * 1000:7.1f} ms   min {stats['min'] * 1000:7.1f} ms")
+
+    if args.importtime:
+        results['slowest_imports'] = slowest_imports()
+        print("\nSlowest imports (cumulative):")
+        for seconds, name in results['slowest_imports']:
+            print(f"  {seconds * 1000:7.1f} ms  {name}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+"""
+Benchmarks for the game's hot paths at 10 to 100k players.
+
+Run with ``python -m pytest benchmarks --benchmark`` (see conftest.py for the
+size, threshold and baseline options).
+"""
+from models.user import User
+
+
+def test_calculate_equilibrium(bench, game, players):
+    bench.measure(f'calculate_equilibrium[{players}]', game.calculate_equilibrium)
+
+
+def test_compute_aggregates(bench, game, players):
+    bench.measure(f'compute_aggregates[{players}]', game.compute_aggregates)
+
+
+def test_get_full_state(bench, game, players):
+    bench.measure(f'get_full_state[{players}]', game.get_full_state)
+
+
+def test_generate_test_player_decisions(bench, game, players):
+    def mark_all_pending():
+        game.reset_pending()
+        for user in game.users.values():
+            user.decisions = []
+
+    bench.measure(f'generate_test_player_decisions[{players}]',
+                  game.generate_test_player_decisions, setup=mark_all_pending)
+
+
+def test_user_record_decision(bench, players):
+    users = [User(f'bench_{i}') for i in range(players)]
+
+    def clear_history():
+        for user in users:
+            user.decisions = []
+
+    def record_all():
+        for user in users:
+            user.record_decision('borrow', 10.0, 0.03, 0.0)
+
+    bench.measure(f'user_record_decision[{players}]', record_all, setup=clear_history)
@@ -0,0 +1,67 @@
+"""
+Benchmark of the batched demand-curve interpolation kernel against the
+per-point list filtering it replaced, at 1k players x 100 rates.
+
+Run with ``python -m pytest benchmarks --benchmark -k interpolation -s`` to
+see the speedup.
+"""
+import random
+
+import numpy as np
+
+from models.demand_curve import DemandCurve
+from services.interpolation import aggregate_curves
+
+PLAYERS = 1000
+RATES = 100
+
+
+def _reference_aggregate(point_lists, rates):
+    """The list-filtering interpolation the game used before services/interpolation.py."""
+    totals = []
+    for rate in rates:
+        total = 0.0
+        for points in point_lists:
+            lower_points = [p for p in points if p['interestRate'] <= rate]
+            upper_points = [p for p in points if p['interestRate'] > rate]
+            if lower_points and upper_points:
+                lower_point = max(lower_points, key=lambda p: p['interestRate'])
+                upper_point = min(upper_points, key=lambda p: p['interestRate'])
+                position = (rate - lower_point['interestRate']) / (upper_point['interestRate'] - lower_point['interestRate'])
+                total += lower_point['borrowingAmount'] + position * (
+                    upper_point['borrowingAmount'] - lower_point['borrowingAmount'])
+            elif lower_points:
+                total += max(lower_points, key=lambda p: p['interestRate'])['borrowingAmount']
+            else:
+                total += min(upper_points, key=lambda p: p['interestRate'])['borrowingAmount']
+        totals.append(total)
+    return totals
+
+
+def _random_curves(count, seed=0):
+    rng = random.Random(seed)
+    curves = []
+    for _ in range(count):
+        amount, points = 100.0, []
+        for rate in range(11):
+            amount = rng.uniform(0, amount)
+            points.append({'interestRate': rate, 'borrowingAmount': amount})
+        curves.append(DemandCurve.from_points(points))
+    return curves
+
+
+def test_aggregate_demand_interpolation(bench):
+    curves = _random_curves(PLAYERS)
+    point_lists = [curve.to_points() for curve in curves]
+    rates = np.linspace(-1, 11, RATES)
+
+    expected = _reference_aggregate(point_lists, rates)
+    np.testing.assert_allclose(aggregate_curves(curves, rates), expected)
+
+    size = f'{PLAYERS}x{RATES}'
+    reference = bench.measure(f'aggregate_demand_reference[{size}]', lambda: _reference_aggregate(point_lists, rates))
+    batched = bench.measure(f'aggregate_demand_batched[{size}]', lambda: aggregate_curves(curves, rates))
+    speedup = reference['seconds'] / batched['seconds']
+    print(f"\naggregate demand at {size}: {reference['seconds'] * 1000:.1f} ms -> "
+          f"{batched['seconds'] * 1000:.2f} ms ({speedup:.0f}x)")
+    assert speedup > 1
@@ -4,12 +4,13 @@ Configuration settings for the OLG Game application.
 import os
 from dotenv import load_dotenv
 
+# Load environment variables from .env file if present. This is the only place
+# the file is read, and it must happen before the classes below read os.environ.
+load_dotenv()
+
 class Config:
     """Base configuration class with common settings."""
     
-    # Load environment variables from .env file if present
-    load_dotenv()
-    
     # Flask settings
     SECRET_KEY = os.getenv('SECRET_KEY', 'dev_secret_key')
     DEBUG = False
@@ -19,6 +20,48 @@ class Config:
     APP_NAME = 'OLG Classroom Game'
     PORT = int(os.getenv('PORT', 5001))
     
+    # Socket.IO async mode ('eventlet', 'threading', ...); auto-detected when unset.
+    # Choosing 'threading' skips importing eventlet, which dominates cold-start time.
+    SOCKETIO_ASYNC_MODE = os.getenv('SOCKETIO_ASYNC_MODE') or None
+    
+    # ASGI serving mode (asgi.py): threads serving Flask requests, and threads
+    # for slow background work such as equilibrium solves
+    ASGI_HTTP_WORKERS = int(os.getenv('ASGI_HTTP_WORKERS', '16'))
+    ASGI_BACKGROUND_WORKERS = int(os.getenv('ASGI_BACKGROUND_WORKERS', '2'))
+    
+    # Equilibrium worker processes (0 = solve in the web process) and the
+    # player count below which a solve stays inline anyway
+    EQUILIBRIUM_WORKERS = int(os.getenv('EQUILIBRIUM_WORKERS', '2'))
+    EQUILIBRIUM_INLINE_THRESHOLD = int(os.getenv('EQUILIBRIUM_INLINE_THRESHOLD', '5000'))
+    
+    # Demand curves are stored sampled at these interest rates (percent), and
+    # submissions may have at most this many points
+    DEMAND_CURVE_RATES = [float(rate) for rate in os.getenv('DEMAND_CURVE_RATES', '0,1,2,3,4,5,6,7,8,9,10').split(',')]
+    DEMAND_CURVE_MAX_POINTS = int(os.getenv('DEMAND_CURVE_MAX_POINTS', '50'))
+    
+    # Admission control for joins, decisions and policy changes: requests per
+    # second and burst per client (0 = no rate limit), requests served at once
+    # (0 = unlimited), and how many may wait, for how many seconds
+    ADMISSION_RATE = float(os.getenv('ADMISSION_RATE', '5'))
+    ADMISSION_BURST = int(os.getenv('ADMISSION_BURST', '10'))
+    ADMISSION_MAX_CONCURRENT = int(os.getenv('ADMISSION_MAX_CONCURRENT', '8'))
+    ADMISSION_MAX_QUEUE = int(os.getenv('ADMISSION_MAX_QUEUE', '200'))
+    ADMISSION_QUEUE_TIMEOUT = float(os.getenv('ADMISSION_QUEUE_TIMEOUT', '5'))
+    
+    # JSON responses at least this many bytes long are compressed (gzip,
+    # deflate, or brotli if installed); compressed bodies of this many recent
+    # snapshots are cached
+    COMPRESSION_MIN_BYTES = int(os.getenv('COMPRESSION_MIN_BYTES', '1024'))
+    COMPRESSION_LEVEL = int(os.getenv('COMPRESSION_LEVEL', '6'))
+    COMPRESSION_CACHE_ENTRIES = int(os.getenv('COMPRESSION_CACHE_ENTRIES', '32'))
+    
+    # Logging: level, 'text' or 'json', and how many times per period one
+    # call site may log before further messages are suppressed (0 = unlimited)
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')
+    LOG_RATE_LIMIT = int(os.getenv('LOG_RATE_LIMIT', '10'))
+    LOG_RATE_PERIOD = float(os.getenv('LOG_RATE_PERIOD', '60'))
+    
     # Game settings
     DEFAULT_INTEREST_RATE = float(os.getenv('DEFAULT_INTEREST_RATE', '0.03'))
     DEFAULT_BORROWING_LIMIT = float(os.getenv('DEFAULT_BORROWING_LIMIT', '100.0'))
@@ -41,11 +84,13 @@ class TestingConfig(Config):
     DEBUG = True
     TESTING = True
     ENV = 'testing'
+    EQUILIBRIUM_WORKERS = 0
     
 
 class ProductionConfig(Config):
     """Production environment configuration."""
     ENV = 'production'
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')
     # In production, ensure SECRET_KEY is properly set in environment
     SECRET_KEY = os.getenv('SECRET_KEY') or 'change-this-in-production'
 
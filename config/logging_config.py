@@ -0,0 +1,156 @@
+"""
+Logging setup for the OLG Game application.
+
+Records are handed to a queue on the calling thread and written to stderr by
+a background listener, so request handlers never block on log I/O. Repetitive
+messages (the same call site at the same level) are rate-limited before they
+are queued: each one may log ``burst`` times per ``period`` seconds, and the
+next record that gets through reports how many were dropped in between.
+
+Log calls should use %-style arguments (``logger.warning("Bad amount: %s", x)``)
+so messages that are filtered out are never formatted.
+"""
+import atexit
+import copy
+import json
+import logging
+import queue
+import sys
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener
+
+# LogRecord attributes that are not user-supplied ``extra`` fields
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+_listener = None
+
+# Renders tracebacks on the calling thread, before their records are queued
+_EXCEPTION_FORMATTER = logging.Formatter()
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, including any ``extra`` fields on the record."""
+
+    def format(self, record):
+        entry = {
+            'time': self.formatTime(record),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+            'thread': record.threadName
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """The usual single-line format, noting how many similar messages were suppressed."""
+
+    def format(self, record):
+        text = super().format(record)
+        suppressed = getattr(record, 'suppressed', 0)
+        if suppressed:
+            text += f" ({suppressed} similar messages suppressed)"
+        return text
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Let each call site (logger, level, source line) through at most
+    ``burst`` times per ``period`` seconds. Errors and above are never dropped.
+    """
+
+    def __init__(self, burst=10, period=60.0):
+        super().__init__()
+        self.burst = burst
+        self.period = period
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno >= logging.ERROR or self.burst <= 0:
+            return True
+
+        key = (record.name, record.levelno, record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.period:
+                # New window: [start, emitted, suppressed]
+                suppressed = window[2] if window else 0
+                self._windows[key] = [now, 1, 0]
+                if suppressed:
+                    record.suppressed = suppressed
+                return True
+            if window[1] < self.burst:
+                window[1] += 1
+                return True
+            window[2] += 1
+            return False
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    def prepare(self, record):
+        # Merge the arguments into the message now, since they may change before the
+        # listener gets to the record, but leave the formatting (timestamps, JSON) to
+        # the listener. Records never leave the process, so nothing needs pickling.
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _EXCEPTION_FORMATTER.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def configure_logging(level='INFO', fmt='text', rate_limit=10, rate_period=60.0, stream=None):
+    """
+    Route all logging through a queue to a background writer.
+
+    Args:
+        level: root log level name or number
+        fmt: 'json' for structured output, anything else for plain text
+        rate_limit: messages allowed per call site per period (0 disables rate limiting)
+        rate_period: rate limit window in seconds
+        stream: where the listener writes (defaults to stderr)
+
+    Calling it again replaces the previous configuration.
+    """
+    _stop_listener()
+
+    handler = logging.StreamHandler(stream or sys.stderr)
+    if fmt == 'json':
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(TextFormatter('[%(asctime)s] %(levelname)s in %(name)s: %(message)s'))
+
+    queue_handler = _NonBlockingQueueHandler(queue.SimpleQueue())
+    if rate_limit:
+        queue_handler.addFilter(RateLimitFilter(rate_limit, rate_period))
+
+    root = logging.getLogger()
+    for existing in [h for h in root.handlers if isinstance(h, QueueHandler)]:
+        root.removeHandler(existing)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    global _listener
+    _listener = QueueListener(queue_handler.queue, handler, respect_handler_level=True)
+    _listener.start()
+    return _listener
+
+
+@atexit.register
+def _stop_listener():
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -0,0 +1,132 @@
+import math
+from array import array
+
+from services.interpolation import interpolate
+
+# Interest rates (in percent) every stored curve is sampled at, and the most
+# points a submitted curve may have. Set from the app config by configure().
+DEFAULT_RATES = (0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10)
+DEFAULT_MAX_POINTS = 50
+
+_grid = {'rates': array('d', DEFAULT_RATES), 'max_points': DEFAULT_MAX_POINTS}
+
+
+def configure(rates=None, max_points=None):
+    """Set the rate grid and the submitted point limit; curves stored before keep their own grid."""
+    if rates is not None:
+        rates = sorted(float(rate) for rate in rates)
+        if not rates or any(a == b for a, b in zip(rates, rates[1:])):
+            raise ValueError("The demand curve rate grid needs distinct rates")
+        _grid['rates'] = array('d', rates)
+    if max_points is not None:
+        _grid['max_points'] = int(max_points)
+
+
+def grid_rates():
+    """The rates (in percent) curves are currently sampled at."""
+    return _grid['rates']
+
+
+class DemandCurve:
+    """
+    A young player's borrowing schedule, sampled on the shared rate grid.
+
+    Submitted curves may have any (bounded) number of points at any rates;
+    they are sorted, validated and linearly interpolated onto the grid, holding
+    the end values beyond the submitted range. A curve then costs one small
+    float array, and many curves can be evaluated at once with
+    services.interpolation.evaluate_curves.
+
+    The points sent to clients are built on first use and cached until
+    ``rates`` or ``amounts`` is replaced; curves are not modified in place.
+    """
+
+    __slots__ = ('_rates', '_amounts', '_points')
+
+    def __init__(self, rates, amounts):
+        self._rates = rates
+        self._amounts = amounts
+        self._points = None
+
+    @property
+    def rates(self):
+        return self._rates
+
+    @rates.setter
+    def rates(self, rates):
+        self._rates = rates
+        self._points = None
+
+    @property
+    def amounts(self):
+        return self._amounts
+
+    @amounts.setter
+    def amounts(self, amounts):
+        self._amounts = amounts
+        self._points = None
+
+    @classmethod
+    def from_points(cls, points, validate=True):
+        """
+        Build a curve from a list of {'interestRate', 'borrowingAmount'} points.
+
+        Args:
+            points: the submitted points, in any order
+            validate: enforce the point limit, non-negative amounts and a curve
+                that never rises with the interest rate (off for generated curves)
+
+        Raises:
+            ValueError: the points don't describe a valid curve
+        """
+        if not isinstance(points, list) or not points:
+            raise ValueError("A demand curve must be a non-empty list of points")
+        if validate and len(points) > _grid['max_points']:
+            raise ValueError(f"A demand curve may have at most {_grid['max_points']} points")
+
+        parsed = []
+        for point in points:
+            try:
+                rate, amount = float(point['interestRate']), float(point['borrowingAmount'])
+            except (TypeError, KeyError, ValueError):
+                raise ValueError("Each demand curve point needs a numeric interestRate and borrowingAmount") from None
+            if not (math.isfinite(rate) and math.isfinite(amount)):
+                raise ValueError("Demand curve values must be finite")
+            parsed.append((rate, amount))
+        parsed.sort()
+
+        if validate:
+            for (rate, amount), (next_rate, next_amount) in zip(parsed, parsed[1:]):
+                if rate == next_rate:
+                    raise ValueError(f"The demand curve has two points at {rate:g}%")
+                if next_amount > amount:
+                    raise ValueError("Borrowing must not rise as the interest rate rises")
+            if parsed[-1][1] < 0:
+                raise ValueError("Borrowing amounts must not be negative")
+
+        rates = _grid['rates']
+        known_rates, known_amounts = zip(*parsed)
+        return cls(rates, array('d', interpolate(known_rates, known_amounts, rates).tolist()))
+
+    @classmethod
+    def from_grid(cls, amounts):
+        """Build a curve from borrowing amounts already sampled at grid_rates()."""
+        rates = _grid['rates']
+        if len(amounts) != len(rates):
+            raise ValueError(f"Expected {len(rates)} amounts, one per grid rate")
+        return cls(rates, array('d', amounts))
+
+    def borrowing_at(self, rate):
+        """Borrowing at ``rate`` percent, interpolating between grid points."""
+        return float(interpolate(self.rates, self.amounts, rate))
+
+    def to_points(self):
+        """The curve as {'interestRate', 'borrowingAmount'} points, as sent to clients (shared: don't modify them)."""
+        if self._points is None:
+            self._points = [{'interestRate': rate, 'borrowingAmount': amount}
+                            for rate, amount in zip(self._rates, self._amounts)]
+        return self._points
+
+    def __len__(self):
+        return len(self.amounts)
+
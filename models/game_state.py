@@ -1,8 +1,34 @@
-import numpy as np
+import heapq
 import random
+import time
 from models.user import User
+from models.pending_decisions import PendingDecisions
+from models.demand_curve import DemandCurve
+from services.test_player_service import TEST_PLAYER_NAMES, record_optimal_decisions
+from services.profiling import profiler
+from services.interpolation import aggregate_curves, evaluate_curves
+from services.equilibrium_executor import RATE_BOUNDS, equilibrium_executor, make_snapshot
+from services.metrics import AGGREGATES_SECONDS, DECISIONS, DECISION_SECONDS, EQUILIBRIUM_ITERATIONS, EQUILIBRIUM_SECONDS
 import logging
 
+logger = logging.getLogger(__name__)
+
+# Decision types counted under their own metric label; anything else is 'other'
+DECISION_TYPES = ('borrow', 'save', 'consume')
+
+# Interest rates (in percent) at which the aggregate demand curve is reported
+AGGREGATE_DEMAND_RATES = (0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10)
+
+# How long a name checked at login stays reserved for that student
+NAME_RESERVATION_SECONDS = 60.0
+
+# Names one client can hold at once; reserving another releases its oldest
+MAX_RESERVATIONS_PER_HOLDER = 3
+
+def normalize_name(name):
+    """The form names are compared in: case-folded, with whitespace collapsed."""
+    return ' '.join(name.split()).casefold()
+
 class GameState:
     """
     Manages the overall state of the OLG game, including users, rounds,
@@ -11,6 +37,10 @@ class GameState:
     
     def __init__(self):
         self.users = {}  # Dictionary of users by user_id
+        self.name_index = {}  # Normalized name -> ids of the users with that name
+        self.name_reservations = {}  # Normalized name -> (user_id, expiry time, holder)
+        self._reservation_expiries = []  # Heap of (expiry time, normalized name)
+        self._held_names = {}  # Holder -> normalized names it reserved, oldest first
         self.current_round = 1  # Start at round 1 instead of 0
         self.previous_rounds = []  # History of previous rounds
         
@@ -25,7 +55,7 @@ class GameState:
         
         # Equilibrium variables
         self.interest_rate = 0.03  # Initial interest rate (3%)
-        self.pending_decisions = set()  # Track users who haven't submitted decisions
+        self.pending_decisions = PendingDecisions()  # Users who haven't submitted decisions, by kind and stage
         
         # Income parameters (could be made configurable)
         self.income_young = 0.0
@@ -34,48 +64,182 @@ class GameState:
         
         # Flag to determine if test players make optimal decisions
         self.make_optimal_decisions = False
+        
+        # Decision window in seconds (None = rounds only advance manually), whether
+        # the round advances when it runs out, and the current deadline (timestamp)
+        self.decision_window = None
+        self.auto_advance = False
+        self.decision_deadline = None
     
-    def add_user(self, user_id, name=None, avatar=None):
+    def add_user(self, user_id, name=None, avatar=None, age_stage='Y'):
         """Add a new user to the game"""
         if user_id not in self.users:
-            self.users[user_id] = User(user_id, name, avatar)
-            self.pending_decisions.add(user_id)
+            user = User(user_id, name, avatar)
+            user.age_stage = age_stage
+            self._insert_user(user)
             return True
         return False
     
+    def _insert_user(self, user):
+        self.users[user.user_id] = user
+        self._mark_pending(user)
+        key = normalize_name(user.name)
+        self.name_index.setdefault(key, set()).add(user.user_id)
+        self._release_name(key)
+    
+    def _mark_pending(self, user):
+        self.pending_decisions.add(user.user_id, 'test' if self.is_test_user(user.user_id) else 'human',
+                                   user.age_stage)
+    
+    def reset_pending(self):
+        """Wait for a decision from every user again (start of a round)."""
+        self.pending_decisions.clear()
+        for user in self.users.values():
+            self._mark_pending(user)
+    
+    def _unindex_name(self, user):
+        key = normalize_name(user.name)
+        ids = self.name_index.get(key)
+        if ids is not None:
+            ids.discard(user.user_id)
+            if not ids:
+                del self.name_index[key]
+    
+    def rename_user(self, user_id, name):
+        """
+        Change a user's display name.
+        
+        Returns:
+            True if renamed, False if the user doesn't exist or the name belongs to someone else
+        """
+        user = self.users.get(user_id)
+        if user is None or self.is_name_taken(name, user_id):
+            return False
+        self._unindex_name(user)
+        user.name = name
+        key = normalize_name(name)
+        self.name_index.setdefault(key, set()).add(user_id)
+        self._release_name(key)
+        return True
+    
+    def is_name_taken(self, name, user_id=None):
+        """Whether ``name`` (ignoring case and spacing) is used or reserved by anyone but ``user_id``."""
+        key = normalize_name(name)
+        if self.name_index.get(key, set()) - {user_id}:
+            return True
+        reservation = self.name_reservations.get(key)
+        return reservation is not None and reservation[0] != user_id and reservation[1] > time.monotonic()
+    
+    def reserve_name(self, name, user_id, holder=None, ttl=NAME_RESERVATION_SECONDS):
+        """
+        Hold ``name`` for ``user_id`` for ``ttl`` seconds, so that a student who
+        passed the uniqueness check keeps the name until they join.
+        
+        Args:
+            holder: the client asking (e.g. its session), which keeps at most
+                MAX_RESERVATIONS_PER_HOLDER names
+        
+        Returns:
+            True if the name is now reserved for ``user_id``, False if it is taken
+        """
+        now = time.monotonic()
+        # Drop expired reservations
+        while self._reservation_expiries and self._reservation_expiries[0][0] <= now:
+            _, key = heapq.heappop(self._reservation_expiries)
+            reservation = self.name_reservations.get(key)
+            if reservation is not None and reservation[1] <= now:
+                self._release_name(key)
+        
+        if self.is_name_taken(name, user_id):
+            return False
+        key = normalize_name(name)
+        if key in self.name_reservations:
+            # Already held for this user, until its original expiry
+            return True
+        self.name_reservations[key] = (user_id, now + ttl, holder)
+        heapq.heappush(self._reservation_expiries, (now + ttl, key))
+        if holder is not None:
+            held = self._held_names.setdefault(holder, [])
+            held.append(key)
+            if len(held) > MAX_RESERVATIONS_PER_HOLDER:
+                self._release_name(held[0])
+        return True
+    
+    def _release_name(self, key):
+        reservation = self.name_reservations.pop(key, None)
+        if reservation is not None and reservation[2] is not None:
+            held = self._held_names[reservation[2]]
+            held.remove(key)
+            if not held:
+                del self._held_names[reservation[2]]
+    
+    def add_users(self, entries):
+        """
+        Add many users at once; either all of them are added or none are.
+        
+        Args:
+            entries: dicts with user_id and optionally name, avatar and stage ('Y', 'M' or 'O')
+            
+        Returns:
+            The new User objects, in order
+            
+        Raises:
+            ValueError: an id or name is repeated or already taken
+        """
+        ids, names, conflicts = set(), set(), []
+        for entry in entries:
+            user_id, name = entry['user_id'], entry.get('name')
+            if user_id in ids or user_id in self.users:
+                conflicts.append(f"user_id {user_id}")
+            if name and (normalize_name(name) in names or self.is_name_taken(name, user_id)):
+                conflicts.append(f"name {name}")
+            ids.add(user_id)
+            if name:
+                names.add(normalize_name(name))
+        if conflicts:
+            raise ValueError(f"Already taken: {', '.join(conflicts)}")
+        
+        added = []
+        for entry in entries:
+            user = User(entry['user_id'], entry.get('name'), entry.get('avatar'))
+            user.age_stage = entry.get('stage') or 'Y'
+            self._insert_user(user)
+            added.append(user)
+        return added
+    
     def remove_user(self, user_id):
         """Remove a user from the game"""
         if user_id in self.users:
-            del self.users[user_id]
-            if user_id in self.pending_decisions:
-                self.pending_decisions.remove(user_id)
+            self._unindex_name(self.users.pop(user_id))
+            self.pending_decisions.discard(user_id)
             return True
         return False
     
     def set_policy(self, tax_rate_young=None, tax_rate_middle=None, tax_rate_old=None, 
                   pension_rate=None, borrowing_limit=None, target_stock=None, num_test_players=None,
-                  income_young=None, income_middle=None, income_old=None):
-        """Set policy parameters."""
-        print(f"Setting policy: tax_rate_young={tax_rate_young}, tax_rate_middle={tax_rate_middle}, tax_rate_old={tax_rate_old}, borrowing_limit={borrowing_limit}")
+                  income_young=None, income_middle=None, income_old=None, government_debt=None, solve=True):
+        """Set policy parameters, then re-solve the equilibrium unless ``solve`` is False."""
+        logger.info("Setting policy: tax_rate_young=%s, tax_rate_middle=%s, tax_rate_old=%s, borrowing_limit=%s",
+                    tax_rate_young, tax_rate_middle, tax_rate_old, borrowing_limit)
         
         if tax_rate_young is not None:
             self.tax_rate_young = tax_rate_young
-            print(f"Updated tax_rate_young to {self.tax_rate_young}")
+            logger.debug("Updated tax_rate_young to %s", self.tax_rate_young)
             
         if tax_rate_middle is not None:
             self.tax_rate_middle = tax_rate_middle
-            print(f"Updated tax_rate_middle to {self.tax_rate_middle}")
+            logger.debug("Updated tax_rate_middle to %s", self.tax_rate_middle)
             
         if tax_rate_old is not None:
             self.tax_rate_old = tax_rate_old
-            print(f"Updated tax_rate_old to {self.tax_rate_old}")
+            logger.debug("Updated tax_rate_old to %s", self.tax_rate_old)
             
         if pension_rate is not None:
             self.pension_rate = pension_rate
             
         if borrowing_limit is not None:
             self.borrowing_limit = borrowing_limit
-            print(f"Updated borrowing_limit to {self.borrowing_limit}")
+            logger.debug("Updated borrowing_limit to %s", self.borrowing_limit)
             
         if target_stock is not None:
             self.target_stock = target_stock
@@ -93,9 +257,14 @@ class GameState:
         if income_old is not None:
             self.income_old = income_old
             
+        if government_debt is not None:
+            self.government_debt = government_debt
+            
         # Calculate equilibrium interest rate
-        self._calculate_equilibrium()
+        if solve:
+            self._calculate_equilibrium()
     
+    @DECISION_SECONDS.time()
     def record_decision(self, user_id, decision_type, amount):
         """
         Record a decision for a user
@@ -108,6 +277,12 @@ class GameState:
         Returns:
             True if decision was valid and recorded, False otherwise
         """
+        success = self._record_decision(user_id, decision_type, amount)
+        DECISIONS.inc(decision_type=decision_type if decision_type in DECISION_TYPES else 'other',
+                      outcome='accepted' if success else 'rejected')
+        return success
+    
+    def _record_decision(self, user_id, decision_type, amount):
         if user_id not in self.users:
             return False
             
@@ -135,7 +310,7 @@ class GameState:
             max_borrow = self.borrowing_limit
             # Just ensure amount is positive and not exceeding the limit
             if amount < 0 or amount > max_borrow:
-                print(f"Invalid young borrowing: {amount} > {max_borrow}")
+                logger.warning("Invalid young borrowing: %s > %s", amount, max_borrow)
                 return False
                 
         elif user.age_stage == 'M':
@@ -150,18 +325,180 @@ class GameState:
             # - If borrowing, ensure it's within reasonable limits
             if (decision_type == 'save' and amount < 0) or \
                (decision_type == 'borrow' and (amount < 0 or amount > self.borrowing_limit)):
-                print(f"Invalid middle-aged decision: {decision_type}, {amount}")
+                logger.warning("Invalid middle-aged decision: %s, %s", decision_type, amount)
                 return False
         
         # Record the decision
         success = user.record_decision(decision_type, amount, self.interest_rate, income)
         
         # Mark this user's decision as submitted
-        if success and user_id in self.pending_decisions:
-            self.pending_decisions.remove(user_id)
+        if success:
+            self.pending_decisions.discard(user_id)
             
         return success
     
+    def record_decisions(self, decisions):
+        """
+        Record a batch of decisions in one pass, each validated like record_decision.
+        
+        Args:
+            decisions: list of dicts with user_id, decision_type, amount and,
+                for young borrowers, an optional demand_curve
+            
+        Returns:
+            One {'user_id', 'success'[, 'error']} dict per decision, in order
+        """
+        results = []
+        for decision in decisions:
+            if not isinstance(decision, dict):
+                results.append({'user_id': None, 'success': False, 'error': 'Invalid decision'})
+                continue
+            
+            user_id = decision.get('user_id')
+            decision_type = decision.get('decision_type')
+            amount = decision.get('amount')
+            result = {'user_id': user_id, 'success': False}
+            results.append(result)
+            if not all([user_id, decision_type, amount is not None]):
+                result['error'] = 'Missing required fields'
+                continue
+            try:
+                amount = float(amount)
+            except (TypeError, ValueError):
+                result['error'] = 'Amount must be a number'
+                continue
+            
+            demand_curve = decision.get('demand_curve')
+            if decision_type == 'borrow' and demand_curve and user_id in self.users:
+                try:
+                    self.set_demand_curve(user_id, demand_curve)
+                except ValueError as e:
+                    result['error'] = f'Invalid demand curve: {e}'
+                    continue
+            
+            result['success'] = self.record_decision(user_id, decision_type, amount)
+            if not result['success']:
+                result['error'] = 'Invalid decision'
+        return results
+    
+    def set_demand_curve(self, user_id, points):
+        """
+        Validate a submitted demand curve and store it, normalized onto the rate grid.
+        
+        Raises:
+            ValueError: the curve is malformed, too long or rises with the interest rate
+        """
+        self.users[user_id].demand_curve = DemandCurve.from_points(points)
+    
+    def fill_pending(self, user_ids=None):
+        """
+        Record a default decision for pending players in one batch, e.g. when the
+        decision deadline passes: young players borrow 1 with a default demand
+        curve (one shared curve for all of them, see _default_demand_curve),
+        middle-aged players save 1 (or nothing if they can't) and old players
+        consume. With make_optimal_decisions set, pending test players are solved
+        by services.agent_solver instead.
+        
+        The outcome of a default is the same for every player of a stage up to
+        their assets, so each stage is settled once and written to its players
+        with User.record_defaults, without validating every decision on its own.
+        
+        Args:
+            user_ids: the pending players to fill in (default: all of them)
+            
+        Returns:
+            list of the user ids that now have a decision
+        """
+        user_ids = list(self.pending_decisions if user_ids is None else user_ids)
+        solved = []
+        if self.make_optimal_decisions:
+            # Optimal test players get the solver's decisions rather than a default
+            optimal = [self.users[user_id] for user_id in user_ids
+                       if user_id in self.users and self.is_test_user(user_id)]
+            if optimal:
+                record_optimal_decisions(self, optimal)
+                solved = [user.user_id for user in optimal if user.user_id not in self.pending_decisions]
+                user_ids = [user_id for user_id in user_ids if user_id not in solved]
+        by_stage = {'Y': [], 'M': [], 'O': []}
+        for user_id in user_ids:
+            user = self.users.get(user_id)
+            if user is not None and user.age_stage in by_stage:
+                by_stage[user.age_stage].append(user)
+        young, middle, old = by_stage['Y'], by_stage['M'], by_stage['O']
+        gross = 1 + self.interest_rate
+        filled = []
+        counts = {}
+        
+        income = self.income_young - self.tax_rate_young
+        amount = min(1.0, self.borrowing_limit)
+        if young and amount + income >= 0:
+            User.record_defaults(young, 'borrow', [amount] * len(young), [amount + income] * len(young),
+                                 [-amount] * len(young))
+            curve = self._default_demand_curve()
+            for user in young:
+                if not user.demand_curve:
+                    user.demand_curve = curve
+            filled += young
+            counts['borrow'] = len(young)
+        
+        if middle:
+            income = self.income_middle - self.tax_rate_middle
+            amounts, consumptions, assets = [], [], []
+            for user in middle:
+                disposable = income - gross * max(-user.assets, 0.0)
+                if disposable <= 0:
+                    # Can't repay: consume the income and keep the debt
+                    amounts.append(0.0)
+                    consumptions.append(income)
+                    assets.append(user.assets)
+                else:
+                    saving = 1.0 if disposable >= 1.0 else 0.0
+                    amounts.append(saving)
+                    consumptions.append(disposable - saving)
+                    assets.append(saving)
+            User.record_defaults(middle, 'save', amounts, consumptions, assets)
+            filled += middle
+            counts['save'] = len(middle)
+        
+        if old:
+            income = self.income_old - self.tax_rate_old
+            consumptions = [income + gross * max(user.assets, 0.0) for user in old]
+            settled = [(user, consumption) for user, consumption in zip(old, consumptions) if consumption >= 0]
+            if settled:
+                users, consumptions = zip(*settled)
+                User.record_defaults(users, 'consume', [0] * len(users), consumptions, [0] * len(users))
+                filled += users
+                counts['consume'] = len(users)
+        
+        for user in filled:
+            self.pending_decisions.discard(user.user_id)
+        for decision_type, count in counts.items():
+            DECISIONS.inc(count, decision_type=decision_type, outcome='accepted')
+        return solved + [user.user_id for user in filled]
+    
+    def _default_demand_curve(self):
+        """
+        The demand curve given to young players who didn't submit one: a small,
+        safe amount at every rate, or the most they may borrow when
+        make_optimal_decisions is set.
+        """
+        points = []
+        for rate in AGGREGATE_DEMAND_RATES:
+            adjusted_borrowing_limit = self.borrowing_limit / (1 + rate / 100)
+            if self.make_optimal_decisions:
+                amount = adjusted_borrowing_limit
+            else:
+                amount = min(1.0, adjusted_borrowing_limit * 0.05)
+            points.append({'interestRate': rate, 'borrowingAmount': round(amount, 1)})
+        return DemandCurve.from_points(points, validate=False)
+    
+    def deadline_state(self):
+        """The decision deadline settings, as sent to clients."""
+        return {'window': self.decision_window, 'auto_advance': self.auto_advance,
+                'expires_at': self.decision_deadline}
+    
+    @EQUILIBRIUM_SECONDS.time()
+    @profiler.wrap('calculate_equilibrium')
     def calculate_equilibrium(self):
         """
         Calculate the equilibrium interest rate that clears the loan market
@@ -174,74 +511,34 @@ class GameState:
         - B^g: government debt
         - B^m_j: saving/borrowing of middle-aged agents
         
-        We use a bisection method to find the interest rate that satisfies this condition
+        We use a bisection method to find the interest rate that satisfies this condition.
+        Large games are solved in the equilibrium worker processes (see
+        services/equilibrium_executor.py).
         """
-        def market_imbalance(rate):
-            """Calculate loan market excess demand at a given interest rate"""
-            # Temporarily set interest rate
-            old_rate = self.interest_rate
-            self.interest_rate = rate
-            
-            # Safety check: ensure rate is not too close to -1 to avoid division by zero
-            if abs(rate + 1.0) < 1e-8:  # If r is very close to -1
-                rate = -0.9999  # Use -99.99% instead
-            
-            # Calculate loan demand (young borrowing + government)
-            young_borrowing = sum(
-                min(self.borrowing_limit / (1 + rate), user.current_borrowing)
-                for user in self.users.values() 
-                if user.age_stage == 'Y'
-            )
-            loan_demand = young_borrowing + self.government_debt
-            
-            # Calculate loan supply (middle-aged saving)
-            loan_supply = sum(
-                user.current_saving 
-                for user in self.users.values() 
-                if user.age_stage == 'M' and user.current_saving > 0
-            )
-            
-            # Reset interest rate
-            self.interest_rate = old_rate
-            
-            # Return the excess demand
-            return loan_demand - loan_supply
-        
-        # Use bisection method to find equilibrium interest rate
-        r_min, r_max = -1.0, 2.0  # Interest rate bounds (-100% to 200%)
-        tol = 1e-6  # Tolerance
-        max_iter = 100  # Maximum iterations
-        
-        # Check values at bounds to ensure a solution exists within the range
-        imbalance_min = market_imbalance(r_min)
-        imbalance_max = market_imbalance(r_max)
+        solution = equilibrium_executor.solve(self.market_snapshot())
+        EQUILIBRIUM_ITERATIONS.observe(solution.iterations)
         
         # If both bounds give the same sign, the solution may be outside range
-        # Let's catch this and log a warning
+        imbalance_min, imbalance_max = solution.bounds_imbalance
         if (imbalance_min > 0 and imbalance_max > 0) or (imbalance_min < 0 and imbalance_max < 0):
-            logging.warning(f"Equilibrium solution may be outside range [{r_min}, {r_max}]. "
-                          f"Imbalance at r_min={r_min}: {imbalance_min}, "
-                          f"Imbalance at r_max={r_max}: {imbalance_max}")
-            
-            # We'll still try to find the best available solution within our range
-        
-        # Bisection loop
-        for iter_count in range(max_iter):
-            r_mid = (r_min + r_max) / 2
-            imbalance = market_imbalance(r_mid)
-            
-            if abs(imbalance) < tol:
-                logging.info(f"Equilibrium found at r={r_mid:.6f} after {iter_count+1} iterations")
-                return r_mid
-            
-            if imbalance > 0:  # Excess demand, increase rate
-                r_min = r_mid
-            else:  # Excess supply, decrease rate
-                r_max = r_mid
-        
-        # If we reach here, return the midpoint of the final interval
-        logging.warning(f"Bisection hit max iterations ({max_iter}). Final interval: [{r_min}, {r_max}]")
-        return (r_min + r_max) / 2
+            logger.warning("Equilibrium solution may be outside range %s. "
+                           "Imbalance at the bounds: %s, %s", RATE_BOUNDS, imbalance_min, imbalance_max)
+        
+        if solution.converged:
+            logger.info("Equilibrium found at r=%.6f after %d iterations", solution.rate, solution.iterations)
+        else:
+            logger.warning("Bisection hit max iterations (%d); using r=%s", solution.iterations, solution.rate)
+        return solution.rate
+    
+    def market_snapshot(self):
+        """The loan market inputs of the equilibrium solve, as compact arrays."""
+        young, middle = [], []
+        for user in self.users.values():
+            if user.age_stage == 'Y':
+                young.append(user.current_borrowing)
+            elif user.age_stage == 'M':
+                middle.append(user.current_saving)
+        return make_snapshot(young, middle, self.borrowing_limit, self.government_debt)
     
     def is_test_user(self, user_id):
         """Check if a user is a test user (based on ID prefix)"""
@@ -278,16 +575,11 @@ class GameState:
             to_remove = sorted(current_test_players)[:(current_count - num_test_players)]
             for uid in to_remove:
                 self.remove_user(uid)
-            print(f"Removed {len(to_remove)} test players")
+            logger.info("Removed %d test players", len(to_remove))
             
         # If we need more, add them
         elif current_count < num_test_players:
             to_add = num_test_players - current_count
-            import random
-            from models.user import User
-            
-            # Use existing player list for names
-            from app import TEST_PLAYER_NAMES
             
             # Add the required number of test players
             for i in range(to_add):
@@ -295,10 +587,9 @@ class GameState:
                 # Pick a random name from the list
                 name = random.choice(TEST_PLAYER_NAMES) 
                 # Create and add the user
-                self.users[user_id] = User(user_id, name)
-                self.pending_decisions.add(user_id)
+                self._insert_user(User(user_id, name))
             
-            print(f"Added {to_add} test players")
+            logger.info("Added %d test players", to_add)
         
         # Update the stored number of test players
         self.num_test_players = num_test_players
@@ -306,188 +597,147 @@ class GameState:
     def generate_test_player_decisions(self):
         """
         Generate decisions for test users who haven't submitted decisions yet.
-        Test users make reasonably realistic but somewhat randomized decisions.
+        Test users make reasonably realistic but somewhat randomized decisions,
+        or lifetime-utility-optimal ones when make_optimal_decisions is set.
         """
-        for user_id in list(self.pending_decisions):
-            if self.is_test_user(user_id) and user_id in self.users:
-                user = self.users[user_id]
-                try:
-                    if user.age_stage == 'Y':
-                        # Generate a full demand curve for young test users
-                        # We'll create a downward sloping demand curve with points at standard interest rates
-                        interest_rates = [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10]  # Interest rates from 0% to 10%
-                        demand_curve = []
-                        
-                        if self.make_optimal_decisions:
-                            # For optimal decisions: borrow the maximum amount at all interest rates
-                            for rate in interest_rates:
-                                # Calculate adjusted borrowing limit at this interest rate
-                                adjusted_borrowing_limit = self.borrowing_limit / (1 + rate/100)
-                                
-                                # Add to demand curve - optimal decision is to borrow maximum amount
-                                demand_curve.append({
-                                    'interestRate': rate,
-                                    'borrowingAmount': round(adjusted_borrowing_limit, 1)
-                                })
-                            
-                            # Store the demand curve in the user object
-                            user.demand_curve = demand_curve
-                            
-                            # Get borrowing amount at current interest rate
-                            current_rate_percent = int(self.interest_rate * 100)
-                            
-                            # Find closest rate point for the current interest rate
-                            closest_rate = min(interest_rates, key=lambda x: abs(x - current_rate_percent))
-                            current_rate_point = next(point for point in demand_curve if point['interestRate'] == closest_rate)
-                            borrow_amount = current_rate_point['borrowingAmount']
-                        
-                        else:
-                            # Regular random demand schedule
-                            # Start with 0% interest rate - use maximum borrowing limit
-                            adjusted_borrowing_limit_at_zero = self.borrowing_limit  # At 0% rate, max borrowing is just the limit
-                            # Always use maximum borrowing at 0% interest rate
-                            borrowing_at_zero = adjusted_borrowing_limit_at_zero
-                            demand_curve.append({
-                                'interestRate': 0,
-                                'borrowingAmount': borrowing_at_zero
-                            })
-                            
-                            # Previous borrowing amount (start with the 0% rate amount)
-                            prev_borrowing = borrowing_at_zero
-                            
-                            # Generate remaining points, each with borrowing amount between 0 and previous rate's amount
-                            for rate in interest_rates[1:]:  # Skip 0% as we already did it
-                                # Calculate theoretical max borrowing at this interest rate
-                                adjusted_borrowing_limit = self.borrowing_limit / (1 + rate/100)
-                                
-                                # Get random amount between 0 and the previous interest rate's borrowing amount
-                                # Also ensure it doesn't exceed the theoretical max for this rate
-                                max_possible = min(prev_borrowing, adjusted_borrowing_limit)
-                                borrowing = round(random.uniform(0, max_possible), 1)
-                                
-                                demand_curve.append({
-                                    'interestRate': rate,
-                                    'borrowingAmount': borrowing
-                                })
-                                
-                                # Update previous borrowing for next iteration
-                                prev_borrowing = borrowing
-                            
-                            # Store the demand curve in the user object
-                            user.demand_curve = demand_curve
-                            
-                            # Get borrowing amount at current interest rate for the decision
-                            current_rate_point = next(
-                                (point for point in demand_curve if abs(point['interestRate'] - self.interest_rate * 100) < 0.5),
-                                None
-                            )
-                            
-                            if current_rate_point:
-                                borrow_amount = current_rate_point['borrowingAmount']
-                            else:
-                                # Fallback if no exact match - interpolate between points
-                                current_rate = self.interest_rate * 100
-                                
-                                # Find closest points below and above current rate
-                                lower_points = [p for p in demand_curve if p['interestRate'] < current_rate]
-                                upper_points = [p for p in demand_curve if p['interestRate'] > current_rate]
-                                
-                                if lower_points and upper_points:
-                                    # Get closest points
-                                    lower_point = max(lower_points, key=lambda p: p['interestRate'])
-                                    upper_point = min(upper_points, key=lambda p: p['interestRate'])
-                                    
-                                    # Linear interpolation
-                                    rate_range = upper_point['interestRate'] - lower_point['interestRate']
-                                    if rate_range > 0:
-                                        position = (current_rate - lower_point['interestRate']) / rate_range
-                                        borrow_amount = lower_point['borrowingAmount'] + position * (
-                                            upper_point['borrowingAmount'] - lower_point['borrowingAmount']
-                                        )
-                                    else:
-                                        borrow_amount = lower_point['borrowingAmount']
-                                elif lower_points:
-                                    borrow_amount = max(lower_points, key=lambda p: p['interestRate'])['borrowingAmount']
-                                elif upper_points:
-                                    borrow_amount = min(upper_points, key=lambda p: p['interestRate'])['borrowingAmount']
-                                else:
-                                    # If all else fails, use a safe default
-                                    borrow_amount = min(10, self.borrowing_limit * 0.1)
-                        
-                        # Record the decision with the demand curve
-                        success = self.record_decision(user_id, 'borrow', borrow_amount)
-                        
-                        if not success:
-                            print(f"Failed to record Young borrowing decision for {user_id}: {borrow_amount}")
-                            # Fallback to a safer borrowing amount
-                            self.record_decision(user_id, 'borrow', min(10, self.borrowing_limit * 0.1))
-                        
-                    elif user.age_stage == 'M':
-                        # Calculate disposable income after debt repayment
-                        income = self.income_middle - self.tax_rate_middle
+        if self.make_optimal_decisions:
+            record_optimal_decisions(self, [self.users[user_id] for user_id in self.pending_decisions.ids('test')])
+            return
+
+        # Young test users draw their curves at standard interest rates
+        interest_rates = [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10]  # Interest rates from 0% to 10%
+        young = []
+
+        # Pending players are kept in join order, so seeded runs draw random numbers reproducibly
+        for user_id in list(self.pending_decisions.ids('test')):
+            user = self.users[user_id]
+            try:
+                if user.age_stage == 'Y':
+                    # Generate a full demand curve for young test users
+                    # We'll create a downward sloping demand curve with points at standard interest rates
+                    demand_curve = []
+                    
+                    # Regular random demand schedule
+                    # Start with 0% interest rate - use maximum borrowing limit
+                    adjusted_borrowing_limit_at_zero = self.borrowing_limit  # At 0% rate, max borrowing is just the limit
+                    # Always use maximum borrowing at 0% interest rate
+                    borrowing_at_zero = adjusted_borrowing_limit_at_zero
+                    demand_curve.append({
+                        'interestRate': 0,
+                        'borrowingAmount': borrowing_at_zero
+                    })
+                    
+                    # Previous borrowing amount (start with the 0% rate amount)
+                    prev_borrowing = borrowing_at_zero
+                    
+                    # Generate remaining points, each with borrowing amount between 0 and previous rate's amount
+                    for rate in interest_rates[1:]:  # Skip 0% as we already did it
+                        # Calculate theoretical max borrowing at this interest rate
+                        adjusted_borrowing_limit = self.borrowing_limit / (1 + rate/100)
                         
-                        # Calculate debt repayment from youth
-                        debt_amount = abs(user.assets) if user.assets < 0 else 0
-                        debt_repayment = (1 + self.interest_rate) * debt_amount
+                        # Get random amount between 0 and the previous interest rate's borrowing amount
+                        # Also ensure it doesn't exceed the theoretical max for this rate
+                        max_possible = min(prev_borrowing, adjusted_borrowing_limit)
+                        borrowing = round(random.uniform(0, max_possible), 1)
                         
-                        # Calculate disposable income after debt repayment
-                        disposable_income = income - debt_repayment
+                        demand_curve.append({
+                            'interestRate': rate,
+                            'borrowingAmount': borrowing
+                        })
                         
-                        # Middle-aged test users with negative/zero disposable income 
-                        # just save 0 (consume their income)
-                        if disposable_income <= 0:
-                            print(f"Test user {user.name} has negative disposable income ({disposable_income}), saving 0")
-                            success = self.record_decision(user_id, 'save', 0)
-                            if not success:
-                                print(f"Failed to record zero saving for broke Middle-aged {user_id}")
-                                # Try again with the safest option
-                                self.record_decision(user_id, 'save', 0)
-                        else:
-                            # Normal case: disposable income is positive
-                            # Either save or borrow
-                            if random.random() < 0.8:  # 80% chance to save if they have income
-                                # Save a positive amount up to 60% of disposable income
-                                save_percentage = random.uniform(0.2, 0.6)
-                                save_amount = disposable_income * save_percentage
-                                # Ensure positive and within limits
-                                save_amount = max(0, min(save_amount, disposable_income * 0.9))
-                                
-                                success = self.record_decision(user_id, 'save', save_amount)
-                                if not success:
-                                    print(f"Failed to record Middle-aged saving decision for {user_id}: {save_amount}")
-                                    # Try again with a safer amount
-                                    safe_amount = min(5, disposable_income * 0.1)
-                                    self.record_decision(user_id, 'save', safe_amount)
-                            else:  # 20% chance to borrow
-                                # Borrow a small amount (up to 30% of disposable income)
-                                borrow_percentage = random.uniform(0.1, 0.3)
-                                borrow_amount = disposable_income * borrow_percentage
-                                # Ensure positive and reasonable
-                                borrow_amount = max(0, min(borrow_amount, self.borrowing_limit * 0.3))
-                                
-                                success = self.record_decision(user_id, 'borrow', borrow_amount)
-                                if not success:
-                                    print(f"Failed to record Middle-aged borrowing decision for {user_id}: {borrow_amount}")
-                                    # Try a safer amount
-                                    self.record_decision(user_id, 'save', 1)
+                        # Update previous borrowing for next iteration
+                        prev_borrowing = borrowing
+                    
+                    # Store the demand curve in the user object; the borrowing
+                    # decision is read off all the new curves at once below
+                    user.demand_curve = DemandCurve.from_points(demand_curve, validate=False)
+                    young.append(user)
+
+                elif user.age_stage == 'M':
+                    # Calculate disposable income after debt repayment
+                    income = self.income_middle - self.tax_rate_middle
                     
-                    elif user.age_stage == 'O':
-                        # Old users automatically consume everything
-                        success = self.record_decision(user_id, 'consume', 0)
+                    # Calculate debt repayment from youth
+                    debt_amount = abs(user.assets) if user.assets < 0 else 0
+                    debt_repayment = (1 + self.interest_rate) * debt_amount
+                    
+                    # Calculate disposable income after debt repayment
+                    disposable_income = income - debt_repayment
+                    
+                    # Middle-aged test users with negative/zero disposable income 
+                    # just save 0 (consume their income)
+                    if disposable_income <= 0:
+                        logger.debug("Test user %s has negative disposable income (%s), saving 0",
+                                     user.name, disposable_income)
+                        success = self.record_decision(user_id, 'save', 0)
                         if not success:
-                            print(f"Failed to record Old consumption decision for {user_id}")
-                            # Try again
-                            self.record_decision(user_id, 'consume', 0)
-                except Exception as e:
-                    print(f"Error generating decision for {user_id}: {str(e)}")
-                    # Ensure we don't get stuck with failing test users - just put something valid
-                    if user.age_stage == 'Y':
-                        self.record_decision(user_id, 'borrow', min(10, self.borrowing_limit * 0.1))
-                    elif user.age_stage == 'M':
-                        # Safest option for middle-aged: always try to save 0
-                        self.record_decision(user_id, 'save', 0)
-                    elif user.age_stage == 'O':
+                            logger.warning("Failed to record zero saving for broke Middle-aged %s", user_id)
+                            # Try again with the safest option
+                            self.record_decision(user_id, 'save', 0)
+                    else:
+                        # Normal case: disposable income is positive
+                        # Either save or borrow
+                        if random.random() < 0.8:  # 80% chance to save if they have income
+                            # Save a positive amount up to 60% of disposable income
+                            save_percentage = random.uniform(0.2, 0.6)
+                            save_amount = disposable_income * save_percentage
+                            # Ensure positive and within limits
+                            save_amount = max(0, min(save_amount, disposable_income * 0.9))
+                            
+                            success = self.record_decision(user_id, 'save', save_amount)
+                            if not success:
+                                logger.warning("Failed to record Middle-aged saving decision for %s: %s", user_id, save_amount)
+                                # Try again with a safer amount
+                                safe_amount = min(5, disposable_income * 0.1)
+                                self.record_decision(user_id, 'save', safe_amount)
+                        else:  # 20% chance to borrow
+                            # Borrow a small amount (up to 30% of disposable income)
+                            borrow_percentage = random.uniform(0.1, 0.3)
+                            borrow_amount = disposable_income * borrow_percentage
+                            # Ensure positive and reasonable
+                            borrow_amount = max(0, min(borrow_amount, self.borrowing_limit * 0.3))
+                            
+                            success = self.record_decision(user_id, 'borrow', borrow_amount)
+                            if not success:
+                                logger.warning("Failed to record Middle-aged borrowing decision for %s: %s",
+                                               user_id, borrow_amount)
+                                # Try a safer amount
+                                self.record_decision(user_id, 'save', 1)
+                
+                elif user.age_stage == 'O':
+                    # Old users automatically consume everything
+                    success = self.record_decision(user_id, 'consume', 0)
+                    if not success:
+                        logger.warning("Failed to record Old consumption decision for %s", user_id)
+                        # Try again
                         self.record_decision(user_id, 'consume', 0)
+            except Exception as e:
+                logger.exception("Error generating decision for %s: %s", user_id, e)
+                # Ensure we don't get stuck with failing test users - just put something valid
+                if user.age_stage == 'Y':
+                    self.record_decision(user_id, 'borrow', min(10, self.borrowing_limit * 0.1))
+                elif user.age_stage == 'M':
+                    # Safest option for middle-aged: always try to save 0
+                    self.record_decision(user_id, 'save', 0)
+                elif user.age_stage == 'O':
+                    self.record_decision(user_id, 'consume', 0)
+
+        if young:
+            self._record_test_borrowing(young, interest_rates)
+
+    def _record_test_borrowing(self, young, interest_rates):
+        """Record young test users' borrowing at the current rate, evaluating all their curves at once."""
+        # A rate within half a point of a curve point takes that point's amount
+        current_rate = self.interest_rate * 100
+        rate = next((point for point in interest_rates if abs(point - current_rate) < 0.5), current_rate)
+        amounts = evaluate_curves([user.demand_curve for user in young], [rate])[:, 0]
+
+        for user, borrow_amount in zip(young, amounts.tolist()):
+            success = self.record_decision(user.user_id, 'borrow', borrow_amount)
+            if not success:
+                logger.warning("Failed to record Young borrowing decision for %s: %s", user.user_id, borrow_amount)
+                # Fallback to a safer borrowing amount
+                self.record_decision(user.user_id, 'borrow', min(10, self.borrowing_limit * 0.1))
     
     def run_round(self):
         """
@@ -504,8 +754,9 @@ class GameState:
         
         # Only proceed if all decisions are in after test user decisions are generated
         if self.pending_decisions:
-            logging.warning(f"Cannot run round: {len(self.pending_decisions)} users have not submitted decisions")
-            logging.warning(f"Waiting for: {[self.users[user_id].name for user_id in self.pending_decisions if user_id in self.users]}")
+            logger.warning("Cannot run round: %d users have not submitted decisions", len(self.pending_decisions))
+            logger.warning("Waiting for: %s",
+                           [self.users[user_id].name for user_id in self.pending_decisions])
             return False
         
         # Calculate equilibrium interest rate
@@ -536,7 +787,7 @@ class GameState:
             user.advance_age()
         
         # Reset pending decisions for the new round
-        self.pending_decisions = set(self.users.keys())
+        self.reset_pending()
         
         # Immediately generate decisions for test users for the next round
         self.generate_test_player_decisions()
@@ -566,9 +817,11 @@ class GameState:
                 },
                 'government_debt': self.government_debt
             },
-            'waiting_for_decisions': bool(self.pending_decisions)
+            'waiting_for_decisions': bool(self.pending_decisions),
+            'deadline': self.deadline_state()
         }
     
+    @AGGREGATES_SECONDS.time()
     def compute_aggregates(self):
         """Compute and return a dictionary of commonly needed aggregated values."""
         # Group users by age stage for easier calculations
@@ -596,6 +849,19 @@ class GameState:
             'loan_balance': loan_balance
         }
     
+    def aggregate_demand(self, rates=AGGREGATE_DEMAND_RATES):
+        """
+        Total borrowing of the young players who submitted a demand curve, at
+        each of ``rates`` (in percent), interpolating linearly along each curve
+        and holding its end values beyond it.
+        
+        Returns:
+            list of {'interestRate', 'borrowingAmount'} points
+        """
+        curves = [u.demand_curve for u in self.users.values() if u.age_stage == 'Y' and u.demand_curve]
+        totals = aggregate_curves(curves, rates)
+        return [{'interestRate': rate, 'borrowingAmount': float(total)} for rate, total in zip(rates, totals)]
+    
     def get_full_state(self):
         """Get the complete game state (for professor view)"""
         # Calculate aggregate statistics using the aggregator method
@@ -616,5 +882,7 @@ class GameState:
             'users': {uid: user.get_state() for uid, user in self.users.items()},
             'aggregates': aggregates,
             'waiting_for': list(self.pending_decisions),
+            'waiting_counts': self.pending_decisions.counts(),
+            'deadline': self.deadline_state(),
             'history': self.previous_rounds
         }
@@ -0,0 +1,74 @@
+class PendingDecisions:
+    """
+    The players the current round is still waiting for, partitioned by kind
+    ('human' or 'test') and by age stage.
+
+    Every partition is an insertion-ordered dict, so adding, removing and
+    counting are O(1) and iterating a partition only touches its own members,
+    in the order the players were added (which keeps seeded runs reproducible).
+    It also behaves like the set of pending user ids it replaces: ``in``,
+    ``len``, truth value and iteration all work on every pending player.
+    """
+
+    KINDS = ('human', 'test')
+    STAGES = ('Y', 'M', 'O')
+
+    def __init__(self):
+        self._by_kind = {kind: {} for kind in self.KINDS}
+        self._by_stage = {(kind, stage): {} for kind in self.KINDS for stage in self.STAGES}
+        self._partition = {}  # user_id -> (kind, stage)
+
+    def add(self, user_id, kind, stage):
+        """Mark ``user_id`` (a 'human' or 'test' player in ``stage``) as pending."""
+        self.discard(user_id)
+        self._partition[user_id] = (kind, stage)
+        self._by_kind[kind][user_id] = None
+        self._by_stage[kind, stage][user_id] = None
+
+    def discard(self, user_id):
+        """Stop waiting for ``user_id``; does nothing if it isn't pending."""
+        key = self._partition.pop(user_id, None)
+        if key is not None:
+            del self._by_kind[key[0]][user_id]
+            del self._by_stage[key][user_id]
+
+    def clear(self):
+        for bucket in self._by_kind.values():
+            bucket.clear()
+        for bucket in self._by_stage.values():
+            bucket.clear()
+        self._partition.clear()
+
+    def ids(self, kind=None, stage=None):
+        """Iterate the pending user ids, optionally of one kind and/or stage."""
+        if kind is None:
+            if stage is None:
+                return iter(self._partition)
+            return (user_id for k in self.KINDS for user_id in self._by_stage[k, stage])
+        if stage is None:
+            return iter(self._by_kind[kind])
+        return iter(self._by_stage[kind, stage])
+
+    def count(self, kind=None, stage=None):
+        """Number of pending players, optionally of one kind and/or stage."""
+        if kind is None:
+            if stage is None:
+                return len(self._partition)
+            return sum(len(self._by_stage[k, stage]) for k in self.KINDS)
+        if stage is None:
+            return len(self._by_kind[kind])
+        return len(self._by_stage[kind, stage])
+
+    def counts(self):
+        """{kind: {stage: count}} for every partition."""
+        return {kind: {stage: len(self._by_stage[kind, stage]) for stage in self.STAGES}
+                for kind in self.KINDS}
+
+    def __contains__(self, user_id):
+        return user_id in self._partition
+
+    def __len__(self):
+        return len(self._partition)
+
+    def __iter__(self):
+        return iter(self._partition)
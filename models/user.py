@@ -1,3 +1,9 @@
+import logging
+import math
+
+logger = logging.getLogger(__name__)
+
+
 class User:
     """
     Represents a player (student) in the OLG game. Each user has a lifecycle stage,
@@ -30,15 +36,15 @@ class User:
         self.previous_decision = 0.0
         self.previous_utility = 0.0
         
-        # Demand curve data (for Young agents)
-        self.demand_curve = []
+        # Demand curve (a DemandCurve, for Young agents)
+        self.demand_curve = None
     
     def advance_age(self):
         """Move the user to the next lifecycle stage"""
         if self.age_stage == 'Y':
             self.age_stage = 'M'
             # Clear demand curve data when advancing from Young to Middle-aged
-            self.demand_curve = []
+            self.demand_curve = None
         elif self.age_stage == 'M':
             self.age_stage = 'O'
         else:  # User is Old, reborn as Young
@@ -63,20 +69,18 @@ class User:
             amount = float(amount)
             
             # Save previous round data for display purposes
-            self.previous_consumption = self.current_consumption
-            self.previous_decision = self.current_borrowing if self.age_stage == 'Y' else self.current_saving
-            self.previous_utility = self.current_utility
+            self._keep_previous()
             
             # Process decision based on life stage
             if self.age_stage == 'Y':
                 # Young can only borrow
                 if decision_type != 'borrow':
-                    print(f"Invalid decision type for Young: {decision_type}")
+                    logger.warning("Invalid decision type for Young: %s", decision_type)
                     return False
                 
                 # Borrowing amount must be non-negative
                 if amount < 0:
-                    print(f"Invalid borrowing amount: {amount}")
+                    logger.warning("Invalid borrowing amount: %s", amount)
                     return False
                     
                 self.current_borrowing = amount
@@ -95,31 +99,24 @@ class User:
                 if disposable_income <= 0:
                     # They're completely broke, so no saving or additional borrowing
                     # Just consume whatever income they have and keep the debt
-                    print(f"Middle-aged player has negative disposable income: {disposable_income}. Setting zero saving.")
+                    logger.debug("Middle-aged player has negative disposable income: %s. Setting zero saving.",
+                                 disposable_income)
                     self.current_saving = 0
                     self.current_consumption = income  # They consume just their income
                     # Keep the existing debt from youth
                     
                     # Record the decision
-                    import math
-                    self.current_utility = math.log(max(self.current_consumption, 0.1))
-                    self.decisions.append({
-                        'age_stage': self.age_stage,
-                        'decision_type': 'save',
-                        'amount': 0,
-                        'consumption': self.current_consumption,
-                        'utility': self.current_utility
-                    })
+                    self._log_decision('save', 0)
                     return True
                 
                 # Normal case with positive disposable income
                 if decision_type == 'save':
                     # Cannot save more than disposable income
                     if amount < 0:
-                        print(f"Cannot save negative amount: {amount}")
+                        logger.warning("Cannot save negative amount: %s", amount)
                         return False
                     if amount > disposable_income:
-                        print(f"Cannot save {amount} with only {disposable_income} disposable income")
+                        logger.warning("Cannot save %s with only %s disposable income", amount, disposable_income)
                         return False
                         
                     self.current_saving = amount
@@ -129,7 +126,7 @@ class User:
                 elif decision_type == 'borrow':
                     # Borrowing amount must be non-negative
                     if amount < 0:
-                        print(f"Cannot borrow negative amount: {amount}")
+                        logger.warning("Cannot borrow negative amount: %s", amount)
                         return False
                         
                     self.current_saving = -amount  # Negative saving = borrowing
@@ -137,13 +134,13 @@ class User:
                     self.assets = -amount  # Negative assets represent debt
                     
                 else:
-                    print(f"Invalid decision type for Middle-aged: {decision_type}")
+                    logger.warning("Invalid decision type for Middle-aged: %s", decision_type)
                     return False
                 
             elif self.age_stage == 'O':
                 # Old automatically consume everything
                 if decision_type != 'consume' and decision_type != '':
-                    print(f"Invalid decision type for Old: {decision_type}")
+                    logger.warning("Invalid decision type for Old: %s", decision_type)
                     return False
                     
                 # Calculate consumption based on pension and assets
@@ -155,33 +152,63 @@ class User:
                 
             else:
                 # Unknown age stage
-                print(f"Unknown age stage: {self.age_stage}")
+                logger.error("Unknown age stage: %s", self.age_stage)
                 return False
                 
             # Ensure consumption is not negative
             if self.current_consumption < 0:
-                print(f"Negative consumption: {self.current_consumption}")
+                logger.warning("Negative consumption: %s", self.current_consumption)
                 return False
                 
-            # Calculate utility with log utility function
-            import math
-            self.current_utility = math.log(max(self.current_consumption, 0.1))  # Avoid log(0)
-            
-            # Record decision in history
-            self.decisions.append({
-                'age_stage': self.age_stage,
-                'decision_type': decision_type,
-                'amount': amount,
-                'consumption': self.current_consumption,
-                'utility': self.current_utility
-            })
+            # Score the decision and record it in history
+            self._log_decision(decision_type, amount)
             
             return True
             
         except Exception as e:
-            print(f"Error processing {self.age_stage} decision for {self.user_id}: {str(e)}")
+            logger.exception("Error processing %s decision for %s: %s", self.age_stage, self.user_id, e)
             return False
     
+    @staticmethod
+    def record_defaults(users, decision_type, amounts, consumptions, assets):
+        """
+        Record already-settled decisions for many users of one stage at once
+        (see GameState.fill_pending): the batch counterpart of record_decision,
+        without its per-decision checks.
+        
+        Args:
+            users: users of the same age stage
+            decision_type: the decision recorded for all of them
+            amounts, consumptions, assets: each user's amount, consumption and
+                assets afterwards, in order
+        """
+        for user, amount, consumption, asset in zip(users, amounts, consumptions, assets):
+            user._keep_previous()
+            if user.age_stage == 'Y':
+                user.current_borrowing = amount
+            elif user.age_stage == 'M':
+                user.current_saving = amount
+            user.current_consumption = consumption
+            user.assets = asset
+            user._log_decision(decision_type, amount)
+    
+    def _keep_previous(self):
+        """Keep the last round's consumption, decision and utility for display."""
+        self.previous_consumption = self.current_consumption
+        self.previous_decision = self.current_borrowing if self.age_stage == 'Y' else self.current_saving
+        self.previous_utility = self.current_utility
+    
+    def _log_decision(self, decision_type, amount):
+        """Score the current consumption with log utility and append the decision to the history."""
+        self.current_utility = math.log(max(self.current_consumption, 0.1))  # Avoid log(0)
+        self.decisions.append({
+            'age_stage': self.age_stage,
+            'decision_type': decision_type,
+            'amount': amount,
+            'consumption': self.current_consumption,
+            'utility': self.current_utility
+        })
+    
     def get_state(self):
         """Return the current state of the user for API responses"""
         return {
@@ -197,5 +224,5 @@ class User:
             'previous_consumption': self.previous_consumption,
             'previous_decision': self.previous_decision,
             'previous_utility': self.previous_utility,
-            'demand_curve': self.demand_curve if self.age_stage == 'Y' else []
+            'demand_curve': self.demand_curve.to_points() if self.age_stage == 'Y' and self.demand_curve else []
         }
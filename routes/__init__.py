@@ -0,0 +1,7 @@
+"""
+Blueprints for the professor's tools, registered by app.create_app next to the
+core game routes in app.py.
+
+Each module reaches the shared game through ``import app as game`` and reads
+``game.game_state`` per request, so it follows the game across resets.
+"""
@@ -0,0 +1,39 @@
+"""Decision windows: /api/set_deadline (the deadlines themselves run in app.py, with the rounds)."""
+from flask import Blueprint, jsonify, request, session
+
+import app as game
+
+bp = Blueprint('deadlines', __name__)
+
+# Longest decision window the professor can set, in seconds
+MAX_DECISION_WINDOW = 3600
+
+
+@bp.route('/api/set_deadline', methods=['POST'])
+@game.admitted
+@game.with_game_lock
+def set_deadline():
+    """API endpoint for the professor to set a decision window for each round
+    
+    JSON body: seconds (the window, restarted every round; null or 0 to turn it off)
+    and auto_advance (advance the round when the window ends, instead of just
+    filling in the missing decisions). The current round's window starts now.
+    """
+    if not session.get('is_professor'):
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+    
+    data = request.json or {}
+    seconds = data.get('seconds')
+    try:
+        seconds = float(seconds) if seconds else None
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'error': 'seconds must be a number'}), 400
+    if seconds is not None and not 0 < seconds <= MAX_DECISION_WINDOW:
+        return jsonify({'success': False,
+                        'error': f'seconds must be between 0 and {MAX_DECISION_WINDOW}'}), 400
+    
+    game_state = game.game_state
+    game_state.decision_window = seconds
+    game_state.auto_advance = bool(data.get('auto_advance', False))
+    game.schedule_deadline()
+    return jsonify({'success': True, 'deadline': game_state.deadline_state()})
@@ -0,0 +1,27 @@
+"""Research export of the session: /api/export (see services/export_service.py)."""
+from flask import Blueprint, current_app, jsonify, session, stream_with_context
+
+import app as game
+from services import export_service
+
+bp = Blueprint('export', __name__)
+
+
+@bp.route('/api/export/<table>.<fmt>')
+def export_data(table, fmt):
+    """API endpoint for the professor to stream a research export of the session
+    
+    ``table`` is users, decisions, demand_curves or rounds (or ``all`` for NPZ);
+    ``fmt`` is ndjson, csv or npz. The response is streamed as it is encoded.
+    """
+    if not session.get('is_professor'):
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+    
+    try:
+        chunks = export_service.export(game.game_state, table, fmt)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    response = current_app.response_class(stream_with_context(chunks), mimetype=export_service.FORMATS[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename=olg_{table}.{fmt}'
+    return response
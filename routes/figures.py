@@ -0,0 +1,38 @@
+"""Model figures for the current game parameters: /api/figures (see services/figure_service.py)."""
+from flask import Blueprint, current_app, jsonify, request, session
+
+import app as game
+
+bp = Blueprint('figures', __name__)
+
+
+@bp.route('/api/figures/<kind>.<fmt>')
+@game.admitted
+def model_figure(kind, fmt):
+    """API endpoint for the professor to render a model figure for the current game parameters.
+    
+    Query arguments named like steady-state parameters override the game's values;
+    the same names prefixed with 'shock_' add a second scenario to the loan market chart.
+    """
+    if not session.get('is_professor'):
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+    
+    # Imported here so numpy and matplotlib only load once a figure is requested
+    from services.figure_service import FigureUnavailable, MIME_TYPES, figure_service, parse_params
+    from services.steady_state import params_from_game, young_cohort
+    
+    game_state = game.game_state
+    try:
+        cohort = young_cohort(game_state)
+        params = parse_params(request.args, params_from_game(game_state), cohort=cohort)
+        shocked_params = parse_params(request.args, params, prefix='shock_', cohort=cohort)
+        key, data = figure_service.render(kind, fmt, params, shocked_params)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    except FigureUnavailable:
+        return jsonify({'success': False, 'error': 'Figure rendering is not available on this server'}), 503
+    
+    response = current_app.response_class(data, mimetype=MIME_TYPES[fmt])
+    response.set_etag(key)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
@@ -0,0 +1,53 @@
+"""Policy previews: /api/preview_policy (see services/transition_path.py)."""
+from flask import Blueprint, jsonify, request, session
+
+import app as game
+
+bp = Blueprint('preview', __name__)
+
+# Longest transition path /api/preview_policy solves
+MAX_TRANSITION_PERIODS = 1000
+
+
+@bp.route('/api/preview_policy', methods=['POST'])
+def preview_policy():
+    """API endpoint for the professor to preview a policy change before applying it
+
+    JSON body: the new values of any steady-state parameters (borrowing_limit,
+    government_debt, tax_rate_middle, ...) and periods (default 50). Returns the
+    perfect-foresight path of interest rates from the game's current policy to
+    the new one; the game itself is not changed.
+    """
+    if not session.get('is_professor'):
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+
+    # Imported here so numpy only loads once a preview is requested
+    from services.figure_service import parse_params
+    from services.steady_state import params_from_game, validate_params, young_cohort
+    from services.transition_path import transition_solver
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'success': False, 'error': 'Expected a JSON object'}), 400
+    periods = data.get('periods', 50)
+    if isinstance(periods, bool) or not isinstance(periods, (int, float)) or periods != int(periods) \
+            or not 1 <= periods <= MAX_TRANSITION_PERIODS:
+        return jsonify({'success': False,
+                        'error': f'periods must be a whole number between 1 and {MAX_TRANSITION_PERIODS}'}), 400
+    game_state = game.game_state
+    try:
+        old_params = validate_params(params_from_game(game_state))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': f'The current policy cannot be previewed: {e}'}), 400
+    try:
+        new_params = parse_params(data, old_params, cohort=young_cohort(game_state))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    transition = transition_solver.solve(old_params, new_params, int(periods))
+    if not transition['converged']:
+        # No path of rates clears every market (e.g. a constraint binds throughout)
+        return jsonify({'success': False, 'error': 'No market-clearing transition path found',
+                        'iterations': transition['iterations'],
+                        'max_imbalance': transition['max_imbalance']}), 400
+    return jsonify({'success': True, 'transition': transition})
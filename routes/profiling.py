@@ -0,0 +1,63 @@
+"""On-demand profiling: /api/profiling (see services/profiling.py)."""
+from flask import Blueprint, current_app, jsonify, request, session
+
+from services.profiling import profiler
+
+bp = Blueprint('profiling', __name__)
+
+
+@bp.route('/api/profiling', methods=['GET'])
+def profiling_status():
+    """API endpoint for the professor to see the armed profiling session and stored results"""
+    if not session.get('is_professor'):
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+    return jsonify({'success': True, **profiler.status()})
+
+
+@bp.route('/api/profiling/arm', methods=['POST'])
+def arm_profiling():
+    """API endpoint for the professor to profile the next requests, round advance or equilibrium solve
+    
+    JSON body: target ('requests', 'advance_round' or 'calculate_equilibrium'),
+    mode ('cprofile' or 'sampling'), count (runs to profile) and interval_ms (sampling period).
+    """
+    if not session.get('is_professor'):
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+    
+    data = request.json or {}
+    try:
+        session_id = profiler.arm(data.get('target', 'requests'), data.get('mode', 'cprofile'),
+                                  count=int(data.get('count', 1)),
+                                  interval=float(data.get('interval_ms', 5)) / 1000)
+    except (TypeError, ValueError) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    current_app.logger.info("Profiling armed: %s", data)
+    return jsonify({'success': True, 'id': session_id})
+
+
+@bp.route('/api/profiling/disarm', methods=['POST'])
+def disarm_profiling():
+    """API endpoint for the professor to stop the armed profiling session early"""
+    if not session.get('is_professor'):
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+    profiler.disarm()
+    return jsonify({'success': True})
+
+
+@bp.route('/api/profiling/<int:result_id>.<fmt>', methods=['GET'])
+def download_profile(result_id, fmt):
+    """API endpoint to download a profile: .pstats or .txt for cProfile, .collapsed for sampling"""
+    if not session.get('is_professor'):
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+    
+    try:
+        data, mimetype, filename = profiler.export(result_id, fmt)
+    except KeyError:
+        return jsonify({'success': False, 'error': 'No such profile'}), 404
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    response = current_app.response_class(data, mimetype=mimetype)
+    response.headers['Content-Disposition'] = f'attachment; filename={filename}'
+    return response
@@ -0,0 +1,47 @@
+"""Class rosters: /api/import_roster (see services/roster_service.py)."""
+from flask import Blueprint, jsonify, request, session
+
+import app as game
+from services import roster_service
+
+bp = Blueprint('roster', __name__)
+
+# Largest roster /api/import_roster accepts
+MAX_ROSTER_SIZE = 1000
+
+
+@bp.route('/api/import_roster', methods=['POST'])
+@game.admitted
+@game.with_game_lock
+def import_roster():
+    """
+    API endpoint for the professor to register a whole class at once.
+    
+    Accepts a CSV or JSON roster as a multipart ``file`` upload, or as the request
+    body: CSV with Content-Type text/csv, JSON otherwise (see services/roster_service.py).
+    Nobody is added unless every entry is valid, and the new players are announced
+    in one players_joined event.
+    """
+    if not session.get('is_professor'):
+        return jsonify({'success': False, 'message': 'Unauthorized'}), 403
+    
+    try:
+        upload = request.files.get('file')
+        if upload is not None:
+            fmt = roster_service.roster_format(upload.filename, upload.content_type)
+            entries = roster_service.parse_roster(upload.read().decode('utf-8-sig'), fmt)
+        else:
+            fmt = 'csv' if request.mimetype == 'text/csv' else 'json'
+            entries = roster_service.parse_roster(request.get_data().decode('utf-8-sig'), fmt)
+        if not entries:
+            raise ValueError("The roster is empty")
+        if len(entries) > MAX_ROSTER_SIZE:
+            raise ValueError(f"At most {MAX_ROSTER_SIZE} players per roster")
+        users = game.game_state.add_users(entries)
+    except (ValueError, UnicodeDecodeError) as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    players = [{"id": user.user_id, "name": user.name, "avatar": user.avatar, "stage": user.age_stage}
+               for user in users]
+    game.broadcast('players_joined', {"players": players})
+    return jsonify({'success': True, 'count': len(players), 'players': players})
@@ -0,0 +1,173 @@
+"""
+Admission control for bursts of player requests.
+
+Two limits guard the routes that change the game (joins, decisions, policy):
+
+- a token bucket per client (the caller picks the key: app.py uses the browser
+  session), so one client retrying in a loop cannot crowd out the rest of the
+  class;
+- a gate that lets at most ``max_concurrent`` guarded requests run at once.
+  Requests beyond that wait in a priority queue (professor actions first, then
+  players in arrival order) of at most ``max_queue`` entries, for at most
+  ``queue_timeout`` seconds.
+
+Requests turned away get a Rejection with a reason and a Retry-After hint,
+which the routes answer with 429. Professor actions skip the token buckets,
+jump the queue and are never turned away. Queue depth, requests in flight and
+rejections are exported as metrics.
+
+Waiting requests block their thread. When requests are served from a fixed
+pool of threads (the ASGI mode), keep ``max_concurrent + max_queue`` below the
+pool size so that a professor request always finds a thread to queue on.
+"""
+import heapq
+import itertools
+import math
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from services.metrics import ADMISSION_IN_FLIGHT, ADMISSION_QUEUE_DEPTH, ADMISSION_REJECTED
+
+PROFESSOR, PLAYER = 0, 1
+
+Rejection = namedtuple('Rejection', 'reason retry_after')
+
+
+class TokenBucket:
+    """Allows ``rate`` requests per second on average, and bursts of up to ``burst``."""
+
+    __slots__ = ('rate', 'burst', 'tokens', 'updated')
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self):
+        """Take a token; returns 0 if one was available, else the seconds until one is."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class AdmissionController:
+    """Per-client token buckets in front of a bounded priority queue."""
+
+    def __init__(self, rate=5.0, burst=10, max_concurrent=8, max_queue=200, queue_timeout=5.0,
+                 max_clients=10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()
+        self._bucket_lock = threading.Lock()
+        self._gate = threading.Condition()
+        self._waiting = []  # heap of (priority, sequence) tickets
+        self._sequence = itertools.count()
+        self.in_flight = 0
+
+    def configure(self, rate=None, burst=None, max_concurrent=None, max_queue=None, queue_timeout=None):
+        """Change the limits (0 disables the rate limit or the concurrency limit)."""
+        if rate is not None:
+            self.rate = float(rate)
+        if burst is not None:
+            self.burst = int(burst)
+        if max_concurrent is not None:
+            self.max_concurrent = int(max_concurrent)
+        if max_queue is not None:
+            self.max_queue = int(max_queue)
+        if queue_timeout is not None:
+            self.queue_timeout = float(queue_timeout)
+        with self._bucket_lock:
+            self._buckets.clear()
+
+    def enter(self, route, client, priority=PLAYER):
+        """
+        Admit a request, waiting in the queue if the server is busy.
+
+        Args:
+            route: label for the rejection metric
+            client: key of the client's token bucket, or None for requests
+                that aren't rate limited per client
+            priority: PROFESSOR or PLAYER
+
+        Returns:
+            None once admitted (call leave() when done), or a Rejection
+        """
+        if priority != PROFESSOR and client is not None and self.rate > 0:
+            wait = self._bucket(client).take()
+            if wait:
+                return self._reject(route, 'rate_limited', wait)
+        reason = self._acquire(priority)
+        if reason is not None:
+            return self._reject(route, reason, 1.0)
+        return None
+
+    def leave(self):
+        with self._gate:
+            self.in_flight -= 1
+            ADMISSION_IN_FLIGHT.set(self.in_flight)
+            self._gate.notify_all()
+
+    def _bucket(self, client):
+        with self._bucket_lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                bucket = self._buckets[client] = TokenBucket(self.rate, self.burst)
+                if len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(client)
+            return bucket
+
+    def _acquire(self, priority):
+        """Take a slot; returns None once admitted, or why the request was turned away."""
+        with self._gate:
+            if self.max_concurrent <= 0 or (self.in_flight < self.max_concurrent and not self._waiting):
+                self._admit()
+                return None
+            if priority != PROFESSOR and len(self._waiting) >= self.max_queue:
+                return 'queue_full'
+
+            ticket = (priority, next(self._sequence))
+            heapq.heappush(self._waiting, ticket)
+            ADMISSION_QUEUE_DEPTH.set(len(self._waiting))
+            deadline = time.monotonic() + self.queue_timeout
+            try:
+                while self.in_flight >= self.max_concurrent or self._waiting[0] != ticket:
+                    if priority == PROFESSOR:
+                        self._gate.wait()
+                        continue
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._waiting.remove(ticket)
+                        heapq.heapify(self._waiting)
+                        return 'timeout'
+                    self._gate.wait(remaining)
+                heapq.heappop(self._waiting)
+                self._admit()
+                return None
+            finally:
+                ADMISSION_QUEUE_DEPTH.set(len(self._waiting))
+                # The next ticket may be able to run now
+                self._gate.notify_all()
+
+    def _admit(self):
+        self.in_flight += 1
+        ADMISSION_IN_FLIGHT.set(self.in_flight)
+
+    @staticmethod
+    def _reject(route, reason, retry_after):
+        ADMISSION_REJECTED.inc(route=route, reason=reason)
+        return Rejection(reason, max(1, math.ceil(retry_after)))
+
+
+admission = AdmissionController()
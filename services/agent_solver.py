@@ -0,0 +1,147 @@
+"""
+Lifetime-utility-optimal decisions for test players.
+
+Test players in "optimal" mode maximize the game's log utility over their
+remaining life with the closed-form Euler conditions of services.steady_state:
+young players borrow their share of lifetime wealth (up to the borrowing
+limit), middle-aged players split what is left after repaying their debt
+between middle and old age, and old players consume everything.
+
+Players differ in patience: each one's discount factor is the game's beta
+scaled by a factor in [exp(-spread), exp(spread)] derived from its user id, so
+a bot keeps the same preferences from round to round and seeded runs stay
+reproducible. All players of a stage are solved in one vectorized pass, young
+players over the whole demand curve rate grid at once.
+
+Example:
+    python -m services.agent_solver --players 10000
+"""
+import argparse
+import hashlib
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from models.demand_curve import DemandCurve, grid_rates
+from services.steady_state import RATE_BOUNDS, desired_saving, make_params, params_from_game, young_borrowing
+
+# Default spread of the players' log discount factors around the game's beta
+BETA_SPREAD = 0.2
+
+Decision = namedtuple('Decision', 'user decision_type amount demand_curve')
+
+
+def patience(user_ids, spread=BETA_SPREAD):
+    """Each player's discount factor multiplier, stable for a given user id."""
+    draws = np.fromiter((int.from_bytes(hashlib.blake2b(user_id.encode(), digest_size=8).digest(), 'little')
+                         for user_id in user_ids), dtype=float, count=len(user_ids))
+    return np.exp(spread * (2 * draws / 2.0 ** 64 - 1))
+
+
+def young_plans(betas, rate, params, rates=None):
+    """
+    Optimal borrowing of young players.
+
+    Args:
+        betas: discount factor of each player
+        rate: the expected net rate the decision is made at
+        params: steady-state parameters (see services.steady_state)
+        rates: demand curve rates in percent (default: the shared grid)
+
+    Returns:
+        (amounts at ``rate``, demand curves as a players x rates array), rounded to 0.1
+    """
+    betas = np.asarray(betas, dtype=float)
+    rates = np.asarray(grid_rates() if rates is None else rates, dtype=float)
+    limit = params['borrowing_limit']
+    # The game never accepts more than the limit itself, even at negative rates
+    curves = np.minimum(young_borrowing(rates / 100, dict(params, beta=betas[:, None])), limit)
+    amounts = np.minimum(young_borrowing(rate, dict(params, beta=betas)), limit)
+    return np.round(amounts, 1), np.round(curves, 1)
+
+
+def middle_plans(betas, debts, rate, params):
+    """
+    Optimal saving of middle-aged players with ``debts`` from youth.
+
+    Players who can't repay their debt save nothing. Negative values are
+    borrowing, limited like young borrowing.
+
+    Returns:
+        saving per player, rounded to 0.1
+    """
+    betas = np.asarray(betas, dtype=float)
+    debts = np.asarray(debts, dtype=float)
+    gross = 1 + rate
+    disposable = params['income_middle'] - params['tax_rate_middle'] - gross * debts
+    saving = desired_saving(debts, rate, dict(params, beta=betas))
+    limit = min(params['borrowing_limit'], params['borrowing_limit'] / gross)
+    saving = np.clip(np.round(saving, 1), -limit, disposable)
+    return np.where(disposable > 0, saving, 0.0)
+
+
+def optimal_decisions(game_state, users, spread=BETA_SPREAD):
+    """
+    Solve the decisions of ``users`` at the game's current rate and policy.
+
+    Returns:
+        one Decision per user, in order (demand_curve is set for young players only)
+    """
+    params = params_from_game(game_state)
+    # A rate set by hand may lie below the search interval, where the gross rate can vanish
+    rate = max(game_state.interest_rate, RATE_BOUNDS[0])
+    decisions = [None] * len(users)
+    by_stage = {}
+    for index, user in enumerate(users):
+        by_stage.setdefault(user.age_stage, []).append(index)
+
+    young = by_stage.get('Y', [])
+    if young:
+        amounts, curves = young_plans(patience([users[i].user_id for i in young], spread) * params['beta'],
+                                      rate, params)
+        for index, amount, curve in zip(young, amounts.tolist(), curves.tolist()):
+            decisions[index] = Decision(users[index], 'borrow', amount, DemandCurve.from_grid(curve))
+
+    middle = by_stage.get('M', [])
+    if middle:
+        debts = [max(-users[i].assets, 0.0) for i in middle]
+        saving = middle_plans(patience([users[i].user_id for i in middle], spread) * params['beta'],
+                              debts, rate, params)
+        for index, amount in zip(middle, saving.tolist()):
+            decision_type = 'save' if amount >= 0 else 'borrow'
+            decisions[index] = Decision(users[index], decision_type, abs(amount), None)
+
+    for index in by_stage.get('O', []):
+        decisions[index] = Decision(users[index], 'consume', 0, None)
+    return [decision for decision in decisions if decision is not None]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Time the optimal test player solver.')
+    parser.add_argument('--players', type=int, default=10000, help='players per life stage')
+    parser.add_argument('--rate', type=float, default=0.05, help='expected net interest rate')
+    parser.add_argument('--repeat', type=int, default=20, help='timed repetitions')
+    args = parser.parse_args(argv)
+
+    params = make_params()
+    ids = [f'test_{i}' for i in range(args.players)]
+    timings = {}
+    for name, solve in (('patience', lambda: patience(ids)),
+                        ('young', lambda: young_plans(patience(ids), args.rate, params)),
+                        ('middle', lambda: middle_plans(patience(ids), np.full(args.players, 20.0),
+                                                        args.rate, params))):
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            solve()
+        timings[name] = (time.perf_counter() - start) / args.repeat
+
+    amounts, curves = young_plans(patience(ids), args.rate, params)
+    print(f"{args.players} players per stage, {curves.shape[1]}-point demand curves")
+    for name, seconds in timings.items():
+        print(f"  {name:<9} {seconds * 1000:8.2f} ms")
+    print(f"  mean young borrowing at {args.rate:.0%}: {amounts.mean():.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,103 @@
+"""
+Compression of large API responses.
+
+JSON responses at least ``min_size`` bytes long are compressed with the best
+encoding the client accepts: brotli when the brotli package is installed, then
+gzip, then deflate. Smaller payloads are sent as they are, since compressing
+them saves little and costs a round of CPU on every request.
+
+Compressed bodies are cached by a hash of the uncompressed body and the
+encoding, with LRU eviction, so repeated polls of an unchanged snapshot (the
+professor dashboard's /api/current_state, the round history) are served
+without compressing again. Compression time and bytes saved are recorded in
+the metrics registry.
+"""
+import gzip
+import hashlib
+import threading
+import zlib
+from collections import OrderedDict
+
+from services.metrics import COMPRESSION_CACHE, COMPRESSION_SAVED_BYTES, COMPRESSION_SECONDS
+
+try:
+    import brotli
+except ImportError:  # optional: gzip and deflate are always available
+    brotli = None
+
+
+def _brotli(data, level):
+    # brotli quality runs 0-11; map the zlib-style 1-9 level onto it
+    return brotli.compress(data, quality=min(11, level + 2))
+
+
+ENCODERS = {
+    'gzip': lambda data, level: gzip.compress(data, compresslevel=level, mtime=0),
+    'deflate': lambda data, level: zlib.compress(data, level)
+}
+if brotli is not None:
+    ENCODERS = {'br': _brotli, **ENCODERS}
+
+
+class ResponseCompressor:
+    """Compresses response bodies and caches the compressed variants."""
+
+    def __init__(self, min_size=1024, level=6, max_entries=32):
+        self.min_size = min_size
+        self.level = level
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def configure(self, min_size=None, level=None, max_entries=None):
+        if min_size is not None:
+            self.min_size = int(min_size)
+        if level is not None:
+            self.level = int(level)
+        if max_entries is not None:
+            self.max_entries = int(max_entries)
+        self.clear()
+
+    @property
+    def encodings(self):
+        """Supported encodings, most preferred first."""
+        return list(ENCODERS)
+
+    def compress(self, data, encoding):
+        """
+        Return ``data`` compressed with ``encoding``, or None to send it as is.
+
+        Args:
+            data: the uncompressed body (bytes)
+            encoding: one of ``encodings``, or None if the client accepts none
+        """
+        if encoding not in ENCODERS or len(data) < self.min_size:
+            return None
+
+        key = (hashlib.blake2b(data, digest_size=16).digest(), encoding)
+        with self._lock:
+            body = self._cache.get(key)
+            if body is not None:
+                self._cache.move_to_end(key)
+        if body is None:
+            COMPRESSION_CACHE.inc(result='miss')
+            with COMPRESSION_SECONDS.time(encoding=encoding):
+                body = ENCODERS[encoding](data, self.level)
+            with self._lock:
+                self._cache[key] = body
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+        else:
+            COMPRESSION_CACHE.inc(result='hit')
+
+        if len(body) >= len(data):
+            return None
+        COMPRESSION_SAVED_BYTES.inc(len(data) - len(body), encoding=encoding)
+        return body
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+
+compressor = ResponseCompressor()
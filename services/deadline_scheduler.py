@@ -0,0 +1,98 @@
+"""
+Timer wheel for decision deadlines.
+
+A hashed timing wheel keeps every pending deadline in one of ``slots``
+buckets by the tick it expires on. Scheduling and cancelling are O(1), and
+each tick only looks at one bucket, so one background thread can watch the
+deadlines of any number of games at a fixed cost per tick. Deadlines are
+accurate to one tick.
+
+Deadlines are keyed (e.g. by game); scheduling a key again replaces its
+previous deadline. Expired callbacks are handed to ``runner`` so a slow one
+(advancing a round) never delays the next tick.
+"""
+import logging
+import math
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class TimerWheel:
+    """Runs callbacks once their deadline passes, with ``tick`` second resolution."""
+
+    def __init__(self, tick=0.25, slots=512, runner=None):
+        self.tick = tick
+        self.slots = [{} for _ in range(slots)]  # key -> (due tick, callback)
+        self.runner = runner or (lambda func: func())
+        self._where = {}  # key -> slot index
+        self._lock = threading.Lock()
+        self._current = 0
+        self._started = None
+        self._thread = None
+
+    def schedule(self, key, delay, callback):
+        """
+        Run ``callback`` (no arguments) in about ``delay`` seconds, replacing any deadline for ``key``.
+
+        Returns:
+            the deadline as a wall-clock timestamp (for clients' countdowns)
+        """
+        ticks = max(1, math.ceil(delay / self.tick))
+        with self._lock:
+            self._start()
+            self._remove(key)
+            due = self._current + ticks
+            index = due % len(self.slots)
+            self.slots[index][key] = (due, callback)
+            self._where[key] = index
+        return time.time() + ticks * self.tick
+
+    def cancel(self, key):
+        """Drop the deadline for ``key``; returns whether there was one."""
+        with self._lock:
+            return self._remove(key)
+
+    def __contains__(self, key):
+        return key in self._where
+
+    def __len__(self):
+        return len(self._where)
+
+    def _remove(self, key):
+        index = self._where.pop(key, None)
+        if index is None:
+            return False
+        del self.slots[index][key]
+        return True
+
+    def _start(self):
+        if self._thread is None:
+            self._started = time.monotonic()
+            self._thread = threading.Thread(target=self._run, name='olg-deadlines', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while True:
+            # Sleep to the next tick boundary; a late wake-up catches up tick by tick
+            time.sleep(max(0.0, self._started + (self._current + 1) * self.tick - time.monotonic()))
+            target = int((time.monotonic() - self._started) / self.tick)
+            while self._current < target:
+                for callback in self._advance():
+                    try:
+                        self.runner(callback)
+                    except Exception:
+                        logger.exception("Deadline callback failed")
+
+    def _advance(self):
+        """Move to the next tick and take the callbacks due on it."""
+        with self._lock:
+            self._current += 1
+            bucket = self.slots[self._current % len(self.slots)]
+            due = [key for key, (tick, _) in bucket.items() if tick <= self._current]
+            callbacks = []
+            for key in due:
+                callbacks.append(bucket.pop(key)[1])
+                del self._where[key]
+            return callbacks
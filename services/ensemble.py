@@ -0,0 +1,196 @@
+"""
+Monte Carlo ensembles of randomized test-player games.
+
+Test players draw their decisions with ``random``, so a single simulated game
+is one noisy draw. This module runs many independently seeded replications of
+the same game configuration across processes and reduces the per-round
+interest rates as results arrive: running moments plus a fixed-bin histogram
+for quantiles, so memory does not grow with the number of replications.
+
+Example:
+    python -m services.ensemble --replications 1000 --rounds 10 --players 30 \\
+        --borrowing-limit 60 --seed 42
+"""
+import argparse
+import csv
+import os
+import sys
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from services.equilibrium_executor import RATE_BOUNDS
+from services.policy_sweep import POLICY_PARAMETERS, build_game, simulate
+
+DEFAULT_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+def replication_seeds(seed, replications):
+    """Derive independent, reproducible integer seeds for each replication."""
+    children = np.random.SeedSequence(seed).spawn(replications)
+    return [int(child.generate_state(1)[0]) for child in children]
+
+
+def run_replication(task):
+    """
+    Run one seeded replication. Runs inside a worker process.
+
+    Args:
+        task: tuple of (policy dict, num_test_players, rounds, optimal_decisions, seed)
+
+    Returns:
+        list with the equilibrium rate followed by the rate of every simulated round
+    """
+    policy, num_test_players, rounds, optimal_decisions, seed = task
+    game_state = build_game(policy, num_test_players, optimal_decisions, seed)
+    return [game_state.interest_rate] + simulate(game_state, rounds)
+
+
+class RoundAccumulator:
+    """
+    Streaming per-round reduction of interest rates.
+
+    Keeps running counts, means and variances (Welford) and a histogram over
+    RATE_BOUNDS per round. Quantiles are interpolated within histogram bins,
+    so their resolution is the bin width.
+    """
+
+    def __init__(self, rounds, bins=3000, rate_range=RATE_BOUNDS):
+        self.rate_range = rate_range
+        self.bin_width = (rate_range[1] - rate_range[0]) / bins
+        self.count = np.zeros(rounds, dtype=np.int64)
+        self.mean = np.zeros(rounds)
+        self.m2 = np.zeros(rounds)
+        self.min = np.full(rounds, np.inf)
+        self.max = np.full(rounds, -np.inf)
+        self.histogram = np.zeros((rounds, bins), dtype=np.int64)
+
+    def add(self, rates):
+        """Fold one replication's rate path into the running statistics."""
+        n = min(len(rates), len(self.count))
+        if n == 0:
+            return
+        x = np.asarray(rates[:n], dtype=float)
+        idx = np.arange(n)
+
+        self.count[idx] += 1
+        delta = x - self.mean[idx]
+        self.mean[idx] += delta / self.count[idx]
+        self.m2[idx] += delta * (x - self.mean[idx])
+        self.min[idx] = np.minimum(self.min[idx], x)
+        self.max[idx] = np.maximum(self.max[idx], x)
+
+        bins = ((x - self.rate_range[0]) / self.bin_width).astype(np.int64)
+        np.clip(bins, 0, self.histogram.shape[1] - 1, out=bins)
+        self.histogram[idx, bins] += 1
+
+    def quantile(self, q):
+        """Return the q-quantile of every round (NaN for rounds with no data)."""
+        result = np.full(len(self.count), np.nan)
+        cumulative = np.cumsum(self.histogram, axis=1)
+        for r, total in enumerate(self.count):
+            if total == 0:
+                continue
+            target = q * total
+            b = int(np.searchsorted(cumulative[r], target))
+            below = cumulative[r, b - 1] if b > 0 else 0
+            fraction = (target - below) / self.histogram[r, b] if self.histogram[r, b] else 0.0
+            value = self.rate_range[0] + (b + fraction) * self.bin_width
+            result[r] = min(max(value, self.min[r]), self.max[r])
+        return result
+
+    def summary(self, quantiles=DEFAULT_QUANTILES):
+        """Return one dict per round with count, moments, extremes and quantiles."""
+        std = np.sqrt(np.divide(self.m2, self.count - 1, out=np.zeros_like(self.m2),
+                                where=self.count > 1))
+        quantile_values = {q: self.quantile(q) for q in quantiles}
+        rows = []
+        for r in range(len(self.count)):
+            if self.count[r] == 0:
+                continue
+            row = {
+                'round': r,
+                'count': int(self.count[r]),
+                'mean': float(self.mean[r]),
+                'std': float(std[r]),
+                'min': float(self.min[r]),
+                'max': float(self.max[r])
+            }
+            for q in quantiles:
+                row[f'q{round(q * 100):02d}'] = float(quantile_values[q][r])
+            rows.append(row)
+        return rows
+
+
+def run_ensemble(policy=None, num_test_players=30, rounds=10, replications=100,
+                 optimal_decisions=False, seed=0, workers=None, bins=3000):
+    """
+    Run seeded replications of a game configuration across a process pool.
+
+    Round 0 of the result is the initial equilibrium; rounds 1..N are the
+    simulated rounds. At most ``2 * workers`` replications are in flight, and
+    each result is folded into the accumulator as soon as it completes.
+
+    Returns:
+        RoundAccumulator holding the reduced interest-rate distributions
+    """
+    policy = policy or {}
+    accumulator = RoundAccumulator(rounds + 1, bins=bins)
+    tasks = ((policy, num_test_players, rounds, optimal_decisions, s)
+             for s in replication_seeds(seed, replications))
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        for task in tasks:
+            accumulator.add(run_replication(task))
+        return accumulator
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        in_flight = set()
+        for task in tasks:
+            in_flight.add(executor.submit(run_replication, task))
+            if len(in_flight) >= 2 * workers:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    accumulator.add(future.result())
+        for future in in_flight:
+            accumulator.add(future.result())
+    return accumulator
+
+
+def write_summary(rows, stream):
+    """Write the summary rows to a CSV stream."""
+    writer = csv.DictWriter(stream, fieldnames=list(rows[0]) if rows else ['round'])
+    writer.writeheader()
+    writer.writerows(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run a Monte Carlo ensemble of OLG games.')
+    for name in POLICY_PARAMETERS:
+        parser.add_argument('--' + name.replace('_', '-'), type=float, dest=name)
+    parser.add_argument('--players', type=int, default=30, help='test players per replication')
+    parser.add_argument('--rounds', type=int, default=10, help='rounds per replication')
+    parser.add_argument('--replications', type=int, default=100, help='number of replications')
+    parser.add_argument('--optimal', action='store_true', help='test players make optimal decisions')
+    parser.add_argument('--seed', type=int, default=0, help='base seed for the ensemble')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: all cores)')
+    parser.add_argument('--output', help='summary CSV path (default: stdout)')
+    args = parser.parse_args(argv)
+
+    policy = {name: getattr(args, name) for name in POLICY_PARAMETERS if getattr(args, name) is not None}
+    accumulator = run_ensemble(policy, num_test_players=args.players, rounds=args.rounds,
+                               replications=args.replications, optimal_decisions=args.optimal,
+                               seed=args.seed, workers=args.workers)
+    rows = accumulator.summary()
+    if args.output is None:
+        write_summary(rows, sys.stdout)
+    else:
+        with open(args.output, 'w', newline='') as f:
+            write_summary(rows, f)
+
+    print(f"Summarized {args.replications} replications over {len(rows)} rounds", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
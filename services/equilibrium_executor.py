@@ -0,0 +1,180 @@
+"""
+Loan market equilibrium solves, optionally in a process pool.
+
+A solve only needs the young players' borrowing, the middle-aged players'
+saving and two parameters, so the game packs those into a ``MarketSnapshot``
+(two float arrays) and the bisection runs on that. Large games send the
+snapshot to a pool of worker processes, which keeps the solve from competing
+with request handling for the GIL; small games, and any process without a
+ready pool (the CLI tools, a pool still starting up or one that has died),
+solve inline because pickling would cost more than the solve.
+
+The pool is started in the background by the first solve big enough to need
+it, so the app doesn't wait for it at startup, and numpy is only imported once
+a market is actually solved.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+logger = logging.getLogger(__name__)
+
+# Interest rates every equilibrium search in the game and its models stays within
+# (-99% to 200%, so the gross rate stays positive), and the tolerance and
+# iteration cap of the game's bisection
+RATE_BOUNDS = (-0.99, 2.0)
+TOLERANCE = 1e-6
+MAX_ITERATIONS = 100
+
+MarketSnapshot = namedtuple('MarketSnapshot', 'young_borrowing middle_saving borrowing_limit government_debt')
+# bounds_imbalance: excess demand at the two rate bounds; converged: False if the
+# iteration cap was hit
+Solution = namedtuple('Solution', 'rate iterations bounds_imbalance converged')
+
+
+def make_snapshot(young_borrowing, middle_saving, borrowing_limit, government_debt):
+    """Pack the market into float arrays; only positive saving supplies loans."""
+    import numpy as np
+
+    saving = np.asarray(middle_saving, dtype=float)
+    return MarketSnapshot(np.asarray(young_borrowing, dtype=float), saving[saving > 0],
+                          float(borrowing_limit), float(government_debt))
+
+
+def solve_market(snapshot):
+    """
+    Find the rate that clears the loan market by bisection:
+    sum(min(limit / (1 + r), B^y_i)) + B^g = sum(B^m_j)
+    """
+    import numpy as np
+
+    young = snapshot.young_borrowing
+    supply = float(snapshot.middle_saving.sum())
+
+    def market_imbalance(rate):
+        demand = float(np.minimum(snapshot.borrowing_limit / (1 + rate), young).sum())
+        return demand + snapshot.government_debt - supply
+
+    r_min, r_max = RATE_BOUNDS
+    bounds_imbalance = (market_imbalance(r_min), market_imbalance(r_max))
+
+    for iteration in range(1, MAX_ITERATIONS + 1):
+        r_mid = (r_min + r_max) / 2
+        imbalance = market_imbalance(r_mid)
+        if abs(imbalance) < TOLERANCE:
+            return Solution(r_mid, iteration, bounds_imbalance, True)
+        if imbalance > 0:  # Excess demand, increase rate
+            r_min = r_mid
+        else:  # Excess supply, decrease rate
+            r_max = r_mid
+    return Solution((r_min + r_max) / 2, MAX_ITERATIONS, bounds_imbalance, False)
+
+
+def _warm_up(_):
+    # Importing this module and numpy is the slow part of a worker's first task
+    import numpy  # noqa: F401
+    return os.getpid()
+
+
+class EquilibriumExecutor:
+    """Solves market snapshots inline or in a warm process pool."""
+
+    def __init__(self, workers=0, inline_threshold=5000):
+        self.workers = workers
+        self.inline_threshold = inline_threshold
+        self._pool = None
+        self._pid = None  # process that configured the pool
+        # Bumped whenever the pool is dropped; a start only installs its pool if
+        # the generation it began in is still current
+        self._generation = 0
+        self._started = None  # generation the last start began in
+        self._lock = threading.Lock()
+
+    def start(self, workers=None, inline_threshold=None):
+        """
+        (Re)configure the pool; 0 workers disables it. Workers are started in the
+        background by the first solve big enough to use them, so creating the app
+        never waits for them, and solves run inline until they are ready.
+        """
+        if workers is not None:
+            self.workers = workers
+        if inline_threshold is not None:
+            self.inline_threshold = inline_threshold
+        self.shutdown()
+        self._pid = os.getpid()
+
+    def warm_up(self):
+        """Start the workers now and wait until they are ready (e.g. before benchmarking)."""
+        thread = self._start_in_background()
+        if thread is not None:
+            thread.join()
+
+    @property
+    def ready(self):
+        """Whether large solves go to the pool."""
+        return self._pool is not None
+
+    def _start_in_background(self):
+        with self._lock:
+            if self.workers <= 0 or self._started == self._generation:
+                return None
+            self._started = generation = self._generation
+        thread = threading.Thread(target=self._start_pool, args=(generation, self.workers),
+                                  name='olg-equilibrium-start', daemon=True)
+        thread.start()
+        return thread
+
+    def _start_pool(self, generation, workers):
+        # Forking the threaded web process could copy held locks into the workers
+        pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn'))
+        try:
+            list(pool.map(_warm_up, range(workers)))
+        except Exception:
+            # Not retried until the pool is reconfigured
+            logger.exception("Equilibrium worker pool failed to start; solving inline")
+            pool.shutdown(wait=False, cancel_futures=True)
+            return
+        with self._lock:
+            current = generation == self._generation
+            if current:
+                self._pool = pool
+        if not current:
+            pool.shutdown(wait=False, cancel_futures=True)
+            return
+        logger.info("Started %d equilibrium worker processes", workers)
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+            self._generation += 1
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def solve(self, snapshot):
+        """Return the ``Solution`` for ``snapshot``, in the pool when it is worth it."""
+        players = len(snapshot.young_borrowing) + len(snapshot.middle_saving)
+        # A forked child (e.g. a policy sweep worker) inherits the object but not the pool
+        if players < self.inline_threshold or self._pid != os.getpid():
+            return solve_market(snapshot)
+        pool = self._pool
+        if pool is None:
+            self._start_in_background()
+            return solve_market(snapshot)
+        try:
+            return pool.submit(solve_market, snapshot).result()
+        except (BrokenProcessPool, RuntimeError):
+            # RuntimeError: the pool was shut down under us
+            logger.exception("Equilibrium worker pool unavailable; solving inline")
+            with self._lock:
+                if self._pool is pool:
+                    # The next large solve starts a fresh pool
+                    self._pool = None
+                    self._generation += 1
+            return solve_market(snapshot)
+
+
+equilibrium_executor = EquilibriumExecutor()
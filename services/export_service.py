@@ -0,0 +1,271 @@
+"""
+Streaming research export of game data.
+
+Four tables can be exported: ``users`` (everyone's current state),
+``decisions`` (one row per player per completed round), ``demand_curves``
+(one row per point of each young player's curve per round) and ``rounds``
+(policy and aggregates of each completed round). Rows are produced by
+generators straight from the game state and encoded one at a time, so NDJSON
+and CSV exports hold a single row in memory however long the session ran.
+
+The NPZ export is columnar: one ``<table>/<column>`` array per column, readable
+with ``numpy.load``. It is streamed too. The rows are counted first, then each
+column is written into the zip archive in fixed-size chunks, so memory stays
+bounded by the chunk size rather than the session length.
+
+Example:
+    python -m services.export_service --players 60 --rounds 20 --output session.npz
+    python -m services.export_service --url http://localhost:5001 --table decisions --output decisions.csv
+"""
+import argparse
+import csv
+import io
+import json
+import sys
+import zipfile
+
+# Columns of each table and their type ('str', 'int', 'float' or 'bool')
+AGGREGATE_COLUMNS = [
+    'young_count', 'middle_count', 'old_count', 'total_young_borrowing', 'total_middle_saving',
+    'total_middle_borrowing', 'loan_demand', 'loan_supply', 'loan_balance'
+]
+TABLES = {
+    'users': [
+        ('user_id', 'str'), ('name', 'str'), ('avatar', 'str'), ('age_stage', 'str'), ('is_test', 'bool'),
+        ('assets', 'float'), ('current_consumption', 'float'), ('current_borrowing', 'float'),
+        ('current_saving', 'float'), ('current_utility', 'float')
+    ],
+    'decisions': [
+        ('round', 'int'), ('user_id', 'str'), ('age_stage', 'str'), ('borrowing', 'float'),
+        ('saving', 'float'), ('consumption', 'float'), ('utility', 'float'), ('assets', 'float')
+    ],
+    'demand_curves': [
+        ('round', 'int'), ('user_id', 'str'), ('interest_rate', 'float'), ('borrowing_amount', 'float')
+    ],
+    'rounds': [
+        ('round', 'int'), ('interest_rate', 'float'), ('tax_young', 'float'), ('tax_middle', 'float'),
+        ('tax_old', 'float'), ('government_debt', 'float'), ('borrowing_limit', 'float')
+    ] + [(name, 'float') for name in AGGREGATE_COLUMNS]
+}
+FORMATS = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+    'npz': 'application/octet-stream'
+}
+# Values per column written to the NPZ archive at a time
+CHUNK_ROWS = 4096
+
+
+def columns(table):
+    """Column names of ``table``."""
+    return [name for name, _ in TABLES[table]]
+
+
+def iter_rows(game_state, table):
+    """
+    Yield the rows of ``table`` as dicts, in a stable order.
+
+    Only rounds completed when the export starts are included, so a round
+    finishing mid-export doesn't tear the output.
+
+    Raises:
+        ValueError: unknown table
+    """
+    if table not in TABLES:
+        raise ValueError(f"Unknown table: {table}")
+    if table == 'users':
+        return _user_rows(game_state, list(game_state.users.values()))
+    history = game_state.previous_rounds
+    rounds = (history[index] for index in range(len(history)))
+    return {'decisions': _decision_rows, 'demand_curves': _demand_curve_rows,
+            'rounds': _round_rows}[table](rounds)
+
+
+def _user_rows(game_state, users):
+    for user in users:
+        yield {
+            'user_id': user.user_id, 'name': user.name, 'avatar': user.avatar, 'age_stage': user.age_stage,
+            'is_test': game_state.is_test_user(user.user_id), 'assets': user.assets,
+            'current_consumption': user.current_consumption, 'current_borrowing': user.current_borrowing,
+            'current_saving': user.current_saving, 'current_utility': user.current_utility
+        }
+
+
+def _decision_rows(rounds):
+    for round_data in rounds:
+        for user_id, state in round_data['users'].items():
+            yield {
+                'round': round_data['round'], 'user_id': user_id, 'age_stage': state['age_stage'],
+                'borrowing': state['current_borrowing'], 'saving': state['current_saving'],
+                'consumption': state['current_consumption'], 'utility': state['current_utility'],
+                'assets': state['assets']
+            }
+
+
+def _demand_curve_rows(rounds):
+    for round_data in rounds:
+        for user_id, state in round_data['users'].items():
+            for point in state.get('demand_curve') or ():
+                yield {'round': round_data['round'], 'user_id': user_id,
+                       'interest_rate': point['interestRate'], 'borrowing_amount': point['borrowingAmount']}
+
+
+def _round_rows(rounds):
+    for round_data in rounds:
+        row = {name: round_data[name] for name, _ in TABLES['rounds'] if name in round_data}
+        aggregates = round_data.get('aggregates', {})
+        row.update((name, aggregates.get(name, 0.0)) for name in AGGREGATE_COLUMNS)
+        yield row
+
+
+def stream_ndjson(rows):
+    """Encode rows as newline-delimited JSON, one line per row."""
+    for row in rows:
+        yield json.dumps(row, separators=(',', ':')) + '\n'
+
+
+def stream_csv(rows, fieldnames):
+    """Encode rows as CSV with a header line, one chunk per row."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames)
+    writer.writeheader()
+    for row in rows:
+        writer.writerow(row)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+class _ChunkSink:
+    """A write-only file that hands out what was written since the last drain()."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_npz(game_state, tables):
+    """
+    Encode ``tables`` as an NPZ archive with one ``<table>/<column>`` array per column.
+
+    Every table is read once to count its rows (and size its string columns)
+    and once more per column. Completed rounds never change, but players who
+    join mid-export are left out of the users table (and missing ones padded)
+    so every column keeps the counted length.
+    """
+    import numpy as np
+
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_STORED, allowZip64=True) as archive:
+        for table in tables:
+            count, widths = 0, {}
+            for row in iter_rows(game_state, table):
+                count += 1
+                for name, kind in TABLES[table]:
+                    if kind == 'str':
+                        widths[name] = max(widths.get(name, 1), len(str(row.get(name, ''))))
+
+            for name, kind in TABLES[table]:
+                dtype = np.dtype({'str': f'<U{widths.get(name, 1)}', 'int': '<i8',
+                                  'float': '<f8', 'bool': '?'}[kind])
+                with archive.open(f'{table}/{name}.npy', 'w', force_zip64=True) as member:
+                    np.lib.format.write_array_header_1_0(
+                        member, {'descr': np.lib.format.dtype_to_descr(dtype), 'fortran_order': False,
+                                 'shape': (count,)})
+                    chunk, written = [], 0
+                    for row in iter_rows(game_state, table):
+                        if written + len(chunk) == count:
+                            break  # the table grew since it was counted
+                        chunk.append(row.get(name, '' if kind == 'str' else 0))
+                        if len(chunk) == CHUNK_ROWS:
+                            member.write(np.asarray(chunk, dtype=dtype).tobytes())
+                            written += len(chunk)
+                            chunk.clear()
+                            yield sink.drain()
+                    chunk += ['' if kind == 'str' else 0] * (count - written - len(chunk))
+                    member.write(np.asarray(chunk, dtype=dtype).tobytes())
+                yield sink.drain()
+    yield sink.drain()
+
+
+def export(game_state, table, fmt):
+    """
+    Stream ``table`` ('all' for every table, NPZ only) in ``fmt``.
+
+    Returns:
+        a generator of str (NDJSON, CSV) or bytes (NPZ) chunks
+
+    Raises:
+        ValueError: unknown table or format
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    if table == 'all' and fmt == 'npz':
+        return stream_npz(game_state, list(TABLES))
+    if table not in TABLES:
+        raise ValueError(f"Unknown table: {table}")
+    if fmt == 'npz':
+        return stream_npz(game_state, [table])
+    rows = iter_rows(game_state, table)
+    return stream_ndjson(rows) if fmt == 'ndjson' else stream_csv(rows, columns(table))
+
+
+def _download(url, table, fmt, out):
+    """Stream an export from a running server (professor session) into ``out``."""
+    import http.cookiejar
+    import urllib.request
+
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+    opener.open(f'{url.rstrip("/")}/professor').read()
+    with opener.open(f'{url.rstrip("/")}/api/export/{table}.{fmt}') as response:
+        while True:
+            chunk = response.read(64 * 1024)
+            if not chunk:
+                break
+            out.write(chunk)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Export OLG game data for analysis.')
+    parser.add_argument('--url', help='export from the game running at this URL instead of simulating one')
+    parser.add_argument('--table', default='all',
+                        help=f"table to export: {', '.join(TABLES)} or all (NPZ only, the default)")
+    parser.add_argument('--players', type=int, default=30, help='test players in the simulated game')
+    parser.add_argument('--rounds', type=int, default=10, help='rounds to simulate')
+    parser.add_argument('--seed', type=int, default=None, help='random seed for the simulated game')
+    parser.add_argument('--output', required=True, help='output path (.ndjson, .csv or .npz)')
+    args = parser.parse_args(argv)
+
+    fmt = args.output.rsplit('.', 1)[-1].lower()
+    if fmt not in FORMATS:
+        parser.error(f"--output must end in one of: {', '.join('.' + f for f in FORMATS)}")
+    if args.table == 'all' and fmt != 'npz':
+        parser.error("--table all is only supported for .npz output")
+
+    with open(args.output, 'wb') as out:
+        if args.url:
+            _download(args.url, args.table, fmt, out)
+        else:
+            from services.policy_sweep import build_game, simulate
+            game_state = build_game({}, args.players, seed=args.seed)
+            simulate(game_state, args.rounds)
+            for chunk in export(game_state, args.table, fmt):
+                out.write(chunk.encode('utf-8') if isinstance(chunk, str) else chunk)
+
+    print(f"Wrote {args.output}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
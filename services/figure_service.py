@@ -0,0 +1,147 @@
+"""
+Cached rendering of the model figures (loan market and AD/AS).
+
+Each chart kind keeps one matplotlib Figure and Axes alive and redraws into
+them, so requests pay neither pyplot startup nor figure construction. Rendered
+PNG/SVG bytes are cached by a hash of (kind, format, parameters) with LRU
+eviction. matplotlib is imported lazily on the first render; if it is not
+installed, render() raises FigureUnavailable.
+"""
+import hashlib
+import io
+import json
+import threading
+from collections import OrderedDict
+
+from services.plots import plot_ad_as, plot_loan_market
+from services.steady_state import DEFAULT_PARAMS, validate_params
+
+FIGURE_KINDS = {
+    'loan_market': (6.8, 4.5),
+    'ad_as': (6.0, 4.0)
+}
+
+MIME_TYPES = {
+    'png': 'image/png',
+    'svg': 'image/svg+xml'
+}
+
+
+class FigureUnavailable(RuntimeError):
+    """Raised when matplotlib is not installed."""
+
+
+class FigureService:
+    """Renders model figures into reused axes and caches the encoded bytes."""
+
+    def __init__(self, max_entries=64, dpi=100):
+        self.max_entries = max_entries
+        self.dpi = dpi
+        self._cache = OrderedDict()
+        self._figures = {}
+        # matplotlib is not thread safe, and the figures themselves are shared
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def cache_key(kind, fmt, params, shocked_params=None):
+        payload = json.dumps([kind, fmt, params, shocked_params], sort_keys=True, default=float)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def render(self, kind, fmt, params, shocked_params=None):
+        """
+        Return (key, bytes) for a chart, rendering it only on a cache miss.
+
+        Args:
+            kind: one of FIGURE_KINDS
+            fmt: 'png' or 'svg'
+            params: steady-state parameters (see services.steady_state)
+            shocked_params: optional second scenario for the loan market chart
+        """
+        if kind not in FIGURE_KINDS:
+            raise ValueError(f"Unknown figure kind: {kind}")
+        if fmt not in MIME_TYPES:
+            raise ValueError(f"Unsupported figure format: {fmt}")
+
+        key = self.cache_key(kind, fmt, params, shocked_params)
+        with self._lock:
+            data = self._cache.get(key)
+            if data is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return key, data
+
+            self.misses += 1
+            data = self._draw(kind, fmt, params, shocked_params)
+            self._cache[key] = data
+            if len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+            return key, data
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def _axes(self, kind):
+        """Return the reusable Axes for a chart kind, creating its Figure once."""
+        if kind not in self._figures:
+            try:
+                from matplotlib.backends.backend_agg import FigureCanvasAgg
+                from matplotlib.figure import Figure
+            except ImportError as e:
+                raise FigureUnavailable('matplotlib is required to render figures') from e
+
+            fig = Figure(figsize=FIGURE_KINDS[kind], dpi=self.dpi)
+            FigureCanvasAgg(fig)
+            self._figures[kind] = fig.add_subplot()
+        ax = self._figures[kind]
+        ax.clear()
+        return ax
+
+    def _draw(self, kind, fmt, params, shocked_params):
+        ax = self._axes(kind)
+        if kind == 'loan_market':
+            plot_loan_market(ax, params, shocked_params)
+        else:
+            plot_ad_as(ax, params)
+
+        fig = ax.figure
+        fig.tight_layout()
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format=fmt)
+        return buffer.getvalue()
+
+
+def parse_params(args, base, prefix='', cohort=1):
+    """
+    Overlay numeric query arguments named like steady-state parameters onto
+    ``base``. Returns None when ``prefix`` is given and no argument uses it.
+
+    A government_debt argument is a total over ``cohort`` agents, as in the
+    game (see steady_state.params_from_game).
+
+    Raises:
+        ValueError: a value is not a number, or the result is outside the
+            model's domain (see steady_state.validate_params)
+    """
+    params = dict(base)
+    found = False
+    for name in DEFAULT_PARAMS:
+        value = args.get(prefix + name)
+        if value is not None:
+            if isinstance(value, bool):
+                raise ValueError(f"{name} must be a number")
+            try:
+                params[name] = float(value)
+            except (TypeError, ValueError):
+                raise ValueError(f"{name} must be a number") from None
+            found = True
+    if prefix + 'government_debt' in args:
+        params['government_debt'] /= cohort
+    if prefix and not found:
+        return None
+    return validate_params(params)
+
+
+figure_service = FigureService()
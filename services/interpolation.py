@@ -0,0 +1,78 @@
+"""
+Piecewise-linear interpolation of demand curves.
+
+Curves are given by their values at sorted rates and are held constant beyond
+the first and last rate. Stored demand curves share one rate grid, so many
+players' curves can be evaluated at many rates with a single gather: the
+bracketing grid indices and weights are computed once for the query rates and
+applied to every curve (row) at the same time.
+
+numpy is imported by each function rather than the module, so importing the
+models (and the app) doesn't load it before the first curve is evaluated.
+"""
+
+
+def _weights(xs, at):
+    """Bracketing indices and weights of ``at`` in sorted ``xs`` (clamped to the ends)."""
+    import numpy as np
+
+    xs = np.asarray(xs, dtype=float)
+    at = np.asarray(at, dtype=float)
+    upper = np.searchsorted(xs, at, side='right')
+    lo = np.clip(upper - 1, 0, len(xs) - 1)
+    hi = np.clip(upper, 0, len(xs) - 1)
+    span = xs[hi] - xs[lo]
+    weight = np.divide(at - xs[lo], span, out=np.zeros(np.shape(at)), where=span > 0)
+    return lo, hi, weight
+
+
+def interpolate(xs, ys, at):
+    """
+    Evaluate curves sampled at ``xs`` at the rates ``at``.
+
+    Args:
+        xs: sorted rates the curves are sampled at
+        ys: values at ``xs``; 1-D for one curve, 2-D for one curve per row
+        at: a rate or array of rates
+
+    Returns:
+        ``ys`` interpolated at ``at``: shape ``np.shape(at)`` for one curve,
+        ``(rows,) + np.shape(at)`` for several
+    """
+    import numpy as np
+
+    ys = np.asarray(ys, dtype=float)
+    if ys.ndim == 1:
+        return np.interp(at, xs, ys)
+    lo, hi, weight = _weights(xs, at)
+    return ys[:, lo] + (ys[:, hi] - ys[:, lo]) * weight
+
+
+def evaluate_curves(curves, at):
+    """
+    Evaluate DemandCurves at the rates ``at``.
+
+    Returns:
+        array of shape (len(curves), len(at)), one row per curve, in order
+    """
+    import numpy as np
+
+    at = np.atleast_1d(np.asarray(at, dtype=float))
+    result = np.empty((len(curves), len(at)))
+    # Curves stored under different grids (after a reconfiguration) are batched separately
+    groups = {}
+    for index, curve in enumerate(curves):
+        groups.setdefault(id(curve.rates), (curve.rates, []))[1].append(index)
+    for rates, indices in groups.values():
+        amounts = np.array([curves[i].amounts for i in indices])
+        result[indices] = interpolate(rates, amounts, at)
+    return result
+
+
+def aggregate_curves(curves, at):
+    """Sum of the DemandCurves ``curves`` at each of the rates ``at``."""
+    import numpy as np
+
+    if not curves:
+        return np.zeros(len(np.atleast_1d(at)))
+    return evaluate_curves(curves, at).sum(axis=0)
@@ -0,0 +1,223 @@
+"""
+In-process metrics with Prometheus text exposition.
+
+Counters, gauges and fixed-bucket histograms are plain Python objects guarded
+by a lock per metric; an observation is one bisect plus a few additions, so
+they are cheap enough to leave on in production. ``REGISTRY.render()``
+produces the text served at /metrics.
+
+The game's own metrics are defined at the bottom of this module so models,
+services and routes all record into the same registry.
+"""
+import functools
+import threading
+import time
+from bisect import bisect_left
+
+# Request/computation latencies in seconds
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+COUNT_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+
+def _format_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric:
+    kind = 'untyped'
+
+    def __init__(self, name, documentation, labels=(), registry=None):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        if not self.label_names:
+            # Unlabelled metrics are exported (as zero) before their first update
+            self._values[()] = self._zero()
+        (REGISTRY if registry is None else registry).register(self)
+
+    def _zero(self):
+        return 0
+
+    def _key(self, labels):
+        if not labels and not self.label_names:
+            return ()
+        if len(labels) != len(self.label_names):
+            raise ValueError(f"{self.name} expects labels {self.label_names}, got {tuple(labels)}")
+        return tuple(map(labels.__getitem__, self.label_names))
+
+    def samples(self):
+        """Yield (suffix, label values, extra labels, value) for exposition."""
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield '', key, (), value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for suffix, key, extra, value in self.samples():
+            lines.append(f"{self.name}{suffix}{_format_labels(self.label_names, key, extra)} {_format_value(value)}")
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    """A monotonically increasing count."""
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(Metric):
+    """A value that can go up and down, or be read from ``func`` at scrape time."""
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, labels=(), registry=None, func=None):
+        super().__init__(name, documentation, labels, registry)
+        self.func = func
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def samples(self):
+        if self.func is not None:
+            yield '', (), (), self.func()
+            return
+        yield from super().samples()
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __call__(self, func):
+        histogram, labels = self.histogram, self.labels
+
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                histogram.observe(time.perf_counter() - start, **labels)
+        return timed
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class Histogram(Metric):
+    """Counts observations into fixed buckets, plus their sum and count."""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), registry=None, buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labels, registry)
+
+    def _zero(self):
+        # Per-bucket counts (last slot is +Inf), sum, count
+        return [[0] * (len(self.buckets) + 1), 0.0, 0]
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            try:
+                state = self._values[key]
+            except KeyError:
+                state = self._values[key] = self._zero()
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def time(self, **labels):
+        """Context manager / decorator observing the elapsed wall time in seconds."""
+        return _Timer(self, labels)
+
+    def samples(self):
+        with self._lock:
+            items = [(key, (list(counts), total, count)) for key, (counts, total, count) in self._values.items()]
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                yield '_bucket', key, (('le', _format_value(bound)),), cumulative
+            yield '_sum', key, (), total
+            yield '_count', key, (), count
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        return '\n'.join(metric.render() for metric in self._metrics) + '\n'
+
+
+REGISTRY = Registry()
+
+# Game metrics
+DECISIONS = Counter('olg_decisions_total', 'Decisions submitted, by type and outcome',
+                    labels=('decision_type', 'outcome'))
+DECISION_SECONDS = Histogram('olg_record_decision_seconds', 'Time spent in GameState.record_decision')
+EQUILIBRIUM_SECONDS = Histogram('olg_equilibrium_seconds', 'Time spent solving the loan market equilibrium')
+EQUILIBRIUM_ITERATIONS = Histogram('olg_equilibrium_iterations', 'Bisection iterations per equilibrium solve',
+                                   buckets=(5, 10, 20, 30, 40, 50, 75, 100))
+AGGREGATES_SECONDS = Histogram('olg_compute_aggregates_seconds', 'Time spent in GameState.compute_aggregates')
+
+# Socket.IO and HTTP metrics
+EMIT_PAYLOAD_BYTES = Histogram('olg_socketio_emit_payload_bytes', 'JSON payload size of Socket.IO emits',
+                               labels=('event',), buckets=SIZE_BUCKETS)
+EMIT_BYTES = Counter('olg_socketio_emit_bytes_total', 'Bytes sent to clients by Socket.IO emits, by wire encoding',
+                     labels=('event', 'encoding'))
+EMIT_RECIPIENTS = Histogram('olg_socketio_emit_recipients', 'Clients each Socket.IO emit is delivered to',
+                            labels=('event',), buckets=COUNT_BUCKETS)
+EMIT_SECONDS = Histogram('olg_socketio_emit_seconds', 'Time spent fanning out a Socket.IO emit',
+                         labels=('event',))
+CONNECTED_CLIENTS = Gauge('olg_socketio_connected_clients', 'Currently connected Socket.IO clients')
+REQUEST_SECONDS = Histogram('olg_http_request_seconds', 'HTTP request latency by route',
+                            labels=('method', 'route', 'status'))
+ADMISSION_QUEUE_DEPTH = Gauge('olg_admission_queue_depth', 'Requests waiting for an admission slot')
+ADMISSION_IN_FLIGHT = Gauge('olg_admission_in_flight', 'Admission-controlled requests being served')
+ADMISSION_REJECTED = Counter('olg_admission_rejected_total', 'Requests turned away with 429, by route and reason',
+                             labels=('route', 'reason'))
+COMPRESSION_SECONDS = Histogram('olg_http_compression_seconds', 'Time spent compressing HTTP responses',
+                                labels=('encoding',))
+COMPRESSION_SAVED_BYTES = Counter('olg_http_compression_saved_bytes_total',
+                                  'Bytes saved by compressing HTTP responses', labels=('encoding',))
+COMPRESSION_CACHE = Counter('olg_http_compression_cache_total', 'Compressed response cache lookups',
+                            labels=('result',))
@@ -0,0 +1,75 @@
+"""
+Drawing the steady-state model figures onto a matplotlib Axes.
+
+Used by the figure service for the HTTP endpoints and by the figure.py and
+figure2.py scripts. Nothing here imports matplotlib: callers bring the Axes.
+"""
+import numpy as np
+
+from services.steady_state import (aggregate_demand, aggregate_supply, ad_as_steady_states,
+                                   loan_market_equilibrium, loan_market_schedules)
+
+
+def plot_loan_market(ax, params, shocked_params=None, rates=None):
+    """
+    Draw the steady-state loan market on ``ax``.
+
+    Loan demand (blue) and supply (red) are computed from the model for
+    ``params``; if ``shocked_params`` is given its schedules are drawn dotted
+    so the shift in the equilibrium is visible.
+    """
+    rates = np.linspace(-0.5, 0.6, 221) if rates is None else rates
+    scenarios = [(params, '-', 'Before')]
+    if shocked_params is not None:
+        scenarios.append((shocked_params, ':', 'After'))
+
+    for scenario, linestyle, label in scenarios:
+        schedules = loan_market_schedules(scenario, rates)
+        gross = 1 + schedules['rates']
+        ax.plot(schedules['demand'], gross, color='blue', linestyle=linestyle, linewidth=2,
+                label=f'Loan demand ({label.lower()})')
+        ax.plot(schedules['supply'], gross, color='red', linestyle=linestyle, linewidth=2,
+                label=f'Loan supply ({label.lower()})')
+
+        equilibrium = loan_market_equilibrium(scenario)
+        ax.plot(equilibrium['loans'], equilibrium['gross_rate'], 'ko', markersize=5)
+        ax.annotate(f"{label}: r = {float(equilibrium['rate']):.1%}",
+                    xy=(equilibrium['loans'], equilibrium['gross_rate']),
+                    xytext=(8, 8), textcoords='offset points', fontsize=9)
+
+    ax.axhline(y=1.00, color='grey', linestyle='--', linewidth=1)
+    ax.set_xlabel('Loans')
+    ax.set_ylabel('Gross real interest rate')
+    ax.spines['top'].set_visible(False)
+    ax.spines['right'].set_visible(False)
+    ax.legend(fontsize=8, loc='upper right')
+
+
+def plot_ad_as(ax, params, inflation=None):
+    """
+    Draw the steady-state AD/AS diagram for ``params`` on ``ax``.
+
+    - Aggregate supply (dotted red): vertical at full employment above the
+      inflation target, sloping down with rigid wages below it
+    - Aggregate demand (solid navy): kinked where the zero lower bound binds
+    - Every AD/AS intersection is marked, and deflationary ones are labelled
+    """
+    target = params['inflation_target']
+    inflation = np.linspace(0.6 * target, 1.3 * target, 701) if inflation is None else inflation
+
+    ax.plot(aggregate_supply(inflation, params), inflation, color='red', linestyle=':',
+            linewidth=2, label='Aggregate supply')
+    ax.plot(aggregate_demand(inflation, params), inflation, color='navy', linestyle='-',
+            linewidth=2, label='Aggregate demand')
+    ax.axhline(y=target, color='black', linestyle='-', linewidth=1)
+
+    for state in ad_as_steady_states(params):
+        ax.plot(state['output'], state['inflation'], 'ko', markersize=5)
+        if state['inflation'] < target:
+            ax.annotate("Deflation\nsteady state", xy=(state['output'], state['inflation']),
+                        xytext=(-70, -35), textcoords='offset points', fontsize=10,
+                        arrowprops=dict(arrowstyle="->", linewidth=1))
+
+    ax.set_xlabel("Output", fontsize=12)
+    ax.set_ylabel("Gross inflation rate", fontsize=12)
+    ax.legend(fontsize=9, loc='upper left')
@@ -0,0 +1,207 @@
+"""
+Policy parameter sweeps for the OLG game.
+
+Evaluates a grid of policy combinations (anything ``GameState.set_policy``
+accepts) in a process pool. Each grid point builds a fresh game populated with
+test players, solves the loan market equilibrium and optionally simulates a
+number of rounds. Rows are streamed back in grid order so they can be written
+to CSV as they arrive or collected into a compact NumPy table.
+
+Example:
+    python -m services.policy_sweep --borrowing-limit 20:100:5 \\
+        --government-debt 0,10,20 --rounds 3 --output sweep.csv
+"""
+import argparse
+import csv
+import itertools
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from models.game_state import GameState
+from services import test_player_service
+
+# Policy parameters that can be swept, in the order they appear in result rows
+POLICY_PARAMETERS = [
+    'borrowing_limit', 'government_debt',
+    'tax_rate_young', 'tax_rate_middle', 'tax_rate_old',
+    'income_young', 'income_middle', 'income_old'
+]
+
+RESULT_COLUMNS = POLICY_PARAMETERS + [
+    'seed', 'equilibrium_rate', 'loan_demand', 'loan_supply',
+    'rounds', 'final_rate', 'mean_rate'
+]
+
+
+def build_grid(**axes):
+    """
+    Build the cartesian product of policy values.
+
+    Args:
+        **axes: policy parameter name -> iterable of values
+
+    Returns:
+        list of dicts, one per policy combination
+    """
+    unknown = set(axes) - set(POLICY_PARAMETERS)
+    if unknown:
+        raise ValueError(f"Unknown policy parameters: {', '.join(sorted(unknown))}")
+
+    names = list(axes)
+    return [dict(zip(names, values)) for values in itertools.product(*(axes[n] for n in names))]
+
+
+def build_game(policy, num_test_players=30, optimal_decisions=False, seed=None):
+    """
+    Create a game with the given policy and a population of test players, and
+    solve its loan market equilibrium once they have decided.
+    """
+    if seed is not None:
+        random.seed(seed)
+
+    game_state = GameState()
+    game_state.set_policy(**policy, solve=False)
+    game_state.set_optimal_decisions(optimal_decisions)
+    test_player_service.add_test_players(game_state, num_test_players, optimal_decisions)
+    game_state._calculate_equilibrium()
+    return game_state
+
+
+def simulate(game_state, rounds):
+    """Run a number of rounds and return the interest rate of each one."""
+    rates = []
+    for _ in range(rounds):
+        if not game_state.run_round():
+            break
+        rates.append(game_state.interest_rate)
+    return rates
+
+
+def evaluate_policy(task):
+    """
+    Evaluate a single grid point. Runs inside a worker process.
+
+    Args:
+        task: tuple of (policy dict, num_test_players, rounds, optimal_decisions, seed)
+
+    Returns:
+        dict with one value per column in RESULT_COLUMNS
+    """
+    policy, num_test_players, rounds, optimal_decisions, seed = task
+    game_state = build_game(policy, num_test_players, optimal_decisions, seed)
+
+    equilibrium_rate = game_state.interest_rate
+    aggregates = game_state.compute_aggregates()
+    rates = simulate(game_state, rounds)
+
+    row = {name: getattr(game_state, name) for name in POLICY_PARAMETERS}
+    row.update({
+        'seed': -1 if seed is None else seed,
+        'equilibrium_rate': equilibrium_rate,
+        'loan_demand': aggregates['loan_demand'],
+        'loan_supply': aggregates['loan_supply'],
+        'rounds': len(rates),
+        'final_rate': rates[-1] if rates else equilibrium_rate,
+        'mean_rate': sum(rates) / len(rates) if rates else equilibrium_rate
+    })
+    return row
+
+
+def run_sweep(grid, num_test_players=30, rounds=0, optimal_decisions=False,
+              seed=None, workers=None, chunksize=None):
+    """
+    Evaluate every policy in ``grid`` across a process pool.
+
+    Args:
+        grid: list of policy dicts (see build_grid)
+        num_test_players: size of the simulated class for each grid point
+        rounds: number of rounds to simulate after the initial equilibrium
+        optimal_decisions: whether test players make optimal decisions
+        seed: base seed; grid point i uses ``seed + i`` for reproducibility
+        workers: number of worker processes (defaults to all cores)
+        chunksize: grid points sent to a worker at a time
+
+    Yields:
+        result rows in grid order, as soon as each one is available
+    """
+    tasks = [
+        (policy, num_test_players, rounds, optimal_decisions, None if seed is None else seed + i)
+        for i, policy in enumerate(grid)
+    ]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tasks) <= 1:
+        yield from map(evaluate_policy, tasks)
+        return
+
+    chunksize = chunksize or max(1, len(tasks) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(evaluate_policy, tasks, chunksize=chunksize)
+
+
+def write_csv(rows, stream):
+    """Write result rows to a CSV stream as they arrive. Returns the row count."""
+    writer = csv.DictWriter(stream, fieldnames=RESULT_COLUMNS)
+    writer.writeheader()
+    count = 0
+    for row in rows:
+        writer.writerow(row)
+        count += 1
+    return count
+
+
+def to_array(rows):
+    """Collect result rows into a NumPy structured array."""
+    import numpy as np
+
+    dtype = [(name, np.int64 if name in ('seed', 'rounds') else np.float64) for name in RESULT_COLUMNS]
+    return np.array([tuple(row[name] for name in RESULT_COLUMNS) for row in rows], dtype=dtype)
+
+
+def _parse_values(text):
+    """Parse either a comma separated list ('0,10,20') or a range 'start:stop:count'."""
+    if ':' in text:
+        start, stop, count = text.split(':')
+        start, stop, count = float(start), float(stop), int(count)
+        if count == 1:
+            return [start]
+        step = (stop - start) / (count - 1)
+        return [start + i * step for i in range(count)]
+    return [float(value) for value in text.split(',')]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Sweep OLG game policies across a process pool.')
+    for name in POLICY_PARAMETERS:
+        parser.add_argument('--' + name.replace('_', '-'), type=_parse_values, dest=name,
+                            help="comma separated values or start:stop:count")
+    parser.add_argument('--players', type=int, default=30, help='test players per grid point')
+    parser.add_argument('--rounds', type=int, default=0, help='rounds to simulate per grid point')
+    parser.add_argument('--optimal', action='store_true', help='test players make optimal decisions')
+    parser.add_argument('--seed', type=int, default=None, help='base random seed')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: all cores)')
+    parser.add_argument('--output', help='output path (.csv or .npy; default: CSV on stdout)')
+    args = parser.parse_args(argv)
+
+    axes = {name: getattr(args, name) for name in POLICY_PARAMETERS if getattr(args, name) is not None}
+    grid = build_grid(**axes) if axes else [{}]
+    rows = run_sweep(grid, num_test_players=args.players, rounds=args.rounds,
+                     optimal_decisions=args.optimal, seed=args.seed, workers=args.workers)
+
+    if args.output is None:
+        count = write_csv(rows, sys.stdout)
+    elif args.output.endswith('.npy'):
+        import numpy as np
+        table = to_array(rows)
+        np.save(args.output, table)
+        count = len(table)
+    else:
+        with open(args.output, 'w', newline='') as f:
+            count = write_csv(rows, f)
+
+    print(f"Evaluated {count} policy combinations", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
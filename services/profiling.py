@@ -0,0 +1,268 @@
+"""
+On-demand profiling of a live game.
+
+The professor arms the profiler for one target -- the next N HTTP requests,
+the next ``advance_round`` or the next ``calculate_equilibrium`` -- with
+either cProfile or a sampling profiler. When the target has run the required
+number of times the session finishes and its result is kept for download:
+
+- cProfile: a marshalled pstats file (``python -m pstats``, snakeviz) or a
+  text summary. cProfile only sees the thread it was enabled in.
+- sampling: stack samples of the profiled threads (and any threads they
+  start, such as the background equilibrium solve) in the collapsed-stack
+  format read by flamegraph.pl and speedscope.
+
+While nothing is armed every hook is a single attribute check.
+"""
+import cProfile
+import io
+import itertools
+import marshal
+import pstats
+import sys
+import threading
+import time
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from functools import wraps
+
+TARGETS = ('requests', 'advance_round', 'calculate_equilibrium')
+MODES = ('cprofile', 'sampling')
+
+# Download formats per mode: format -> (mime type, file extension)
+FORMATS = {
+    'cprofile': {'pstats': ('application/octet-stream', 'prof'), 'txt': ('text/plain', 'txt')},
+    'sampling': {'collapsed': ('text/plain', 'txt')}
+}
+
+
+class _Sampler(threading.Thread):
+    """Periodically records the stacks of selected threads."""
+
+    def __init__(self, interval):
+        super().__init__(name='profiling-sampler', daemon=True)
+        self.interval = interval
+        self.counts = Counter()
+        self.samples = 0
+        self._threads = set()
+        self._known = {t.ident for t in threading.enumerate()}
+        self._stop_event = threading.Event()
+
+    def watch(self, ident):
+        self._threads.add(ident)
+
+    def unwatch(self, ident):
+        self._threads.discard(ident)
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frames = sys._current_frames()
+            # Threads started since the session began (e.g. background solves) are included
+            idents = self._threads | (frames.keys() - self._known)
+            idents.discard(self.ident)
+            for ident in idents:
+                frame = frames.get(ident)
+                if frame is not None:
+                    self.counts[self._collapse(frame)] += 1
+            self.samples += 1
+
+    @staticmethod
+    def _collapse(frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+            frame = frame.f_back
+        return ';'.join(reversed(stack))
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+class ProfileSession:
+    """One armed profiling request."""
+
+    def __init__(self, session_id, target, mode, count, interval):
+        self.id = session_id
+        self.target = target
+        self.mode = mode
+        self.remaining = count
+        self.count = count
+        self.interval = interval
+        self.started = None
+        self.profiles = []
+        self.sampler = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def record(self):
+        with self._lock:
+            if self.started is None:
+                self.started = time.time()
+                if self.mode == 'sampling':
+                    self.sampler = _Sampler(self.interval)
+                    self.sampler.start()
+
+        if self.mode == 'sampling':
+            ident = threading.get_ident()
+            self.sampler.watch(ident)
+            try:
+                yield
+            finally:
+                self.sampler.unwatch(ident)
+            return
+
+        profile = cProfile.Profile()
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            with self._lock:
+                self.profiles.append(profile)
+
+    def finish(self):
+        """Stop collecting and return the stored result."""
+        duration = time.time() - self.started if self.started else 0.0
+        result = {
+            'id': self.id,
+            'target': self.target,
+            'mode': self.mode,
+            'count': self.count - max(self.remaining, 0),
+            'started': self.started,
+            'duration': duration
+        }
+        if self.mode == 'sampling':
+            if self.sampler is not None:
+                self.sampler.stop()
+                counts, result['samples'] = self.sampler.counts, self.sampler.samples
+            else:
+                counts, result['samples'] = Counter(), 0
+            result['data'] = ''.join(f"{stack} {n}\n" for stack, n in counts.most_common()).encode('utf-8')
+        else:
+            stats = pstats.Stats(*self.profiles) if self.profiles else None
+            # The marshalled stats dict is the on-disk format pstats.Stats(filename) reads
+            result['data'] = marshal.dumps(stats.stats) if stats else b''
+        return result
+
+
+class _StoredStats:
+    """Lets pstats.Stats load an already collected stats dict."""
+
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+class Profiler:
+    """Arms profiling sessions, runs them from the hooks and keeps their results."""
+
+    def __init__(self, max_results=10):
+        self.armed = None
+        self.results = OrderedDict()
+        self.max_results = max_results
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def arm(self, target, mode='cprofile', count=1, interval=0.005):
+        """
+        Profile the next ``count`` runs of ``target``, replacing any armed session.
+
+        Returns:
+            the session id its result will be stored under
+        """
+        if target not in TARGETS:
+            raise ValueError(f"Unknown profiling target: {target}")
+        if mode not in MODES:
+            raise ValueError(f"Unknown profiling mode: {mode}")
+        if count < 1:
+            raise ValueError("count must be at least 1")
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+
+        with self._lock:
+            self._finish(self.armed)
+            self.armed = ProfileSession(next(self._ids), target, mode, int(count), interval)
+            return self.armed.id
+
+    def disarm(self):
+        """Stop the armed session early, keeping whatever it collected."""
+        with self._lock:
+            session, self.armed = self.armed, None
+            self._finish(session)
+
+    def _finish(self, session):
+        if session is None or session.started is None:
+            return
+        result = session.finish()
+        self.results[result['id']] = result
+        while len(self.results) > self.max_results:
+            self.results.popitem(last=False)
+
+    @contextmanager
+    def capture(self, target):
+        """Profile the enclosed block if a session is armed for ``target``."""
+        session = self.armed
+        if session is None or session.target != target:
+            yield
+            return
+
+        try:
+            with session.record():
+                yield
+        finally:
+            with self._lock:
+                session.remaining -= 1
+                if session.remaining == 0 and self.armed is session:
+                    self.armed = None
+                    self._finish(session)
+
+    def wrap(self, target):
+        """Decorator form of capture()."""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if self.armed is None:
+                    return func(*args, **kwargs)
+                with self.capture(target):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def status(self):
+        session = self.armed
+        return {
+            'armed': None if session is None else {
+                'id': session.id, 'target': session.target, 'mode': session.mode,
+                'remaining': session.remaining, 'started': session.started
+            },
+            'results': [{k: v for k, v in result.items() if k != 'data'} for result in self.results.values()]
+        }
+
+    def export(self, result_id, fmt):
+        """
+        Return (bytes, mime type, filename) for a stored result.
+
+        Raises:
+            KeyError: no such result
+            ValueError: format not available for the result's mode
+        """
+        result = self.results[result_id]
+        formats = FORMATS[result['mode']]
+        if fmt not in formats:
+            raise ValueError(f"{result['mode']} results can be downloaded as: {', '.join(formats)}")
+        mimetype, extension = formats[fmt]
+        filename = f"profile-{result_id}-{result['target']}.{extension}"
+        if fmt != 'txt':
+            return result['data'], mimetype, filename
+
+        stream = io.StringIO()
+        stored = _StoredStats(marshal.loads(result['data']) if result['data'] else {})
+        pstats.Stats(stored, stream=stream).sort_stats('cumulative').print_stats(50)
+        return stream.getvalue().encode('utf-8'), mimetype, filename
+
+
+profiler = Profiler()
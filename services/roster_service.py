@@ -0,0 +1,85 @@
+"""
+Roster import: turn an uploaded class list into players.
+
+A roster is CSV with a header row, or JSON (a list of objects, or
+``{"players": [...]}``). Each entry has a ``user_id`` and optionally a
+``name`` (or ``display_name``), ``avatar`` and ``stage`` (Y/M/O or
+young/middle/old). All values are strings; JSON numbers are rejected rather
+than converted. Players without a stage are spread evenly across the three
+generations and players without an avatar cycle through the login page's
+avatars, so a class list with only ids and names starts a balanced game.
+"""
+import csv
+import io
+import json
+
+# The avatars offered on the login page
+AVATARS = ('fox', 'tiger', 'eagle', 'owl', 'panda')
+STAGES = ('Y', 'M', 'O')
+STAGE_NAMES = {'young': 'Y', 'middle': 'M', 'middle-aged': 'M', 'old': 'O'}
+
+
+def parse_roster(text, fmt):
+    """
+    Parse roster text into player entries.
+
+    Args:
+        text: the uploaded file contents
+        fmt: 'csv' or 'json'
+
+    Returns:
+        list of {'user_id', 'name', 'avatar', 'stage'} dicts
+
+    Raises:
+        ValueError: malformed file or entries (the message names the row)
+    """
+    if fmt == 'csv':
+        rows = list(csv.DictReader(io.StringIO(text)))
+    elif fmt == 'json':
+        try:
+            rows = json.loads(text)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON: {e}") from None
+        if isinstance(rows, dict):
+            rows = rows.get('players')
+        if not isinstance(rows, list):
+            raise ValueError("Expected a list of players")
+    else:
+        raise ValueError(f"Unsupported roster format: {fmt}")
+
+    return [_entry(row, index) for index, row in enumerate(rows)]
+
+
+def _entry(row, index):
+    if not isinstance(row, dict):
+        raise ValueError(f"Row {index + 1}: expected an object")
+    row = {str(key).strip().lower(): value for key, value in row.items() if key is not None and value is not None}
+    for key, value in row.items():
+        # Ids are compared as strings, so a JSON 7 must be sent as "7" rather than quietly converted
+        if not isinstance(value, str):
+            raise ValueError(f"Row {index + 1}: {key} must be a string")
+        row[key] = value.strip()
+
+    user_id = row.get('user_id') or row.get('id')
+    if not user_id:
+        raise ValueError(f"Row {index + 1}: missing user_id")
+
+    stage = row.get('stage', '')
+    stage = STAGE_NAMES.get(stage.lower(), stage.upper()) or STAGES[index % len(STAGES)]
+    if stage not in STAGES:
+        raise ValueError(f"Row {index + 1}: unknown stage {row['stage']!r}")
+
+    return {
+        'user_id': user_id,
+        'name': row.get('name') or row.get('display_name') or None,
+        'avatar': row.get('avatar') or AVATARS[index % len(AVATARS)],
+        'stage': stage
+    }
+
+
+def roster_format(filename, content_type):
+    """Guess 'csv' or 'json' from an upload's file name or content type."""
+    name = (filename or '').lower()
+    if name.endswith('.json') or 'json' in (content_type or ''):
+        return 'json'
+    return 'csv'
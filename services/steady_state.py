@@ -0,0 +1,300 @@
+"""
+Steady-state analytics for the three-period OLG model behind the game.
+
+Computes loan supply and demand schedules, the market-clearing real rate and
+the Eggertsson-Mehrotra style AD/AS curves directly from game parameters
+(the same names GameState uses: borrowing_limit, government_debt, incomes and
+per-stage taxes). Every function works elementwise on NumPy arrays, so whole
+rate or output grids -- and whole grids of parameters -- are solved at once.
+
+Conventions match GameState: rates are net (0.03 == 3%), taxes are lump-sum
+amounts subtracted from the stage income, young borrowing is capped at
+borrowing_limit / (1 + r) and only positive middle-aged saving supplies loans.
+"""
+import numpy as np
+
+from services.equilibrium_executor import RATE_BOUNDS
+
+DEFAULT_PARAMS = {
+    'borrowing_limit': 100.0,
+    'government_debt': 0.0,     # per young agent (GameState holds the total)
+    'income_young': 0.0,
+    'income_middle': 60.0,
+    'income_old': 0.0,
+    'tax_rate_young': 0.0,
+    'tax_rate_middle': 0.0,
+    'tax_rate_old': 0.0,
+    'beta': 1.0,                # discount factor; the game scores utility undiscounted
+    'population_growth': 0.0,   # young cohort is (1 + g) times the middle-aged cohort
+    'inflation_target': 1.0,    # gross inflation target of the central bank
+    'taylor_coefficient': 2.0,  # response of the policy rate to inflation
+    'wage_rigidity': 0.3,       # share of last period's nominal wage that is sticky
+    'labor_share': 0.7
+}
+
+
+
+def make_params(**overrides):
+    """Return a full parameter dict, starting from DEFAULT_PARAMS."""
+    unknown = set(overrides) - set(DEFAULT_PARAMS)
+    if unknown:
+        raise ValueError(f"Unknown steady-state parameters: {', '.join(sorted(unknown))}")
+    params = dict(DEFAULT_PARAMS)
+    params.update(overrides)
+    return params
+
+
+def validate_params(params):
+    """
+    Check that every parameter is finite and inside the model's domain.
+
+    Raises:
+        ValueError: naming the first offending parameter
+    """
+    for name, value in params.items():
+        if not np.all(np.isfinite(value)):
+            raise ValueError(f"{name} must be a finite number")
+    checks = [
+        ('beta', lambda v: v > 0, 'must be positive'),
+        ('borrowing_limit', lambda v: v >= 0, 'must not be negative'),
+        ('income_young', lambda v: v >= 0, 'must not be negative'),
+        ('income_middle', lambda v: v >= 0, 'must not be negative'),
+        ('income_old', lambda v: v >= 0, 'must not be negative'),
+        ('population_growth', lambda v: v > -1, 'must be above -1'),
+        ('inflation_target', lambda v: v > 0, 'must be positive'),
+        ('wage_rigidity', lambda v: (v >= 0) & (v < 1), 'must be in [0, 1)'),
+        ('labor_share', lambda v: (v > 0) & (v < 1), 'must be in (0, 1)')
+    ]
+    for name, check, message in checks:
+        if name in params and not np.all(check(np.asarray(params[name]))):
+            raise ValueError(f"{name} {message}")
+    return params
+
+
+def young_cohort(game_state):
+    """Players in the game's young cohort (at least one)."""
+    return max(1, sum(1 for user in game_state.users.values() if user.age_stage == 'Y'))
+
+
+def params_from_game(game_state, **overrides):
+    """
+    Read the policy and income parameters of a GameState.
+
+    The model is per agent while GameState's government_debt is the total, so
+    the debt is spread over the young cohort (see young_cohort).
+    """
+    params = make_params(**{name: getattr(game_state, name) for name in DEFAULT_PARAMS
+                            if hasattr(game_state, name)})
+    params['government_debt'] = params['government_debt'] / young_cohort(game_state)
+    params.update(overrides)
+    return params
+
+
+def _net_incomes(params):
+    return (params['income_young'] - params['tax_rate_young'],
+            params['income_middle'] - params['tax_rate_middle'],
+            params['income_old'] - params['tax_rate_old'])
+
+
+def young_borrowing(rates, params):
+    """
+    Borrowing per young agent at each rate.
+
+    Agents with log utility consume a 1 / (1 + beta + beta^2) share of lifetime
+    wealth when young, and cannot borrow more than borrowing_limit / (1 + r).
+    """
+    rates = np.asarray(rates, dtype=float)
+    beta = params['beta']
+    y_young, y_middle, y_old = _net_incomes(params)
+    gross = 1 + rates
+    wealth = y_young + y_middle / gross + y_old / gross ** 2
+    desired = wealth / (1 + beta + beta ** 2) - y_young
+    return np.clip(desired, 0.0, params['borrowing_limit'] / gross)
+
+
+def desired_saving(debts, rates, params):
+    """
+    Saving a middle-aged agent with ``debts`` from youth wants at each rate.
+
+    The Euler equation splits what is left after repaying the debt between
+    middle and old age; negative values mean the agent wants to borrow.
+    """
+    rates = np.asarray(rates, dtype=float)
+    beta = params['beta']
+    _, y_middle, y_old = _net_incomes(params)
+    gross = 1 + rates
+    return beta / (1 + beta) * (y_middle - gross * debts) - y_old / ((1 + beta) * gross)
+
+
+def middle_saving(rates, params):
+    """Saving per middle-aged agent, after repaying the steady-state debt from youth."""
+    return np.maximum(desired_saving(young_borrowing(rates, params), rates, params), 0.0)
+
+
+def loan_demand(rates, params):
+    """Loan demand: young borrowing plus government debt."""
+    return (1 + params['population_growth']) * young_borrowing(rates, params) + params['government_debt']
+
+
+def loan_supply(rates, params):
+    """Loan supply: positive middle-aged saving."""
+    return middle_saving(rates, params)
+
+
+def excess_demand(rates, params):
+    return loan_demand(rates, params) - loan_supply(rates, params)
+
+
+def loan_market_schedules(params, rates=None):
+    """Loan demand and supply evaluated on a grid of net rates."""
+    rates = np.linspace(-0.5, 1.0, 301) if rates is None else np.asarray(rates, dtype=float)
+    return {
+        'rates': rates,
+        'demand': loan_demand(rates, params),
+        'supply': loan_supply(rates, params)
+    }
+
+
+def bisect(func, lo, hi, iterations=60):
+    """
+    Vectorized bisection. ``lo`` and ``hi`` may be arrays of brackets; all of
+    them are refined together. ``func(lo)`` and ``func(hi)`` should differ in
+    sign; where they don't, the result converges to ``hi``.
+    """
+    lo = np.array(lo, dtype=float)
+    hi = np.array(hi, dtype=float)
+    lo, hi = np.broadcast_arrays(lo, hi)
+    lo, hi = lo.copy(), hi.copy()
+    f_lo = func(lo)
+    for _ in range(iterations):
+        mid = (lo + hi) / 2
+        f_mid = func(mid)
+        same_sign = np.sign(f_mid) == np.sign(f_lo)
+        lo = np.where(same_sign, mid, lo)
+        f_lo = np.where(same_sign, f_mid, f_lo)
+        hi = np.where(same_sign, hi, mid)
+    return (lo + hi) / 2
+
+
+def equilibrium_rate(params, bounds=RATE_BOUNDS):
+    """
+    Market-clearing net rate. Parameters may be arrays (e.g. a grid of
+    borrowing limits), in which case one rate per element is returned.
+    """
+    shape = np.broadcast(*(np.asarray(v) for v in params.values())).shape
+    # Excess demand falls with the rate, so the root lies where it turns negative
+    rate = bisect(lambda r: excess_demand(r, params), np.full(shape, bounds[0]), np.full(shape, bounds[1]))
+    # Where supply exceeds demand even at the lowest rate, the rate stays there,
+    # like the game's solver (demand above supply everywhere already ends at the top)
+    return np.where(excess_demand(bounds[0], params) < 0, bounds[0], rate)
+
+
+def loan_market_equilibrium(params):
+    """Equilibrium rate, gross rate and loan volume for a parameter set."""
+    rate = equilibrium_rate(params)
+    return {
+        'rate': rate,
+        'gross_rate': 1 + rate,
+        'loans': loan_supply(rate, params)
+    }
+
+
+def natural_rate(params):
+    """Market-clearing net rate at full-employment output (income_middle)."""
+    return float(equilibrium_rate(params))
+
+
+def policy_gross_nominal(inflation, params, natural=None):
+    """
+    Gross nominal policy rate under a Taylor rule with a zero lower bound.
+
+    The rule's intercept is the full-employment natural rate, so it delivers
+    the inflation target whenever the natural rate allows it. Pass ``natural``
+    to reuse an already computed natural rate.
+    """
+    inflation = np.asarray(inflation, dtype=float)
+    target = params['inflation_target']
+    natural = natural_rate(params) if natural is None else natural
+    neutral = (1 + natural) * target
+    return np.maximum(1.0, neutral * (inflation / target) ** params['taylor_coefficient'])
+
+
+def output_at_rate(rates, params, max_output_multiple=2.0):
+    """
+    Output (middle-aged income) at which the loan market clears at each rate.
+    NaN where no output level up to ``max_output_multiple`` times
+    income_middle clears the market.
+    """
+    rates = np.asarray(rates, dtype=float)
+    low = np.full(rates.shape, params['tax_rate_middle'] + 1e-6 * params['income_middle'])
+    high = np.full(rates.shape, max_output_multiple * params['income_middle'])
+
+    def imbalance(outputs):
+        return excess_demand(rates, dict(params, income_middle=outputs))
+
+    bracketed = np.sign(imbalance(low)) != np.sign(imbalance(high))
+    return np.where(bracketed, bisect(imbalance, low, high), np.nan)
+
+
+def aggregate_demand(inflation, params, natural=None):
+    """
+    Output on the AD curve for each gross inflation rate.
+
+    The policy rule and the Fisher relation pin down the real rate
+    (1 + r = (1 + i) / inflation); output adjusts until the loan market clears
+    at that rate. Below the kink the zero lower bound binds and AD slopes up.
+    """
+    inflation = np.asarray(inflation, dtype=float)
+    real_rate = policy_gross_nominal(inflation, params, natural) / inflation - 1
+    return output_at_rate(real_rate, params)
+
+
+def aggregate_supply(inflation, params):
+    """
+    Output on the AS curve for each gross inflation rate.
+
+    With a share ``wage_rigidity`` of nominal wages downwardly rigid, output
+    falls short of full employment (income_middle) only when inflation is
+    below target; at or above target AS is vertical at full employment.
+    """
+    inflation = np.asarray(inflation, dtype=float)
+    gamma = params['wage_rigidity']
+    alpha = params['labor_share']
+    relative = np.minimum(inflation / params['inflation_target'], 1.0)
+    slack = np.clip((1 - gamma / relative) / (1 - gamma), 0.0, 1.0)
+    return params['income_middle'] * slack ** (alpha / (1 - alpha))
+
+
+def ad_as_steady_states(params, inflation_grid=None):
+    """
+    Steady states where AD meets AS.
+
+    Both curves are evaluated once on a fine inflation grid and each crossing
+    is located by linear interpolation between the bracketing grid points,
+    which avoids a nested root search per iteration.
+
+    Returns:
+        list of dicts with inflation, output and real_rate, lowest inflation first
+    """
+    if inflation_grid is None:
+        target = params['inflation_target']
+        inflation_grid = np.linspace(0.5 * target, 1.5 * target, 2001)
+    inflation_grid = np.asarray(inflation_grid, dtype=float)
+    natural = natural_rate(params)
+    gap = aggregate_demand(inflation_grid, params, natural) - aggregate_supply(inflation_grid, params)
+
+    crossings = np.nonzero(np.sign(gap[:-1]) * np.sign(gap[1:]) <= 0)[0]
+    states = []
+    for i in crossings:
+        lo, hi = inflation_grid[i], inflation_grid[i + 1]
+        weight = gap[i] / (gap[i] - gap[i + 1]) if gap[i] != gap[i + 1] else 0.0
+        pi = lo + weight * (hi - lo)
+        if states and np.isclose(pi, states[-1]):
+            continue
+        states.append(pi)
+
+    return [{
+        'inflation': float(pi),
+        'output': float(aggregate_supply(pi, params)),
+        'real_rate': float(policy_gross_nominal(pi, params, natural) / pi - 1)
+    } for pi in states]
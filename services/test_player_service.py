@@ -1,6 +1,11 @@
+import logging
 import random
 import uuid
+from models.demand_curve import DemandCurve
 from models.user import User
+from services.interpolation import evaluate_curves
+
+logger = logging.getLogger(__name__)
 
 # List of fun names for test players - moved from app.py
 TEST_PLAYER_NAMES = [
@@ -46,9 +51,8 @@ def add_test_players(game_state, count, optimal_decisions):
         user_id = f"test_M_{str(uuid.uuid4())[:8]}"
         name = f"Test {available_names[current_name_index % len(available_names)]}"
         current_name_index += 1
-        game_state.add_user(user_id, name=name, avatar="test_middle")
+        game_state.add_user(user_id, name=name, avatar="test_middle", age_stage='M')
         user = game_state.users[user_id]
-        user.age_stage = 'M'
         user.assets = -20.0 # Typical borrowing amount from youth
         players_added.append({"id": user_id, "name": name, "stage": "M", "user_obj": user})
     
@@ -57,15 +61,16 @@ def add_test_players(game_state, count, optimal_decisions):
         user_id = f"test_O_{str(uuid.uuid4())[:8]}"
         name = f"Test {available_names[current_name_index % len(available_names)]}"
         current_name_index += 1
-        game_state.add_user(user_id, name=name, avatar="test_old")
+        game_state.add_user(user_id, name=name, avatar="test_old", age_stage='O')
         user = game_state.users[user_id]
-        user.age_stage = 'O'
         user.assets = 30.0 # Typical saving amount from middle age
         players_added.append({"id": user_id, "name": name, "stage": "O", "user_obj": user})
     
     # Immediately generate decisions for all newly added test players
-    for player_data in players_added:
-        generate_decision_for_player(game_state, player_data["user_obj"], optimal_decisions)
+    if optimal_decisions:
+        record_optimal_decisions(game_state, [p["user_obj"] for p in players_added])
+    else:
+        generate_decisions(game_state, [p["user_obj"] for p in players_added])
 
     # Return list without the user object
     return [{"id": p["id"], "name": p["name"], "stage": p["stage"]} for p in players_added]
@@ -73,105 +78,95 @@ def add_test_players(game_state, count, optimal_decisions):
 
 def generate_decision_for_player(game_state, user, optimal_decisions):
     """Generates a decision (borrowing, saving, or consumption) for a single test player."""
-    
-    if user.age_stage == 'Y':
-        # Generate demand curve and record borrowing decision
-        interest_rates = [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
-        demand_curve = []
-        borrow_amount = 0
-        
-        if optimal_decisions:
-            # Optimal decision: borrow max at all rates
-            for rate in interest_rates:
-                max_borrowing = game_state.borrowing_limit / (1 + rate / 100)
-                demand_curve.append({'interestRate': rate, 'borrowingAmount': round(max_borrowing, 1)})
-            
-            # Determine borrow amount at current game interest rate
-            current_rate_percent = int(game_state.interest_rate * 100)
-            closest_rate = min(interest_rates, key=lambda x: abs(x - current_rate_percent))
-            current_rate_point = next(point for point in demand_curve if point['interestRate'] == closest_rate)
-            borrow_amount = current_rate_point['borrowingAmount']
-            
-        else:
-            # Random demand curve generation
-            max_borrowing_at_zero = game_state.borrowing_limit
-            borrowing_at_zero = max_borrowing_at_zero
-            demand_curve.append({'interestRate': 0, 'borrowingAmount': borrowing_at_zero})
-            prev_borrowing = borrowing_at_zero
-
-            for rate in interest_rates[1:]:
-                max_borrowing = game_state.borrowing_limit / (1 + rate / 100)
-                max_possible = min(prev_borrowing, max_borrowing)
-                borrowing = round(random.uniform(0, max_possible), 1)
-                demand_curve.append({'interestRate': rate, 'borrowingAmount': borrowing})
-                prev_borrowing = borrowing
-
-            # Determine borrow amount based on interpolation or closest point
-            current_rate_percent = game_state.interest_rate * 100
-            exact_match = next((p for p in demand_curve if abs(p['interestRate'] - current_rate_percent) < 0.1), None)
-            
-            if exact_match:
-                borrow_amount = exact_match['borrowingAmount']
-            else:
-                borrow_amount = _interpolate_borrowing(demand_curve, current_rate_percent, game_state.borrowing_limit)
-
-        # Store demand curve and record decision
-        user.demand_curve = demand_curve
-        game_state.record_decision(user.user_id, 'borrow', borrow_amount)
-
-    elif user.age_stage == 'M':
-        # Middle-aged decision: Save or Borrow
-        income = game_state.income_middle - game_state.tax_rate_middle
-        debt_repayment = (1 + game_state.interest_rate) * abs(user.assets) if user.assets < 0 else 0
-        disposable_income = income - debt_repayment
-        
-        if random.random() < 0.8:  # 80% chance to save
-            save_percentage = random.uniform(0.2, 0.6)
-            save_amount = max(0, disposable_income * save_percentage) # Ensure non-negative saving
-            game_state.record_decision(user.user_id, 'save', round(save_amount, 1))
-        else:  # 20% chance to borrow more
-            borrow_percentage = random.uniform(0.1, 0.3)
-            borrow_amount = max(0, disposable_income * borrow_percentage) # Ensure non-negative borrowing
+    if optimal_decisions:
+        record_optimal_decisions(game_state, [user])
+    else:
+        generate_decisions(game_state, [user])
+
+
+def generate_decisions(game_state, users):
+    """
+    Generates randomized decisions for ``users``, in order. Young players'
+    borrowing is read off all their new demand curves at once.
+    """
+    interest_rates = [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
+    young = []
+
+    for user in users:
+        try:
+            if user.age_stage == 'Y':
+                # Random demand curve generation
+                max_borrowing_at_zero = game_state.borrowing_limit
+                borrowing_at_zero = max_borrowing_at_zero
+                demand_curve = [{'interestRate': 0, 'borrowingAmount': borrowing_at_zero}]
+                prev_borrowing = borrowing_at_zero
+
+                for rate in interest_rates[1:]:
+                    max_borrowing = game_state.borrowing_limit / (1 + rate / 100)
+                    max_possible = min(prev_borrowing, max_borrowing)
+                    borrowing = round(random.uniform(0, max_possible), 1)
+                    demand_curve.append({'interestRate': rate, 'borrowingAmount': borrowing})
+                    prev_borrowing = borrowing
+
+                user.demand_curve = DemandCurve.from_points(demand_curve, validate=False)
+                young.append(user)
+
+            elif user.age_stage == 'M':
+                # Middle-aged decision: Save or Borrow
+                income = game_state.income_middle - game_state.tax_rate_middle
+                debt_repayment = (1 + game_state.interest_rate) * abs(user.assets) if user.assets < 0 else 0
+                disposable_income = income - debt_repayment
+
+                if random.random() < 0.8:  # 80% chance to save
+                    save_percentage = random.uniform(0.2, 0.6)
+                    save_amount = max(0, disposable_income * save_percentage) # Ensure non-negative saving
+                    game_state.record_decision(user.user_id, 'save', round(save_amount, 1))
+                else:  # 20% chance to borrow more
+                    borrow_percentage = random.uniform(0.1, 0.3)
+                    borrow_amount = max(0, disposable_income * borrow_percentage) # Ensure non-negative borrowing
+                    game_state.record_decision(user.user_id, 'borrow', round(borrow_amount, 1))
+
+            elif user.age_stage == 'O':
+                # Old players automatically consume
+                game_state.record_decision(user.user_id, 'consume', 0)
+        except Exception as e:
+            logger.exception("Error generating decision for test player %s: %s", user.user_id, e)
+
+    if young:
+        # Use the closest curve point, or interpolate between points when none is close
+        current_rate_percent = game_state.interest_rate * 100
+        rate = next((point for point in interest_rates if abs(point - current_rate_percent) < 0.1),
+                    current_rate_percent)
+        amounts = evaluate_curves([user.demand_curve for user in young], [rate])[:, 0]
+        for user, borrow_amount in zip(young, amounts.tolist()):
             game_state.record_decision(user.user_id, 'borrow', round(borrow_amount, 1))
-            
-    elif user.age_stage == 'O':
-        # Old players automatically consume
-        game_state.record_decision(user.user_id, 'consume', 0)
 
 def generate_test_player_decisions(game_state, optimal_decisions):
     """Generates decisions for all existing test players who haven't submitted one."""
-    for user_id in list(game_state.pending_decisions):
-        if user_id.startswith("test_") and user_id in game_state.users:
-            user = game_state.users[user_id]
-            try:
-                generate_decision_for_player(game_state, user, optimal_decisions)
-            except Exception as e:
-                print(f"Error generating decision for test player {user_id}: {str(e)}")
-
-
-def _interpolate_borrowing(demand_curve, current_rate_percent, borrowing_limit):
-    """Helper function to interpolate borrowing amount from a demand curve."""
-    lower_points = [p for p in demand_curve if p['interestRate'] < current_rate_percent]
-    upper_points = [p for p in demand_curve if p['interestRate'] > current_rate_percent]
-    
-    if lower_points and upper_points:
-        lower_point = max(lower_points, key=lambda p: p['interestRate'])
-        upper_point = min(upper_points, key=lambda p: p['interestRate'])
-        
-        rate_range = upper_point['interestRate'] - lower_point['interestRate']
-        if rate_range > 0:
-            position = (current_rate_percent - lower_point['interestRate']) / rate_range
-            borrow_amount = lower_point['borrowingAmount'] + position * (
-                upper_point['borrowingAmount'] - lower_point['borrowingAmount']
-            )
-            return round(borrow_amount, 1)
-        else:
-            return round(lower_point['borrowingAmount'], 1) # Avoid division by zero if rates are the same
-            
-    elif lower_points:
-        return round(max(lower_points, key=lambda p: p['interestRate'])['borrowingAmount'], 1)
-    elif upper_points:
-        return round(min(upper_points, key=lambda p: p['interestRate'])['borrowingAmount'], 1)
+    users = [game_state.users[user_id] for user_id in game_state.pending_decisions.ids('test')]
+    if optimal_decisions:
+        record_optimal_decisions(game_state, users)
     else:
-        # Fallback: borrow a small fraction of the limit
-        return round(min(10, borrowing_limit * 0.1), 1)
+        generate_decisions(game_state, users)
+
+
+def record_optimal_decisions(game_state, users):
+    """
+    Records lifetime-utility-optimal decisions for ``users``, solved together
+    (see services.agent_solver). A decision the game rejects is replaced by
+    the same safe fallback the randomized players use.
+    """
+    # Imported here so numpy only loads once optimal players are solved
+    from services import agent_solver
+
+    for decision in agent_solver.optimal_decisions(game_state, users):
+        user = decision.user
+        if decision.demand_curve is not None:
+            user.demand_curve = decision.demand_curve
+        if not game_state.record_decision(user.user_id, decision.decision_type, decision.amount):
+            logger.warning("Failed to record optimal %s decision for %s: %s",
+                           decision.decision_type, user.user_id, decision.amount)
+            if user.age_stage == 'Y':
+                game_state.record_decision(user.user_id, 'borrow', min(10, game_state.borrowing_limit * 0.1))
+            elif user.age_stage == 'M':
+                game_state.record_decision(user.user_id, 'save', 0)
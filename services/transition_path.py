@@ -0,0 +1,233 @@
+"""
+Perfect-foresight transition paths after a policy change.
+
+When a policy parameter changes (say the borrowing limit or government debt),
+the economy moves from the old steady state to the new one over several
+periods. Every cohort foresees the whole path of rates and optimizes over its
+three-period life with log utility (the closed-form rules of
+services.steady_state): the young borrow their share of lifetime wealth,
+discounted at the rates of the two periods they borrow across, and the
+middle-aged split what is left after repaying between middle and old age.
+
+The unknowns are the rates r_0 .. r_{T-1} from the shock on; before it the
+economy sits at the old steady state and from period T on at the new one.
+The loan market of period t depends only on r_{t-1}, r_t and r_{t+1}, so the
+Jacobian of the excess demands is tridiagonal. It is built with three
+vectorized evaluations (perturbing every third rate at once) and each Newton
+step is solved in O(T) with the Thomas algorithm. The solver starts from the
+last path it found for the same horizon, so re-solving while the professor
+adjusts a policy takes only a few iterations.
+
+Conventions match services.steady_state: rates are net, a loan taken at t is
+repaid at t + 1 with 1 + r_t, and only positive middle-aged saving supplies
+loans.
+
+Example:
+    python -m services.transition_path --borrowing-limit 10 --periods 200
+"""
+import argparse
+import threading
+import time
+
+import numpy as np
+
+from services.steady_state import RATE_BOUNDS, equilibrium_rate, make_params, validate_params, young_borrowing
+
+
+def solve_tridiagonal(lower, diag, upper, rhs):
+    """
+    Solve a tridiagonal system with the Thomas algorithm.
+
+    ``lower[i]`` multiplies x[i - 1] and ``upper[i]`` multiplies x[i + 1] in
+    row i (``lower[0]`` and ``upper[-1]`` are ignored).
+    """
+    n = len(diag)
+    c = np.empty(n)
+    d = np.empty(n)
+    c[0] = upper[0] / diag[0]
+    d[0] = rhs[0] / diag[0]
+    for i in range(1, n):
+        denominator = diag[i] - lower[i] * c[i - 1]
+        c[i] = upper[i] / denominator
+        d[i] = (rhs[i] - lower[i] * d[i - 1]) / denominator
+    for i in range(n - 2, -1, -1):
+        d[i] -= c[i] * d[i + 1]
+    return d
+
+
+def steady_states(old_params, new_params):
+    """The steady-state rates before and after the change, which anchor the path."""
+    return float(equilibrium_rate(old_params)), float(equilibrium_rate(new_params))
+
+
+def path_quantities(rates, old_params, new_params, anchors=None):
+    """
+    Borrowing, saving and excess loan demand along a path of rates.
+
+    Args:
+        rates: r_0 .. r_{T-1}, the rates from the policy change on
+        old_params: parameters before the change (period -1 and earlier)
+        new_params: parameters from period 0 on
+        anchors: steady_states(old_params, new_params), if already known
+
+    Returns:
+        dict of arrays of length T
+    """
+    old_rate, new_rate = steady_states(old_params, new_params) if anchors is None else anchors
+    full = np.concatenate(([old_rate], rates, [new_rate]))
+    gross = 1 + full[1:-1]
+    gross_next = 1 + full[2:]
+
+    beta = new_params['beta']
+    y_young = new_params['income_young'] - new_params['tax_rate_young']
+    y_middle = new_params['income_middle'] - new_params['tax_rate_middle']
+    y_old = new_params['income_old'] - new_params['tax_rate_old']
+
+    # The young borrow across periods t and t + 1
+    wealth = y_young + y_middle / gross + y_old / (gross * gross_next)
+    borrowing = np.clip(wealth / (1 + beta + beta ** 2) - y_young, 0.0, new_params['borrowing_limit'] / gross)
+
+    # The middle-aged repay what they borrowed the period before the change on the old terms
+    previous_borrowing = np.concatenate(([young_borrowing(old_rate, old_params)], borrowing[:-1]))
+    repayment = (1 + full[:-2]) * previous_borrowing
+    saving = np.maximum(beta / (1 + beta) * (y_middle - repayment) - y_old / ((1 + beta) * gross), 0.0)
+
+    demand = (1 + new_params['population_growth']) * borrowing + new_params['government_debt']
+    return {
+        'young_borrowing': borrowing,
+        'middle_saving': saving,
+        'loan_demand': demand,
+        'excess_demand': demand - saving
+    }
+
+
+def excess_demand(rates, old_params, new_params, anchors=None):
+    return path_quantities(rates, old_params, new_params, anchors)['excess_demand']
+
+
+def jacobian(rates, old_params, new_params, anchors=None, step=1e-7):
+    """The tridiagonal Jacobian of the excess demands, as (lower, diag, upper)."""
+    anchors = steady_states(old_params, new_params) if anchors is None else anchors
+    base = excess_demand(rates, old_params, new_params, anchors)
+    n = len(rates)
+    lower, diag, upper = np.zeros(n), np.zeros(n), np.zeros(n)
+    index = np.arange(n)
+    for color in range(3):
+        # Rates three apart never meet in one market, so they are perturbed together
+        perturbed = index % 3 == color
+        shifted = rates + np.where(perturbed, step, 0.0)
+        change = (excess_demand(shifted, old_params, new_params, anchors) - base) / step
+        diag[perturbed] = change[perturbed]
+        lower[1:][perturbed[:-1]] = change[1:][perturbed[:-1]]
+        upper[:-1][perturbed[1:]] = change[:-1][perturbed[1:]]
+    return lower, diag, upper
+
+
+class TransitionSolver:
+    """Solves transition paths with Newton's method, warm-started from the last path."""
+
+    def __init__(self, tol=1e-9, max_iterations=50):
+        self.tol = tol
+        self.max_iterations = max_iterations
+        self._last = {}  # periods -> last solved rates
+        self._lock = threading.Lock()
+
+    def solve(self, old_params, new_params, periods=200, guess=None):
+        """
+        Solve the path of rates after the policy changes from ``old_params`` to ``new_params``.
+
+        Args:
+            guess: starting rates (default: the last path solved for ``periods``,
+                or the new steady-state rate throughout)
+
+        Returns:
+            dict with the rates and quantities per period (lists), the old and
+            new steady-state rates, iterations, whether it converged and the
+            largest remaining market imbalance (None if it isn't finite)
+        """
+        periods = int(periods)
+        if periods < 1:
+            raise ValueError("The transition needs at least one period")
+        if guess is None:
+            with self._lock:
+                guess = self._last.get(periods)
+        start = time.perf_counter()
+        anchors = steady_states(old_params, new_params)
+        rates = np.full(periods, anchors[1]) if guess is None else np.array(guess, dtype=float)
+        lo, hi = RATE_BOUNDS
+
+        residual = excess_demand(rates, old_params, new_params, anchors)
+        norm = np.max(np.abs(residual))
+        iterations = 0
+        while norm > self.tol and iterations < self.max_iterations:
+            iterations += 1
+            lower, diag, upper = jacobian(rates, old_params, new_params, anchors)
+            # Where a constraint binds on both sides of a market its excess demand is flat
+            diag = np.where(np.abs(diag) < 1e-12, -1e-12, diag)
+            step = solve_tridiagonal(lower, diag, upper, -residual)
+
+            # Halve the step until the imbalance shrinks
+            scale = 1.0
+            while True:
+                candidate = np.clip(rates + scale * step, lo, hi)
+                candidate_residual = excess_demand(candidate, old_params, new_params, anchors)
+                candidate_norm = np.max(np.abs(candidate_residual))
+                if candidate_norm < norm or scale < 1e-4:
+                    break
+                scale /= 2
+            if candidate_norm >= norm:
+                break
+            rates, residual, norm = candidate, candidate_residual, candidate_norm
+
+        converged = bool(norm <= self.tol)
+        if converged:
+            with self._lock:
+                self._last[periods] = rates.copy()
+
+        quantities = path_quantities(rates, old_params, new_params, anchors)
+        return {
+            'periods': periods,
+            'rates': rates.tolist(),
+            **{name: values.tolist() for name, values in quantities.items()},
+            'old_steady_state': anchors[0],
+            'new_steady_state': anchors[1],
+            'iterations': iterations,
+            'converged': converged,
+            'max_imbalance': float(norm) if np.isfinite(norm) else None,
+            'seconds': time.perf_counter() - start
+        }
+
+
+transition_solver = TransitionSolver()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Solve the transition path after a policy change.')
+    parser.add_argument('--borrowing-limit', type=float, help='new borrowing limit')
+    parser.add_argument('--government-debt', type=float, help='new government debt')
+    parser.add_argument('--income-middle', type=float, help='new middle-aged income')
+    parser.add_argument('--income-old', type=float, help='new old-age income')
+    parser.add_argument('--periods', type=int, default=200, help='periods to the new steady state')
+    args = parser.parse_args(argv)
+
+    old_params = make_params()
+    changes = {name: value for name, value in (('borrowing_limit', args.borrowing_limit),
+                                              ('government_debt', args.government_debt),
+                                              ('income_middle', args.income_middle),
+                                              ('income_old', args.income_old)) if value is not None}
+    try:
+        new_params = validate_params(dict(old_params, **changes))
+    except ValueError as e:
+        parser.error(str(e))
+
+    cold = transition_solver.solve(old_params, new_params, args.periods)
+    warm = transition_solver.solve(old_params, new_params, args.periods)
+    print(f"{args.periods} periods: steady state {cold['old_steady_state']:.4f} -> {cold['new_steady_state']:.4f}")
+    for label, result in (('cold start', cold), ('warm start', warm)):
+        print(f"  {label}: {result['iterations']} iterations, {result['seconds'] * 1000:.1f} ms, "
+              f"max imbalance {result['max_imbalance']:.2e}")
+    print("  first rates: " + ', '.join(f"{rate:.4f}" for rate in cold['rates'][:6]))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+"""
+Compact wire formats for Socket.IO events.
+
+Every client gets JSON unless it opts into a compact encoding by emitting
+``set_encoding``. Compact payloads replace field names with short codes and
+send demand curves (lists of {interestRate, borrowingAmount} points) as packed
+little-endian float32 pairs, which Socket.IO delivers as binary attachments
+instead of text. Other keys that look like a code (say a user id keying the
+``users`` dict) are escaped. The code table is sent to the client (as a
+``wire_format`` event) before its first compact payload, so it never has to be
+hard-coded.
+
+``msgpack`` goes one step further and sends the compact payload as a single
+MessagePack blob; it is offered only when the msgpack package is installed.
+"""
+import json
+import string
+import struct
+
+from socketio import packet
+
+try:
+    import msgpack
+except ImportError:  # optional: the compact encoding works without it
+    msgpack = None
+
+# Field names used in broadcast payloads. Codes follow this order, so append
+# new names at the end; clients always get the table from describe().
+FIELDS = (
+    'user_id', 'user_ids', 'decision_type', 'aggregates', 'waiting_for', 'aggregate_demand',
+    'young_count', 'middle_count', 'old_count', 'total_young_borrowing', 'total_middle_saving',
+    'total_middle_borrowing', 'loan_demand', 'loan_supply', 'loan_balance',
+    'round', 'phase', 'policy', 'interest_rate', 'borrowing_limit', 'government_debt',
+    'taxes', 'incomes', 'young', 'middle', 'old', 'is_equilibrium_update',
+    'player', 'players', 'users', 'count', 'name', 'avatar', 'age_stage', 'stage',
+    'demand_curve', 'interestRate', 'borrowingAmount',
+    'deadline', 'deadline_expired', 'window', 'auto_advance', 'expires_at', 'waiting_count'
+)
+
+
+def _code(index):
+    letters = string.ascii_letters
+    return letters[index] if index < len(letters) else letters[index // len(letters) - 1] + letters[index % len(letters)]
+
+
+FIELD_CODES = {name: _code(index) for index, name in enumerate(FIELDS)}
+FIELD_NAMES = {code: name for name, code in FIELD_CODES.items()}
+
+POINT_KEYS = frozenset(('interestRate', 'borrowingAmount'))
+
+# Prefixed to keys that aren't field names (e.g. user ids keying the users dict)
+# but look like a code, or start with the prefix, so they decode unchanged
+ESCAPE = '~'
+
+ENCODINGS = ('json', 'compact') + (('msgpack',) if msgpack is not None else ())
+# Encodings that get their own copy of each broadcast
+COMPACT_ENCODINGS = ENCODINGS[1:]
+
+
+def room(encoding):
+    """The Socket.IO room holding the clients that asked for ``encoding``."""
+    return f'wire:{encoding}'
+
+
+def describe(encoding):
+    """What a client needs to decode ``encoding``: sent before its first compact payload."""
+    return {'encoding': encoding, 'fields': FIELD_NAMES, 'escape': ESCAPE, 'points': 'float32le'}
+
+
+def encode(data, encoding):
+    """
+    Encode an event payload for clients that asked for ``encoding``.
+
+    Returns:
+        ``data`` itself for 'json', a dict with short keys and packed demand
+        curves for 'compact', and that dict as MessagePack bytes for 'msgpack'
+    """
+    if encoding == 'json':
+        return data
+    compact = _compact(data)
+    if encoding == 'msgpack':
+        return msgpack.packb(compact, use_bin_type=True)
+    return compact
+
+
+def _compact_key(key):
+    if key in FIELD_CODES:
+        return FIELD_CODES[key]
+    if key in FIELD_NAMES or (isinstance(key, str) and key.startswith(ESCAPE)):
+        return ESCAPE + key
+    return key
+
+
+def _expand_key(key):
+    if key in FIELD_NAMES:
+        return FIELD_NAMES[key]
+    if isinstance(key, str) and key.startswith(ESCAPE):
+        return key[len(ESCAPE):]
+    return key
+
+
+def _compact(value):
+    if isinstance(value, dict):
+        return {_compact_key(key): _compact(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if value and all(isinstance(item, dict) and item.keys() == POINT_KEYS for item in value):
+            return pack_points(value)
+        return [_compact(item) for item in value]
+    return value
+
+
+def pack_points(points):
+    """Demand curve points as interleaved (interestRate, borrowingAmount) float32 pairs."""
+    values = [number for point in points for number in (point['interestRate'], point['borrowingAmount'])]
+    return struct.pack(f'<{len(values)}f', *values)
+
+
+def unpack_points(data):
+    values = struct.unpack(f'<{len(data) // 4}f', data)
+    return [{'interestRate': rate, 'borrowingAmount': amount} for rate, amount in zip(values[::2], values[1::2])]
+
+
+def decode(payload, encoding):
+    """Inverse of encode() (up to float32 rounding of demand curves), as a client would decode it."""
+    if encoding == 'json':
+        return payload
+    if encoding == 'msgpack':
+        payload = msgpack.unpackb(payload, raw=False)
+    return _expand(payload)
+
+
+def _expand(value):
+    if isinstance(value, dict):
+        return {_expand_key(key): _expand(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_expand(item) for item in value]
+    if isinstance(value, bytes):
+        return unpack_points(value)
+    return value
+
+
+def wire_size(event, payload):
+    """Bytes one client receives for ``payload``: the Socket.IO packet text plus any binary attachments."""
+    encoded = packet.Packet(packet.EVENT, data=[event, payload]).encode()
+    if isinstance(encoded, list):
+        return len(encoded[0].encode('utf-8')) + sum(len(attachment) for attachment in encoded[1:])
+    return len(encoded.encode('utf-8'))
+
+
+def envelope_size(event):
+    """Bytes a JSON event packet adds around its payload: ``2["<event>",`` before it and ``]`` after."""
+    return len(json.dumps(event)) + 4
@@ -0,0 +1,67 @@
+/**
+ * Client side of the compact Socket.IO wire format (see services/wire_format.py).
+ *
+ * WireFormat.compactSocket(socket) asks the server for compact broadcasts on
+ * every (re)connect and wraps socket.on, so event handlers keep receiving the
+ * usual JSON-shaped payloads: short field codes are expanded with the table the
+ * server sends in its wire_format event, escaped keys lose their escape prefix,
+ * and packed demand curves (float32 pairs) become lists of
+ * {interestRate, borrowingAmount} points again.
+ */
+(function (global) {
+    function unpackPoints(data) {
+        const view = ArrayBuffer.isView(data)
+            ? new DataView(data.buffer, data.byteOffset, data.byteLength)
+            : new DataView(data);
+        const points = [];
+        for (let offset = 0; offset + 8 <= view.byteLength; offset += 8) {
+            points.push({
+                interestRate: view.getFloat32(offset, true),
+                borrowingAmount: view.getFloat32(offset + 4, true)
+            });
+        }
+        return points;
+    }
+
+    function expandKey(key, fields, escape) {
+        if (Object.prototype.hasOwnProperty.call(fields, key)) {
+            return fields[key];
+        }
+        return escape && key.startsWith(escape) ? key.slice(escape.length) : key;
+    }
+
+    function expand(value, fields, escape) {
+        if (value instanceof ArrayBuffer || ArrayBuffer.isView(value)) {
+            return unpackPoints(value);
+        }
+        if (Array.isArray(value)) {
+            return value.map(item => expand(item, fields, escape));
+        }
+        if (value !== null && typeof value === 'object') {
+            const result = {};
+            for (const [key, item] of Object.entries(value)) {
+                result[expandKey(key, fields, escape)] = expand(item, fields, escape);
+            }
+            return result;
+        }
+        return value;
+    }
+
+    function compactSocket(socket) {
+        let format = null;
+        const on = socket.on.bind(socket);
+        // The server sends the code table before its first compact payload
+        on('wire_format', received => { format = received; });
+        on('connect', () => socket.emit('set_encoding', 'compact'));
+        socket.on = function (event, handler) {
+            return on(event, (data, ...rest) =>
+                handler(format ? expand(data, format.fields, format.escape) : data, ...rest));
+        };
+        return socket;
+    }
+
+    global.WireFormat = { compactSocket, expand, unpackPoints };
+    if (typeof module !== 'undefined' && module.exports) {
+        module.exports = global.WireFormat;
+    }
+})(typeof window !== 'undefined' ? window : globalThis);
@@ -0,0 +1,61 @@
+"""
+Shared fixtures for the behavior tests.
+
+The app is created once with TestingConfig (equilibria solved in process);
+every test gets a fresh GameState and fresh admission limits. Tests that
+check broadcasts use ``emitted``, with the clients given by ``connected``.
+"""
+import types
+
+import pytest
+
+import app as app_module
+from config.config import TestingConfig
+from models.game_state import GameState
+from services.admission import admission
+
+
+@pytest.fixture(scope='session')
+def app():
+    return app_module.create_app(TestingConfig)
+
+
+@pytest.fixture(autouse=True)
+def game(app):
+    """A fresh game for every test, as the routes see it."""
+    app_module.game_state = GameState()
+    admission.configure(TestingConfig.ADMISSION_RATE, TestingConfig.ADMISSION_BURST,
+                        TestingConfig.ADMISSION_MAX_CONCURRENT, TestingConfig.ADMISSION_MAX_QUEUE,
+                        TestingConfig.ADMISSION_QUEUE_TIMEOUT)
+    yield app_module.game_state
+    app_module.deadlines.cancel(app_module.game_state)
+
+
+@pytest.fixture
+def connected():
+    """The Socket.IO clients broadcasts reach, as {room: sids} (None is everyone); override or parametrize to connect some."""
+    return {}
+
+
+@pytest.fixture
+def emitted(connected):
+    """Broadcasts are recorded as (event, data, kwargs) instead of sent, and background work runs inline."""
+    sent = []
+    rooms = {'/': {room: {sid: sid for sid in sids} for room, sids in connected.items()}}
+    app_module.configure_dispatch(emit=lambda event, data, **kwargs: sent.append((event, data, kwargs)),
+                                  manager=types.SimpleNamespace(rooms=rooms), background=lambda func: func())
+    yield sent
+    app_module.configure_dispatch()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def professor(app):
+    """A client with a professor session."""
+    client = app.test_client()
+    client.get('/professor')
+    return client
@@ -0,0 +1,88 @@
+"""Tests for admission control: per-session rate limits and the bounded queue."""
+import pytest
+
+from services.admission import PLAYER, PROFESSOR, AdmissionController, admission
+
+
+@pytest.fixture
+def strict():
+    """Two requests per client, then (practically) none."""
+    admission.configure(rate=0.001, burst=2, max_concurrent=0)
+
+
+def student_client(app):
+    """A client that already has a session cookie (its first request is charged to its address)."""
+    client = app.test_client()
+    client.get('/player')
+    return client
+
+
+@pytest.fixture
+def student(app):
+    return student_client(app)
+
+
+def check(client, user_id):
+    return client.post('/api/check_unique_user', json={'user_id': user_id}).status_code
+
+
+def test_clients_are_limited_to_their_burst(student, strict):
+    assert [check(student, 'p1') for _ in range(3)] == [200, 200, 429]
+    response = student.post('/api/check_unique_user', json={'user_id': 'p1'})
+    assert response.headers['Retry-After'].isdigit()
+    assert response.get_json()['reason'] == 'rate_limited'
+
+
+def test_changing_user_id_does_not_reset_the_limit(student, strict):
+    assert [check(student, f'p{i}') for i in range(3)] == [200, 200, 429]
+
+
+def test_sessions_have_their_own_buckets(app, student, strict):
+    assert [check(student, 'p1') for _ in range(3)] == [200, 200, 429]
+    # Another student's session is unaffected, even when it sends the same user_id
+    assert check(student_client(app), 'p1') == 200
+
+
+def test_clients_without_a_session_cookie_share_their_address_bucket(app, strict):
+    cookieless = app.test_client(use_cookies=False)
+    assert [check(cookieless, 'p1') for _ in range(3)] == [200, 200, 429]
+    # A client at another address is unaffected
+    other = app.test_client(use_cookies=False)
+    response = other.post('/api/check_unique_user', json={'user_id': 'p1'},
+                          environ_base={'REMOTE_ADDR': '10.0.0.2'})
+    assert response.status_code == 200
+
+
+def test_professor_requests_are_not_rate_limited(professor, strict):
+    assert {check(professor, 'p1') for _ in range(5)} == {200}
+
+
+def test_bulk_submissions_are_not_charged_to_one_client(client, game, strict):
+    game.add_user('s1', age_stage='O')
+    decisions = [{'user_id': 's1', 'decision_type': 'consume', 'amount': 0}]
+    statuses = {client.post('/api/submit_decisions', json=decisions).status_code for _ in range(5)}
+    assert 429 not in statuses
+
+
+def test_full_queue_turns_players_away():
+    controller = AdmissionController(rate=0, max_concurrent=1, max_queue=0)
+    assert controller.enter('route', 'a') is None
+    rejection = controller.enter('route', 'b', PLAYER)
+    assert rejection.reason == 'queue_full'
+    controller.leave()
+    assert controller.enter('route', 'b', PLAYER) is None
+
+
+def test_queued_players_time_out():
+    controller = AdmissionController(rate=0, max_concurrent=1, max_queue=5, queue_timeout=0.01)
+    assert controller.enter('route', 'a') is None
+    assert controller.enter('route', 'b').reason == 'timeout'
+    assert controller.in_flight == 1
+
+
+def test_unkeyed_requests_skip_the_token_buckets():
+    controller = AdmissionController(rate=0.001, burst=1, max_concurrent=0)
+    assert all(controller.enter('route', None) is None for _ in range(5))
+    assert controller.enter('route', 'a') is None
+    assert controller.enter('route', 'a').reason == 'rate_limited'
+    assert controller.enter('route', 'a', PROFESSOR) is None
@@ -0,0 +1,74 @@
+"""Tests for the lifetime-utility-optimal test player solver."""
+import numpy as np
+import pytest
+
+from models.game_state import GameState
+from services import agent_solver
+from services.steady_state import make_params, young_borrowing
+
+
+def test_patience_is_stable_per_user_and_within_the_spread():
+    ids = [f'test_{i}' for i in range(200)]
+    factors = agent_solver.patience(ids, spread=0.2)
+    assert np.array_equal(factors, agent_solver.patience(ids, spread=0.2))
+    assert factors.min() >= np.exp(-0.2) and factors.max() <= np.exp(0.2)
+    assert len(np.unique(factors)) == len(ids)
+    assert np.all(agent_solver.patience(ids, spread=0.0) == 1.0)
+
+
+def test_young_plans_follow_the_euler_rule_up_to_the_limit():
+    params = make_params(borrowing_limit=100.0)
+    amounts, curves = agent_solver.young_plans([params['beta']], 0.05, params, rates=[0, 5, 10])
+    assert amounts[0] == pytest.approx(round(young_borrowing(0.05, params), 1))
+    assert curves.shape == (1, 3)
+    # Demand falls as the rate rises
+    assert np.all(np.diff(curves[0]) <= 0)
+
+    tight = make_params(borrowing_limit=1.0)
+    amounts, curves = agent_solver.young_plans([tight['beta']], -0.5, tight)
+    assert amounts[0] <= 1.0 and curves.max() <= 1.0
+
+
+def test_middle_plans_save_nothing_when_they_cannot_repay():
+    params = make_params()
+    saving = agent_solver.middle_plans([params['beta']] * 2, [0.0, 1000.0], 0.05, params)
+    assert saving[0] > 0
+    assert saving[1] == 0
+
+
+def test_more_patient_players_save_more():
+    params = make_params()
+    saving = agent_solver.middle_plans([0.5, 0.9], [0.0, 0.0], 0.05, params)
+    assert saving[1] > saving[0]
+
+
+def test_optimal_decisions_cover_every_stage():
+    game = GameState()
+    for user_id, stage in (('test_y', 'Y'), ('test_m', 'M'), ('test_o', 'O')):
+        game.add_user(user_id, age_stage=stage)
+    users = [game.users[user_id] for user_id in ('test_y', 'test_m', 'test_o')]
+    decisions = agent_solver.optimal_decisions(game, users)
+    assert [decision.user for decision in decisions] == users
+    young, middle, old = decisions
+    assert young.decision_type == 'borrow' and young.demand_curve is not None
+    assert middle.decision_type in ('save', 'borrow') and middle.demand_curve is None
+    assert old == agent_solver.Decision(users[2], 'consume', 0, None)
+
+
+def test_optimal_decisions_survive_a_rate_of_minus_one():
+    game = GameState()
+    game.interest_rate = -1.0
+    game.add_user('test_y', age_stage='Y')
+    (decision,) = agent_solver.optimal_decisions(game, [game.users['test_y']])
+    assert 0 <= decision.amount <= game.borrowing_limit
+
+
+def test_pending_optimal_test_players_are_filled_by_the_solver():
+    game = GameState()
+    game.set_optimal_decisions(True)
+    game.add_user('test_y', age_stage='Y')
+    game.add_user('human', age_stage='Y')
+    assert sorted(game.fill_pending()) == ['human', 'test_y']
+    (expected,) = agent_solver.optimal_decisions(game, [game.users['test_y']])
+    assert game.users['test_y'].current_borrowing == expected.amount
+    assert game.users['human'].current_borrowing == 1.0
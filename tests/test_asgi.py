@@ -0,0 +1,120 @@
+"""Tests for the asyncio serving mode: the WSGI-to-ASGI adapter and the emit dispatch."""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+import socketio
+
+import app as app_module
+from asgi import WsgiToAsgi, create_asgi_app
+from config.config import TestingConfig
+
+SCOPE = {
+    'type': 'http', 'method': 'POST', 'path': '/echo', 'query_string': b'round=3',
+    'headers': [(b'content-type', b'text/plain'), (b'x-trace', b'a'), (b'x-trace', b'b')],
+    'client': ('10.0.0.7', 4321), 'server': ('olg.test', 5001)
+}
+
+
+def echo(environ, start_response):
+    """Answer with the request body in one chunk per line."""
+    start_response('201 Created', [('Content-Type', 'text/plain')])
+    return environ['wsgi.input'].read().splitlines(keepends=True)
+
+
+def failing(environ, start_response):
+    raise RuntimeError('boom')
+
+
+def serve(wsgi_app, body_parts, scope=SCOPE):
+    """Run one request through WsgiToAsgi, sending the body in parts; return the sent messages."""
+    messages = [{'type': 'http.request', 'body': part, 'more_body': i < len(body_parts) - 1}
+                for i, part in enumerate(body_parts)]
+    sent = []
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    with ThreadPoolExecutor(2) as executor:
+        asyncio.run(WsgiToAsgi(wsgi_app, executor)(scope, receive, send))
+    return sent
+
+
+def test_streamed_bodies_reach_the_app_and_come_back_in_chunks():
+    sent = serve(echo, [b'first\nsec', b'ond\n', b'third\n'])
+    start, *bodies = sent
+    assert start['type'] == 'http.response.start' and start['status'] == 201
+    assert (b'content-type', b'text/plain') in start['headers']
+    assert [message['body'] for message in bodies] == [b'first\n', b'second\n', b'third\n', b'']
+    assert [message.get('more_body', False) for message in bodies] == [True, True, True, False]
+
+
+def test_an_app_failing_before_start_response_gets_a_500():
+    start, body = serve(failing, [b''])
+    assert start['status'] == 500
+    assert body['body'] == b'Internal Server Error'
+
+
+def test_environ_carries_the_request():
+    environ = WsgiToAsgi._environ(SCOPE, b'hello')
+    assert (environ['REQUEST_METHOD'], environ['PATH_INFO'], environ['QUERY_STRING']) == ('POST', '/echo', 'round=3')
+    assert (environ['CONTENT_TYPE'], environ['CONTENT_LENGTH']) == ('text/plain', '5')
+    assert environ['HTTP_X_TRACE'] == 'a,b'
+    assert (environ['REMOTE_ADDR'], environ['SERVER_NAME'], environ['SERVER_PORT']) == ('10.0.0.7', 'olg.test', '5001')
+    assert environ['wsgi.input'].read() == b'hello'
+
+
+def test_other_scopes_are_ignored():
+    assert serve(echo, [b''], scope={'type': 'websocket'}) == []
+
+
+@pytest.fixture
+def sio_emits(monkeypatch):
+    """Events the AsyncServer emits, as (event, data, kwargs)."""
+    emits = []
+
+    async def emit(self, event, data=None, **kwargs):
+        emits.append((event, data, kwargs))
+
+    monkeypatch.setattr(socketio.AsyncServer, 'emit', emit)
+    yield emits
+    app_module.configure_dispatch()
+
+
+def test_broadcasts_from_request_threads_reach_the_async_server(sio_emits):
+    asgi_app = create_asgi_app(TestingConfig, http_workers=2, background_workers=1)
+
+    async def lifespan():
+        events = asyncio.Queue()
+        sent = []
+
+        async def send(message):
+            sent.append(message['type'])
+
+        server = asyncio.ensure_future(asgi_app({'type': 'lifespan'}, events.get, send))
+        await events.put({'type': 'lifespan.startup'})
+        while 'lifespan.startup.complete' not in sent:
+            await asyncio.sleep(0)
+        # Routes broadcast from worker threads, which wait for the loop to fan the event out
+        await asyncio.get_running_loop().run_in_executor(
+            None, app_module.broadcast, 'round_advanced', {'round': 2})
+        await events.put({'type': 'lifespan.shutdown'})
+        await server
+
+    asyncio.run(lifespan())
+    assert sio_emits == [('round_advanced', {'round': 2}, {})]
+
+
+def test_routes_wait_for_the_game_lock(client, game):
+    joined = threading.Thread(target=client.get, args=('/player?user_id=late&display_name=Late',))
+    with app_module.game_lock:
+        joined.start()
+        time.sleep(0.1)
+        assert 'late' not in game.users
+    joined.join()
+    assert 'late' in game.users
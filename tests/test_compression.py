@@ -0,0 +1,100 @@
+"""Tests for response compression and its cache."""
+import gzip
+import json
+import os
+import zlib
+
+import pytest
+
+from services import compression
+from services.compression import ResponseCompressor
+from services.metrics import COMPRESSION_CACHE
+
+BODY = json.dumps({'users': [{'user_id': f's{i}', 'assets': 0.0} for i in range(200)]}).encode()
+
+
+def cache_lookups(result):
+    for _, key, _, value in COMPRESSION_CACHE.samples():
+        if key == (result,):
+            return value
+    return 0
+
+
+def test_brotli_is_preferred_only_when_installed():
+    expected = (['br'] if compression.brotli is not None else []) + ['gzip', 'deflate']
+    assert ResponseCompressor().encodings == expected
+
+
+def test_bodies_round_trip():
+    compressor = ResponseCompressor()
+    assert gzip.decompress(compressor.compress(BODY, 'gzip')) == BODY
+    assert zlib.decompress(compressor.compress(BODY, 'deflate')) == BODY
+
+
+def test_small_bodies_and_unknown_encodings_are_sent_as_they_are():
+    compressor = ResponseCompressor(min_size=len(BODY) + 1)
+    assert compressor.compress(BODY, 'gzip') is None
+    assert ResponseCompressor().compress(BODY, 'zstd') is None
+    assert ResponseCompressor().compress(BODY, None) is None
+
+
+def test_incompressible_bodies_are_sent_as_they_are():
+    assert ResponseCompressor(min_size=0).compress(os.urandom(4096), 'gzip') is None
+
+
+def test_repeated_bodies_hit_the_cache():
+    compressor = ResponseCompressor()
+    misses, hits = cache_lookups('miss'), cache_lookups('hit')
+    first = compressor.compress(BODY, 'gzip')
+    assert compressor.compress(BODY, 'gzip') is first
+    assert (cache_lookups('miss') - misses, cache_lookups('hit') - hits) == (1, 1)
+    # Each encoding is cached on its own
+    compressor.compress(BODY, 'deflate')
+    assert cache_lookups('miss') - misses == 2
+
+
+def test_the_least_recently_used_body_is_evicted():
+    compressor = ResponseCompressor(max_entries=2)
+    bodies = [BODY + b' ' * i for i in range(3)]
+    first = compressor.compress(bodies[0], 'gzip')
+    compressor.compress(bodies[1], 'gzip')
+    compressor.compress(bodies[0], 'gzip')  # now the most recently used
+    compressor.compress(bodies[2], 'gzip')  # evicts bodies[1]
+    assert compressor.compress(bodies[0], 'gzip') is first
+    misses = cache_lookups('miss')
+    compressor.compress(bodies[1], 'gzip')
+    assert cache_lookups('miss') == misses + 1
+
+
+def test_configure_clears_the_cache():
+    compressor = ResponseCompressor()
+    first = compressor.compress(BODY, 'gzip')
+    compressor.configure(level=1)
+    assert compressor.compress(BODY, 'gzip') is not first
+
+
+@pytest.fixture
+def crowded(game):
+    for i in range(100):
+        game.add_user(f'student_{i}')
+    return game
+
+
+def test_large_json_responses_are_compressed(client, crowded):
+    response = client.get('/api/current_state', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    state = json.loads(gzip.decompress(response.get_data()))
+    assert len(state['users']) == 100
+
+
+def test_responses_are_plain_without_accept_encoding(client, crowded):
+    response = client.get('/api/current_state', headers={'Accept-Encoding': 'identity'})
+    assert 'Content-Encoding' not in response.headers
+    assert len(response.get_json()['users']) == 100
+
+
+def test_error_responses_are_not_compressed(client, crowded):
+    response = client.get('/api/current_state?user_id=nobody', headers={'Accept-Encoding': 'gzip'})
+    assert response.status_code == 404
+    assert 'Content-Encoding' not in response.headers
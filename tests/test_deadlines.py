@@ -0,0 +1,119 @@
+"""Tests for decision deadlines: default decisions, the timer wheel and auto-advance."""
+import threading
+
+import pytest
+
+import app as app_module
+from routes.deadlines import MAX_DECISION_WINDOW
+from services.deadline_scheduler import TimerWheel
+
+
+def add_players(game, stages):
+    for index, stage in enumerate(stages):
+        game.add_user(f's{index}', age_stage=stage)
+
+
+def test_fill_pending_records_defaults_for_every_stage(game):
+    add_players(game, 'YMO')
+    game.users['s2'].assets = 10.0
+    filled = game.fill_pending()
+    assert sorted(filled) == ['s0', 's1', 's2']
+    assert not game.pending_decisions
+    young, middle, old = (game.users[user_id] for user_id in ('s0', 's1', 's2'))
+    assert young.current_borrowing == 1.0 and young.assets == -1.0
+    assert young.demand_curve is not None
+    assert middle.current_saving == 1.0 and middle.current_consumption == game.income_middle - 1.0
+    assert old.current_consumption == pytest.approx((1 + game.interest_rate) * 10.0)
+    assert old.assets == 0
+    assert [user.decisions[-1]['decision_type'] for user in (young, middle, old)] == ['borrow', 'save', 'consume']
+
+
+def test_defaults_are_recorded_like_submitted_decisions(game):
+    add_players(game, 'MM')
+    submitted, filled = game.users['s0'], game.users['s1']
+    for user in (submitted, filled):
+        user.current_consumption, user.current_saving, user.current_utility = 5.0, 2.0, 1.5
+    submitted.record_decision('save', 1.0, game.interest_rate, game.income_middle - game.tax_rate_middle)
+    game.fill_pending(['s1'])
+    keys = ('previous_consumption', 'previous_decision', 'previous_utility', 'current_saving',
+            'current_consumption', 'current_utility', 'assets', 'decisions')
+    assert [getattr(filled, key) for key in keys] == [getattr(submitted, key) for key in keys]
+
+
+def test_fill_pending_leaves_broke_middle_aged_their_debt(game):
+    add_players(game, 'M')
+    game.users['s0'].assets = -100.0
+    assert game.fill_pending() == ['s0']
+    user = game.users['s0']
+    assert user.current_saving == 0.0
+    assert user.current_consumption == game.income_middle
+    assert user.assets == -100.0
+
+
+def test_fill_pending_only_fills_the_given_players(game):
+    add_players(game, 'YY')
+    assert game.fill_pending(['s1']) == ['s1']
+    assert list(game.pending_decisions) == ['s0']
+
+
+def test_default_curve_borrows_the_limit_with_optimal_decisions(game):
+    game.set_optimal_decisions(True)
+    add_players(game, 'Y')
+    game.fill_pending()
+    points = game.users['s0'].demand_curve.to_points()
+    assert [point['borrowingAmount'] for point in points] == pytest.approx(
+        [game.borrowing_limit / (1 + point['interestRate'] / 100) for point in points], abs=0.05)
+    # The recorded decision is still the safe one
+    assert game.users['s0'].current_borrowing == 1.0
+
+
+def test_timer_wheel_runs_replaces_and_cancels_deadlines():
+    wheel = TimerWheel(tick=0.01)
+    fired = threading.Event()
+    wheel.schedule('a', 10, lambda: pytest.fail('replaced deadline ran'))
+    wheel.schedule('a', 0.02, fired.set)
+    wheel.schedule('b', 0.02, lambda: pytest.fail('cancelled deadline ran'))
+    assert wheel.cancel('b')
+    assert fired.wait(2)
+    assert 'a' not in wheel and len(wheel) == 0
+
+
+def test_set_deadline_needs_a_professor(client):
+    assert client.post('/api/set_deadline', json={'seconds': 30}).status_code == 403
+
+
+@pytest.mark.parametrize('seconds', ['soon', -5, MAX_DECISION_WINDOW + 1])
+def test_set_deadline_rejects_invalid_windows(professor, seconds):
+    assert professor.post('/api/set_deadline', json={'seconds': seconds}).status_code == 400
+
+
+def test_set_deadline_schedules_and_clears_the_window(professor, game, emitted):
+    response = professor.post('/api/set_deadline', json={'seconds': 60, 'auto_advance': True})
+    deadline = response.get_json()['deadline']
+    assert deadline['window'] == 60 and deadline['auto_advance'] and deadline['expires_at']
+    assert game in app_module.deadlines
+    assert ('deadline_updated', {'round': 1, 'deadline': deadline}, {}) in emitted
+
+    professor.post('/api/set_deadline', json={'seconds': None})
+    assert game not in app_module.deadlines
+    assert game.deadline_state()['expires_at'] is None
+
+
+def test_expired_deadline_fills_decisions_and_advances(app, game, emitted):
+    add_players(game, 'YMO')
+    game.decision_window, game.auto_advance = 60, True
+    with app.app_context():
+        app_module.expire_deadline(game, 1)
+    (data,) = [data for event, data, _ in emitted if event == 'decision_submitted']
+    assert data['deadline_expired'] and sorted(data['user_ids']) == ['s0', 's1', 's2']
+    assert game.current_round == 2
+    # The next round gets its own window
+    assert game in app_module.deadlines
+
+
+def test_expired_deadline_of_an_old_round_does_nothing(app, game, emitted):
+    add_players(game, 'Y')
+    with app.app_context():
+        app_module.expire_deadline(game, 5)
+    assert list(game.pending_decisions) == ['s0']
+    assert not emitted
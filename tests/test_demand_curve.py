@@ -0,0 +1,67 @@
+"""Tests for demand curve validation, grid sampling and serialization."""
+from array import array
+
+import pytest
+
+from models import demand_curve
+from models.demand_curve import DemandCurve
+
+
+def points(*pairs):
+    return [{'interestRate': rate, 'borrowingAmount': amount} for rate, amount in pairs]
+
+
+def test_points_are_interpolated_onto_the_grid():
+    curve = DemandCurve.from_points(points((10, 0), (0, 50)))
+    assert list(curve.rates) == list(demand_curve.grid_rates())
+    assert curve.borrowing_at(0) == 50 and curve.borrowing_at(10) == 0
+    assert curve.borrowing_at(4) == pytest.approx(30)
+
+
+def test_end_values_are_held_beyond_the_submitted_range():
+    curve = DemandCurve.from_points(points((3, 20), (6, 10)))
+    assert curve.borrowing_at(0) == 20
+    assert curve.borrowing_at(10) == 10
+
+
+@pytest.mark.parametrize('submitted, message', [
+    ([], 'non-empty list'),
+    ({'interestRate': 0, 'borrowingAmount': 1}, 'non-empty list'),
+    (points(*((rate, 1) for rate in range(51))), 'at most 50 points'),
+    ([{'interestRate': 0}], 'numeric'),
+    (points((0, 'lots')), 'numeric'),
+    (points((0, float('nan'))), 'finite'),
+    (points((float('inf'), 1)), 'finite'),
+    (points((2, 5), (2, 4)), 'two points at 2%'),
+    (points((0, 5), (5, 10)), 'must not rise'),
+    (points((0, 5), (5, -1)), 'must not be negative'),
+])
+def test_invalid_curves_are_rejected(submitted, message):
+    with pytest.raises(ValueError, match=message):
+        DemandCurve.from_points(submitted)
+
+
+def test_generated_curves_skip_validation():
+    curve = DemandCurve.from_points(points((0, 5), (5, 10)), validate=False)
+    assert curve.borrowing_at(5) == 10
+
+
+def test_from_grid_needs_one_amount_per_rate():
+    rates = demand_curve.grid_rates()
+    assert list(DemandCurve.from_grid([1.0] * len(rates)).amounts) == [1.0] * len(rates)
+    with pytest.raises(ValueError, match='one per grid rate'):
+        DemandCurve.from_grid([1.0])
+
+
+def test_points_are_cached_until_the_curve_is_replaced():
+    curve = DemandCurve.from_points(points((0, 50), (10, 0)))
+    serialized = curve.to_points()
+    assert curve.to_points() is serialized
+    assert serialized[0] == {'interestRate': 0.0, 'borrowingAmount': 50.0}
+
+    curve.amounts = array('d', [1.0] * len(curve))
+    assert curve.to_points() is not serialized
+    assert {point['borrowingAmount'] for point in curve.to_points()} == {1.0}
+
+    curve.rates = array('d', range(len(curve)))
+    assert [point['interestRate'] for point in curve.to_points()] == list(range(len(curve)))
@@ -0,0 +1,64 @@
+"""Tests for the Monte Carlo ensemble and its streaming reduction."""
+import csv
+import io
+
+import numpy as np
+import pytest
+
+from services import ensemble
+from services.ensemble import RoundAccumulator
+
+
+@pytest.fixture
+def samples():
+    """1000 replications of a three-round rate path."""
+    rng = np.random.default_rng(0)
+    return rng.normal([0.02, 0.04, 0.06], [0.01, 0.02, 0.005], size=(1000, 3))
+
+
+def accumulate(samples, **kwargs):
+    accumulator = RoundAccumulator(samples.shape[1], **kwargs)
+    for rates in samples:
+        accumulator.add(rates)
+    return accumulator
+
+
+def test_moments_match_numpy(samples):
+    accumulator = accumulate(samples)
+    assert accumulator.count.tolist() == [1000] * 3
+    assert accumulator.mean == pytest.approx(samples.mean(axis=0))
+    rows = accumulator.summary()
+    assert [row['std'] for row in rows] == pytest.approx(samples.std(axis=0, ddof=1))
+    assert [row['min'] for row in rows] == pytest.approx(samples.min(axis=0))
+    assert [row['max'] for row in rows] == pytest.approx(samples.max(axis=0))
+
+
+@pytest.mark.parametrize('q', ensemble.DEFAULT_QUANTILES)
+def test_quantiles_are_within_a_bin_of_numpy(samples, q):
+    accumulator = accumulate(samples)
+    assert accumulator.quantile(q) == pytest.approx(np.quantile(samples, q, axis=0), abs=accumulator.bin_width)
+
+
+def test_short_paths_only_count_in_their_rounds():
+    accumulator = RoundAccumulator(3)
+    accumulator.add([0.01, 0.02, 0.03])
+    accumulator.add([0.05])
+    accumulator.add([])
+    assert accumulator.count.tolist() == [2, 1, 1]
+    assert accumulator.mean == pytest.approx([0.03, 0.02, 0.03])
+    assert np.isnan(RoundAccumulator(1).quantile(0.5)[0])
+
+
+def test_results_do_not_depend_on_the_worker_count():
+    kwargs = dict(num_test_players=6, rounds=2, replications=4, seed=3)
+    serial = ensemble.run_ensemble(workers=1, **kwargs)
+    parallel = ensemble.run_ensemble(workers=2, **kwargs)
+    assert np.array_equal(serial.histogram, parallel.histogram)
+    assert parallel.mean == pytest.approx(serial.mean)
+
+
+def test_cli_writes_the_summary_to_stdout_by_default(capsys):
+    ensemble.main(['--players', '6', '--rounds', '1', '--replications', '2', '--workers', '1'])
+    rows = list(csv.DictReader(io.StringIO(capsys.readouterr().out)))
+    assert [row['round'] for row in rows] == ['0', '1']
+    assert rows[0]['count'] == '2'
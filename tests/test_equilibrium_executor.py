@@ -0,0 +1,72 @@
+"""Tests for the loan market solver and its worker pool."""
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from services import ensemble, steady_state
+from services.equilibrium_executor import RATE_BOUNDS, EquilibriumExecutor, make_snapshot, solve_market
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_solve_market_clears_the_market():
+    snapshot = make_snapshot([30.0, 50.0], [40.0, -5.0, 20.0], borrowing_limit=50.0, government_debt=0.0)
+    assert list(snapshot.middle_saving) == [40.0, 20.0]
+    solution = solve_market(snapshot)
+    assert solution.converged
+    demand = sum(min(50.0 / (1 + solution.rate), amount) for amount in (30.0, 50.0))
+    assert demand == pytest.approx(60.0, abs=1e-5)
+
+
+def test_solve_market_stays_within_the_rate_bounds():
+    # Nobody saves, so demand exceeds supply at every rate
+    solution = solve_market(make_snapshot([10.0], [], borrowing_limit=10.0, government_debt=0.0))
+    assert RATE_BOUNDS[0] <= solution.rate <= RATE_BOUNDS[1]
+    assert solution.rate == pytest.approx(RATE_BOUNDS[1], abs=1e-6)
+    assert all(imbalance > 0 for imbalance in solution.bounds_imbalance)
+
+
+def test_every_model_searches_the_same_rate_interval():
+    assert steady_state.RATE_BOUNDS is RATE_BOUNDS
+    assert ensemble.RoundAccumulator(rounds=1).rate_range == RATE_BOUNDS
+
+
+def test_without_workers_every_solve_is_inline():
+    executor = EquilibriumExecutor()
+    executor.start(workers=0, inline_threshold=1)
+    executor.solve(make_snapshot([10.0], [20.0], 10.0, 0.0))
+    executor.warm_up()
+    assert not executor.ready
+
+
+def test_importing_the_app_does_not_load_numpy():
+    script = "import sys, app; app.create_app(); print('numpy' in sys.modules)"
+    env = dict(os.environ, EQUILIBRIUM_WORKERS='2')
+    output = subprocess.run([sys.executable, '-c', script], cwd=ROOT, env=env, check=True,
+                            capture_output=True, text=True).stdout
+    assert output.split()[-1] == 'False'
+
+
+def test_first_large_solve_starts_the_pool_in_the_background():
+    executor = EquilibriumExecutor()
+    executor.start(workers=1, inline_threshold=2)
+    snapshot = make_snapshot([30.0, 50.0], [40.0, 20.0], 50.0, 0.0)
+    try:
+        assert not executor.ready
+        # Small solves never start the workers
+        executor.solve(make_snapshot([30.0], [], 50.0, 0.0))
+        assert executor._started is None
+        # The first large one starts them, but doesn't wait for them
+        expected = solve_market(snapshot)
+        assert executor.solve(snapshot) == expected
+        deadline = time.monotonic() + 60
+        while not executor.ready and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert executor.ready
+        assert executor.solve(snapshot) == expected
+    finally:
+        executor.shutdown()
+    assert not executor.ready
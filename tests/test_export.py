@@ -0,0 +1,112 @@
+"""Tests for the streaming research export and /api/export."""
+import csv
+import io
+import json
+import random
+
+import numpy as np
+import pytest
+
+from services import export_service, test_player_service
+from services.policy_sweep import simulate
+
+PLAYERS, ROUNDS = 6, 3
+
+
+@pytest.fixture
+def session(game):
+    """The test game after a few rounds with test players."""
+    random.seed(0)
+    test_player_service.add_test_players(game, PLAYERS, optimal_decisions=False)
+    simulate(game, ROUNDS)
+    return game
+
+
+def load_npz(chunks):
+    return np.load(io.BytesIO(b''.join(chunks)))
+
+
+def test_ndjson_has_one_row_per_player_and_round(session):
+    lines = list(export_service.export(session, 'decisions', 'ndjson'))
+    rows = [json.loads(line) for line in lines]
+    assert len(rows) == PLAYERS * ROUNDS
+    assert sorted({row['round'] for row in rows}) == [round_data['round'] for round_data in session.previous_rounds]
+    assert set(rows[0]) == set(export_service.columns('decisions'))
+
+
+def test_csv_has_a_header_and_every_row(session):
+    text = ''.join(export_service.export(session, 'rounds', 'csv'))
+    rows = list(csv.DictReader(io.StringIO(text)))
+    assert list(rows[0]) == export_service.columns('rounds')
+    assert len(rows) == ROUNDS
+    assert float(rows[0]['interest_rate']) == pytest.approx(session.previous_rounds[0]['interest_rate'])
+
+
+def test_demand_curve_rows_are_the_young_players_points(session):
+    rows = list(export_service.iter_rows(session, 'demand_curves'))
+    first = session.previous_rounds[0]
+    young = [user_id for user_id, state in first['users'].items() if state.get('demand_curve')]
+    assert young
+    assert sum(1 for row in rows if row['round'] == first['round']) == sum(
+        len(first['users'][user_id]['demand_curve']) for user_id in young)
+
+
+def test_npz_matches_the_rows_whatever_the_chunk_size(session, monkeypatch):
+    expected = list(export_service.iter_rows(session, 'decisions'))
+    monkeypatch.setattr(export_service, 'CHUNK_ROWS', 4)
+    archive = load_npz(export_service.export(session, 'decisions', 'npz'))
+    assert archive['decisions/user_id'].tolist() == [row['user_id'] for row in expected]
+    assert archive['decisions/saving'].tolist() == pytest.approx([row['saving'] for row in expected])
+    assert archive['decisions/round'].dtype == np.int64
+
+
+def test_npz_of_all_tables_has_every_column(session):
+    archive = load_npz(export_service.export(session, 'all', 'npz'))
+    assert sorted(archive.files) == sorted(f'{table}/{name}' for table in export_service.TABLES
+                                           for name in export_service.columns(table))
+    assert archive['users/is_test'].all()
+
+
+def test_npz_columns_keep_the_counted_length_when_players_join(session):
+    chunks = []
+    for chunk in export_service.export(session, 'users', 'npz'):
+        chunks.append(chunk)
+        if len(chunks) == 1:
+            session.add_user('late', age_stage='Y')
+    archive = load_npz(chunks)
+    assert {len(archive[name]) for name in archive.files} == {PLAYERS}
+
+
+@pytest.mark.parametrize('table, fmt, message', [
+    ('grades', 'csv', 'Unknown table'),
+    ('users', 'xlsx', 'Unsupported export format'),
+    ('all', 'csv', 'Unknown table'),
+])
+def test_export_rejects_unknown_tables_and_formats(game, table, fmt, message):
+    with pytest.raises(ValueError, match=message):
+        export_service.export(game, table, fmt)
+
+
+def test_export_needs_a_professor(client):
+    assert client.get('/api/export/users.csv').status_code == 403
+
+
+def test_export_route_streams_the_table(professor, session):
+    response = professor.get('/api/export/decisions.ndjson')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+    assert response.headers['Content-Disposition'] == 'attachment; filename=olg_decisions.ndjson'
+    assert len(response.get_data(as_text=True).splitlines()) == PLAYERS * ROUNDS
+
+
+def test_export_route_rejects_unknown_tables(professor):
+    response = professor.get('/api/export/grades.csv')
+    assert response.status_code == 400
+    assert 'Unknown table' in response.get_json()['error']
+
+
+def test_cli_exports_a_simulated_game(tmp_path):
+    output = tmp_path / 'users.csv'
+    export_service.main(['--players', '3', '--rounds', '1', '--seed', '1', '--table', 'users',
+                         '--output', str(output)])
+    assert len(list(csv.DictReader(output.open()))) == 3
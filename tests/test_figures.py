@@ -0,0 +1,55 @@
+import pytest
+
+from services.figure_service import figure_service, parse_params
+from services.steady_state import DEFAULT_PARAMS
+
+
+def test_parse_params_overlays_numbers():
+    params = parse_params({'borrowing_limit': '40', 'unrelated': 'x'}, DEFAULT_PARAMS)
+    assert params['borrowing_limit'] == 40.0
+    assert params['beta'] == DEFAULT_PARAMS['beta']
+
+
+def test_parse_params_spreads_the_debt_over_the_cohort():
+    assert parse_params({'government_debt': '12'}, DEFAULT_PARAMS, cohort=4)['government_debt'] == 3.0
+    assert parse_params({'beta': '0.9'}, dict(DEFAULT_PARAMS, government_debt=3.0), cohort=4)['government_debt'] == 3.0
+
+
+def test_parse_params_without_prefixed_values_is_none():
+    assert parse_params({'borrowing_limit': '40'}, DEFAULT_PARAMS, prefix='shock_') is None
+
+
+@pytest.mark.parametrize('args', [
+    {'beta': '-1'}, {'beta': '0'}, {'beta': 'nan'}, {'borrowing_limit': 'inf'},
+    {'borrowing_limit': '-5'}, {'income_middle': '-1'}, {'labor_share': '1'}, {'beta': 'abc'},
+    {'beta': [1]}, {'beta': True}
+])
+def test_parse_params_rejects_values_outside_the_domain(args):
+    with pytest.raises(ValueError):
+        parse_params(args, DEFAULT_PARAMS)
+
+
+def test_figures_need_a_professor(client):
+    assert client.get('/api/figures/loan_market.svg').status_code == 403
+
+
+@pytest.mark.parametrize('query', ['beta=-1', 'borrowing_limit=nan', 'shock_beta=0', 'beta=x'])
+def test_invalid_figure_parameters_are_a_bad_request(professor, query):
+    response = professor.get(f'/api/figures/loan_market.svg?{query}')
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+
+
+def test_unknown_figure_kind_is_a_bad_request(professor):
+    assert professor.get('/api/figures/pie.svg').status_code == 400
+
+
+def test_figures_are_cached_and_conditional(professor):
+    pytest.importorskip('matplotlib')
+    figure_service.clear()
+    first = professor.get('/api/figures/loan_market.svg?borrowing_limit=40')
+    assert first.status_code == 200
+    assert first.mimetype == 'image/svg+xml'
+    again = professor.get('/api/figures/loan_market.svg?borrowing_limit=40',
+                          headers={'If-None-Match': first.headers['ETag'].strip('"')})
+    assert again.status_code == 304
@@ -0,0 +1,54 @@
+"""Tests for the queued, rate-limited logging setup."""
+import io
+import json
+import logging
+
+import pytest
+
+from config import logging_config
+from config.config import TestingConfig
+
+
+@pytest.fixture
+def output():
+    """Log through the queue into a buffer, then restore the app's configuration."""
+    stream = io.StringIO()
+    yield stream
+    logging_config.configure_logging(TestingConfig.LOG_LEVEL, TestingConfig.LOG_FORMAT,
+                                     TestingConfig.LOG_RATE_LIMIT, TestingConfig.LOG_RATE_PERIOD)
+
+
+def flush():
+    logging_config._stop_listener()
+
+
+def test_arguments_are_merged_before_queueing(output):
+    logging_config.configure_logging(stream=output)
+    pending = ['s1']
+    logging.getLogger('tests').warning("Waiting for %s", pending)
+    pending.append('s2')
+    flush()
+    assert "Waiting for ['s1']" in output.getvalue()
+
+
+def test_exceptions_are_rendered_before_queueing(output):
+    logging_config.configure_logging(fmt='json', stream=output)
+    try:
+        raise RuntimeError('boom')
+    except RuntimeError:
+        logging.getLogger('tests').exception("Failed %d times", 3, extra={'round': 2})
+    flush()
+    entry = json.loads(output.getvalue())
+    assert entry['message'] == 'Failed 3 times'
+    assert entry['round'] == 2
+    assert 'RuntimeError: boom' in entry['exception']
+
+
+def test_repeated_messages_are_rate_limited(output):
+    logging_config.configure_logging(rate_limit=2, rate_period=60, stream=output)
+    logger = logging.getLogger('tests')
+    for attempt in range(5):
+        logger.warning("Retry %d", attempt)
+    flush()
+    lines = output.getvalue().splitlines()
+    assert [line.split(': ', 1)[1] for line in lines] == ['Retry 0', 'Retry 1']
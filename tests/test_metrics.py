@@ -0,0 +1,46 @@
+"""Tests for the /metrics endpoint and the Socket.IO emit metrics."""
+import pytest
+
+import app as app_module
+from services.metrics import EMIT_BYTES, EMIT_PAYLOAD_BYTES
+
+
+def sample(metric, suffix, **labels):
+    values = tuple(labels[name] for name in metric.label_names)
+    for sample_suffix, key, _, value in metric.samples():
+        if sample_suffix == suffix and key == values:
+            return value
+    return 0
+
+
+@pytest.fixture
+def connected():
+    """Two JSON clients."""
+    return {None: ['a', 'b']}
+
+
+def test_metrics_endpoint_renders_prometheus_text(client):
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    text = response.get_data(as_text=True)
+    assert '# TYPE olg_socketio_emit_payload_bytes histogram' in text
+    assert '# TYPE olg_socketio_emit_bytes_total counter' in text
+
+
+def test_payload_sizes_are_sampled(emitted):
+    event = 'metrics_sampling_test'
+    for round_number in range(app_module.EMIT_SIZE_SAMPLE + 1):
+        app_module.broadcast(event, {'round': round_number})
+    assert len(emitted) == app_module.EMIT_SIZE_SAMPLE + 1
+    # The first emit and the EMIT_SIZE_SAMPLE-th after it
+    assert sample(EMIT_PAYLOAD_BYTES, '_count', event=event) == 2
+
+
+def test_every_emit_counts_bytes_sent(emitted):
+    event = 'metrics_bytes_test'
+    app_module.broadcast(event, {'round': 1})
+    first = sample(EMIT_BYTES, '', event=event, encoding='json')
+    assert first > 0
+    app_module.broadcast(event, {'round': 2})
+    assert sample(EMIT_BYTES, '', event=event, encoding='json') == 2 * first
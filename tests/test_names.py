@@ -0,0 +1,88 @@
+"""Tests for unique display names: the normalized index, reservations and renames."""
+import pytest
+
+from models.game_state import MAX_RESERVATIONS_PER_HOLDER, normalize_name
+
+
+@pytest.fixture
+def ada(game):
+    game.add_user('s1', name='Ada Lovelace')
+    return game
+
+
+def test_names_are_compared_ignoring_case_and_spacing(ada):
+    assert normalize_name('  ADA   lovelace ') == 'ada lovelace'
+    assert ada.is_name_taken('ada  LOVELACE')
+    assert not ada.is_name_taken('Ada Lovelace', 's1')
+    assert not ada.is_name_taken('Grace Hopper')
+
+
+def test_removed_players_free_their_name(ada):
+    ada.remove_user('s1')
+    assert not ada.is_name_taken('Ada Lovelace')
+
+
+def test_a_reservation_holds_the_name_until_it_expires(game):
+    assert game.reserve_name('Grace', 's2')
+    assert game.is_name_taken('grace') and not game.is_name_taken('Grace', 's2')
+    assert not game.reserve_name('GRACE', 's3')
+    assert game.reserve_name('Alan', 's4', ttl=0)
+    assert not game.is_name_taken('Alan')
+    assert game.reserve_name('alan', 's5')
+
+
+def test_reserving_again_does_not_grow_the_heap(game):
+    for _ in range(5):
+        assert game.reserve_name('Grace', 's2', holder='browser')
+    assert len(game._reservation_expiries) == 1
+    assert game.name_reservations['grace'][0] == 's2'
+
+
+def test_a_client_holds_a_limited_number_of_names(game):
+    names = [f'Name {i}' for i in range(MAX_RESERVATIONS_PER_HOLDER + 1)]
+    for i, name in enumerate(names):
+        assert game.reserve_name(name, f'made_up_{i}', holder='browser')
+    # The oldest reservation was released
+    assert not game.is_name_taken(names[0])
+    assert all(game.is_name_taken(name) for name in names[1:])
+    assert game.reserve_name(names[0], 'someone', holder='other browser')
+
+
+def test_joining_uses_up_the_reservation(game):
+    game.reserve_name('Grace', 's2', holder='browser')
+    game.add_user('s2', name='Grace')
+    assert 'grace' not in game.name_reservations and 'browser' not in game._held_names
+    assert game.is_name_taken('Grace', 's3')
+
+
+def test_renames_cannot_take_a_used_name(ada):
+    ada.add_user('s2', name='Grace')
+    assert not ada.rename_user('s2', ' ada lovelace')
+    assert ada.users['s2'].name == 'Grace'
+    assert ada.rename_user('s2', 'Grace Hopper')
+    assert not ada.is_name_taken('Grace') and ada.is_name_taken('grace hopper')
+    assert not ada.rename_user('nobody', 'Alan')
+
+
+def test_check_unique_user_reserves_the_name(app, client, game):
+    response = client.post('/api/check_unique_user', json={'user_id': 's2', 'display_name': 'Grace'})
+    assert response.get_json()['unique']
+    other = app.test_client()
+    response = other.post('/api/check_unique_user', json={'user_id': 's3', 'display_name': 'grace'})
+    assert response.get_json() == {'unique': False, 'id_exists': False, 'name_exists': True}
+
+
+def test_player_page_refuses_a_taken_name(app, ada):
+    client = app.test_client()
+    response = client.get('/player?user_id=s2&display_name=ADA%20LOVELACE')
+    assert b'is-invalid' in response.data
+    assert 's2' not in ada.users
+    # Another name is fine
+    client.get('/player?user_id=s2&display_name=Grace')
+    assert ada.users['s2'].name == 'Grace'
+
+
+def test_player_page_keeps_the_name_when_a_rename_collides(client, ada):
+    ada.add_user('s2', name='Grace')
+    client.get('/player?user_id=s2&display_name=Ada%20Lovelace')
+    assert ada.users['s2'].name == 'Grace'
@@ -0,0 +1,77 @@
+"""Tests for the partitioned set of players a round is waiting for."""
+import pytest
+
+from models.pending_decisions import PendingDecisions
+
+
+@pytest.fixture
+def pending():
+    pending = PendingDecisions()
+    pending.add('ada', 'human', 'Y')
+    pending.add('test_1', 'test', 'M')
+    pending.add('grace', 'human', 'O')
+    pending.add('test_2', 'test', 'Y')
+    return pending
+
+
+def test_it_behaves_like_the_set_of_pending_ids(pending):
+    assert len(pending) == 4 and pending
+    assert 'ada' in pending and 'alan' not in pending
+    assert list(pending) == ['ada', 'test_1', 'grace', 'test_2']
+    assert not PendingDecisions()
+
+
+def test_ids_and_counts_by_kind_and_stage(pending):
+    assert list(pending.ids('human')) == ['ada', 'grace']
+    assert list(pending.ids('test', 'M')) == ['test_1']
+    assert list(pending.ids(stage='Y')) == ['ada', 'test_2']
+    assert list(pending.ids()) == list(pending)
+    assert (pending.count(), pending.count('test'), pending.count(stage='O'), pending.count('human', 'M')) == (4, 2, 1, 0)
+
+
+def test_counts_covers_every_partition(pending):
+    assert pending.counts() == {'human': {'Y': 1, 'M': 0, 'O': 1}, 'test': {'Y': 1, 'M': 1, 'O': 0}}
+
+
+def test_adding_again_moves_the_player_to_its_new_partition(pending):
+    pending.add('ada', 'human', 'M')
+    assert list(pending.ids('human', 'Y')) == [] and list(pending.ids('human', 'M')) == ['ada']
+    assert len(pending) == 4
+    # A re-added player goes to the back of the order
+    assert list(pending) == ['test_1', 'grace', 'test_2', 'ada']
+
+
+def test_discard_removes_from_every_view(pending):
+    pending.discard('test_1')
+    pending.discard('nobody')
+    assert 'test_1' not in pending
+    assert pending.count('test') == 1 and pending.count(stage='M') == 0
+    assert list(pending.ids('test')) == ['test_2']
+
+
+def test_clear_empties_every_partition(pending):
+    pending.clear()
+    assert len(pending) == 0 and pending.counts() == {kind: dict.fromkeys(PendingDecisions.STAGES, 0)
+                                                      for kind in PendingDecisions.KINDS}
+
+
+def test_a_new_round_files_players_under_their_new_stage(game):
+    game.add_user('ada', age_stage='Y')
+    game.add_user('grace', age_stage='M')
+    game.add_user('alan', age_stage='O')
+    for user in game.users.values():
+        user.advance_age()
+    game.reset_pending()
+    assert [list(game.pending_decisions.ids('human', stage)) for stage in 'YMO'] == [['alan'], ['ada'], ['grace']]
+
+
+def test_running_a_round_waits_for_every_player_again(game):
+    game.add_user('ada', age_stage='Y')
+    game.add_user('grace', age_stage='M')
+    # A round with a player still pending doesn't run
+    game.pending_decisions.discard('ada')
+    assert not game.run_round()
+    game.pending_decisions.discard('grace')
+    assert game.run_round()
+    assert list(game.pending_decisions) == ['ada', 'grace']
+    assert game.pending_decisions.counts()['human'] == {'Y': 0, 'M': 1, 'O': 1}
@@ -0,0 +1,44 @@
+import csv
+import io
+
+import pytest
+
+from services import policy_sweep
+
+
+def test_build_grid_is_the_cartesian_product():
+    grid = policy_sweep.build_grid(borrowing_limit=[20, 60], government_debt=[0, 10, 20])
+    assert len(grid) == 6
+    assert grid[0] == {'borrowing_limit': 20, 'government_debt': 0}
+
+
+def test_build_grid_rejects_unknown_parameters():
+    with pytest.raises(ValueError):
+        policy_sweep.build_grid(interest=[1])
+
+
+def test_build_game_solves_once_players_have_decided(monkeypatch):
+    solves = []
+    original = policy_sweep.GameState._calculate_equilibrium
+    monkeypatch.setattr(policy_sweep.GameState, '_calculate_equilibrium',
+                        lambda self: solves.append(len(self.users)) or original(self))
+
+    game = policy_sweep.build_game({'borrowing_limit': 40}, num_test_players=9, seed=1)
+
+    assert solves == [9]
+    assert game.borrowing_limit == 40
+    assert not game.pending_decisions
+
+
+def test_seeded_sweeps_are_reproducible():
+    grid = policy_sweep.build_grid(borrowing_limit=[20, 60])
+    first = list(policy_sweep.run_sweep(grid, num_test_players=12, rounds=2, seed=3, workers=1))
+    second = list(policy_sweep.run_sweep(grid, num_test_players=12, rounds=2, seed=3, workers=1))
+    assert first == second
+    assert [row['seed'] for row in first] == [3, 4]
+
+
+def test_cli_writes_csv_to_stdout_by_default(capsys):
+    policy_sweep.main(['--borrowing-limit', '20,60', '--players', '6', '--workers', '1', '--seed', '1'])
+    rows = list(csv.DictReader(io.StringIO(capsys.readouterr().out)))
+    assert [float(row['borrowing_limit']) for row in rows] == [20.0, 60.0]
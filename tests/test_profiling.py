@@ -0,0 +1,160 @@
+"""Tests for on-demand profiling and the /api/profiling endpoints."""
+import marshal
+import pstats
+import time
+
+import pytest
+
+from services.profiling import Profiler, profiler
+
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+@pytest.fixture
+def app_profiler():
+    """The app's profiler, disarmed and emptied afterwards."""
+    yield profiler
+    profiler.disarm()
+    profiler.results.clear()
+
+
+@pytest.mark.parametrize('kwargs, message', [
+    ({'target': 'everything'}, 'Unknown profiling target'),
+    ({'target': 'requests', 'mode': 'perf'}, 'Unknown profiling mode'),
+    ({'target': 'requests', 'count': 0}, 'at least 1'),
+    ({'target': 'requests', 'interval': 0}, 'positive'),
+])
+def test_arm_validates_its_arguments(kwargs, message):
+    with pytest.raises(ValueError, match=message):
+        Profiler().arm(**kwargs)
+
+
+def test_cprofile_session_finishes_after_count_runs():
+    p = Profiler()
+    session_id = p.arm('advance_round', count=2)
+    with p.capture('calculate_equilibrium'):
+        busy(0.001)  # another target: not profiled
+    for _ in range(2):
+        with p.capture('advance_round'):
+            busy(0.001)
+    assert p.armed is None
+    result = p.results[session_id]
+    assert result['count'] == 2 and result['mode'] == 'cprofile'
+    stats = marshal.loads(result['data'])
+    assert any(name == 'busy' for _, _, name in stats)
+
+
+def test_cprofile_results_download_as_pstats_and_text(tmp_path):
+    p = Profiler()
+    session_id = p.arm('requests')
+    with p.capture('requests'):
+        busy(0.001)
+
+    data, mimetype, filename = p.export(session_id, 'pstats')
+    assert filename == f'profile-{session_id}-requests.prof'
+    path = tmp_path / filename
+    path.write_bytes(data)
+    assert any(name == 'busy' for _, _, name in pstats.Stats(str(path)).stats)
+
+    text, mimetype, _ = p.export(session_id, 'txt')
+    assert mimetype == 'text/plain' and b'busy' in text
+    with pytest.raises(ValueError, match='pstats, txt'):
+        p.export(session_id, 'collapsed')
+    with pytest.raises(KeyError):
+        p.export(session_id + 1, 'txt')
+
+
+def test_sampling_records_collapsed_stacks():
+    p = Profiler()
+    session_id = p.arm('calculate_equilibrium', mode='sampling', interval=0.001)
+    with p.capture('calculate_equilibrium'):
+        busy(0.1)
+    result = p.results[session_id]
+    assert result['samples'] > 0
+    lines = result['data'].decode().splitlines()
+    assert any(line.rsplit(' ', 1)[0].endswith(f'busy ({__file__}:{busy.__code__.co_firstlineno})')
+               for line in lines)
+    assert all(line.rsplit(' ', 1)[1].isdigit() for line in lines)
+
+
+def test_disarm_keeps_what_was_collected():
+    p = Profiler()
+    session_id = p.arm('requests', count=5)
+    with p.capture('requests'):
+        busy(0.001)
+    p.disarm()
+    assert p.armed is None
+    assert p.results[session_id]['count'] == 1
+
+
+def test_rearming_drops_a_session_that_never_ran():
+    p = Profiler()
+    first = p.arm('requests')
+    second = p.arm('advance_round')
+    assert first not in p.results
+    assert p.status()['armed']['id'] == second
+
+
+def test_only_the_latest_results_are_kept():
+    p = Profiler(max_results=2)
+    for _ in range(3):
+        p.arm('requests')
+        with p.capture('requests'):
+            pass
+    assert list(p.results) == [2, 3]
+
+
+def test_wrapped_functions_are_profiled_only_when_armed():
+    p = Profiler()
+    wrapped = p.wrap('advance_round')(lambda value: value * 2)
+    assert wrapped(2) == 4
+    session_id = p.arm('advance_round')
+    assert wrapped(3) == 6
+    assert session_id in p.results
+
+
+def test_calculate_equilibrium_is_a_profiling_target(game, app_profiler):
+    session_id = app_profiler.arm('calculate_equilibrium')
+    game.calculate_equilibrium()
+    assert app_profiler.results[session_id]['target'] == 'calculate_equilibrium'
+
+
+@pytest.mark.parametrize('method, path', [
+    ('get', '/api/profiling'), ('post', '/api/profiling/arm'),
+    ('post', '/api/profiling/disarm'), ('get', '/api/profiling/1.txt'),
+])
+def test_profiling_needs_a_professor(client, method, path):
+    assert getattr(client, method)(path).status_code == 403
+
+
+def test_professor_profiles_the_next_requests(professor, app_profiler):
+    response = professor.post('/api/profiling/arm', json={'target': 'requests', 'count': 2})
+    session_id = response.get_json()['id']
+    # The profiling endpoints themselves are not profiled
+    assert professor.get('/api/profiling').get_json()['armed']['remaining'] == 2
+    professor.get('/api/current_state')
+    professor.get('/api/current_state')
+
+    status = professor.get('/api/profiling').get_json()
+    assert status['armed'] is None
+    assert [result['id'] for result in status['results']] == [session_id]
+
+    download = professor.get(f'/api/profiling/{session_id}.txt')
+    assert download.status_code == 200
+    assert download.headers['Content-Disposition'] == f'attachment; filename=profile-{session_id}-requests.txt'
+    assert b'get_current_state' in download.get_data()
+
+
+def test_profiling_endpoints_reject_bad_input(professor, app_profiler):
+    assert professor.post('/api/profiling/arm', json={'target': 'requests', 'count': 'two'}).status_code == 400
+    assert professor.post('/api/profiling/arm', json={'mode': 'perf'}).status_code == 400
+    assert professor.get('/api/profiling/999.txt').status_code == 404
+
+    session_id = professor.post('/api/profiling/arm', json={'mode': 'sampling', 'interval_ms': 1}).get_json()['id']
+    professor.get('/api/current_state')
+    assert professor.get(f'/api/profiling/{session_id}.pstats').status_code == 400
+    assert professor.get(f'/api/profiling/{session_id}.collapsed').status_code == 200
@@ -0,0 +1,72 @@
+"""Tests for roster parsing and /api/import_roster."""
+import io
+
+import pytest
+
+from services import roster_service
+
+CSV = "user_id,name,stage\ns1,Ada,young\ns2,Grace,\ns3,,old\n"
+
+
+def test_csv_rosters_fill_in_stages_and_avatars():
+    entries = roster_service.parse_roster(CSV, 'csv')
+    assert [entry['user_id'] for entry in entries] == ['s1', 's2', 's3']
+    assert [entry['stage'] for entry in entries] == ['Y', 'M', 'O']
+    assert entries[2]['name'] is None
+    assert all(entry['avatar'] in roster_service.AVATARS for entry in entries)
+
+
+def test_json_rosters_accept_a_players_object():
+    entries = roster_service.parse_roster('{"players": [{"id": "s1", "display_name": "Ada", "stage": "M"}]}',
+                                          'json')
+    assert entries[0]['user_id'] == 's1' and entries[0]['name'] == 'Ada' and entries[0]['stage'] == 'M'
+
+
+@pytest.mark.parametrize('text, fmt, message', [
+    ('[{"user_id": 7}]', 'json', 'user_id must be a string'),
+    ('[{"user_id": "s1", "stage": "ancient"}]', 'json', 'unknown stage'),
+    ('[{"name": "Ada"}]', 'json', 'missing user_id'),
+    ('{"user_id": "s1"}', 'json', 'Expected a list'),
+    ('not json', 'json', 'Invalid JSON'),
+    ('user_id\ns1\n', 'xml', 'Unsupported'),
+])
+def test_invalid_rosters_are_rejected(text, fmt, message):
+    with pytest.raises(ValueError, match=message):
+        roster_service.parse_roster(text, fmt)
+
+
+def test_import_needs_a_professor(client):
+    assert client.post('/api/import_roster', json=[{'user_id': 's1'}]).status_code == 403
+
+
+def test_import_json_body(professor, game):
+    response = professor.post('/api/import_roster', json=[{'user_id': 's1', 'name': 'Ada'}])
+    assert response.get_json()['count'] == 1
+    assert game.users['s1'].name == 'Ada'
+
+
+def test_import_raw_csv_body(professor, game):
+    response = professor.post('/api/import_roster', data='\ufeff' + CSV, content_type='text/csv')
+    assert response.status_code == 200
+    assert sorted(game.users) == ['s1', 's2', 's3']
+    assert game.users['s3'].age_stage == 'O'
+
+
+def test_import_multipart_upload(professor, game):
+    upload = (io.BytesIO(CSV.encode()), 'class.csv')
+    response = professor.post('/api/import_roster', data={'file': upload}, content_type='multipart/form-data')
+    assert response.status_code == 200
+    assert len(game.users) == 3
+
+
+def test_import_is_all_or_nothing(professor, game):
+    game.add_user('s2')
+    response = professor.post('/api/import_roster', data=CSV, content_type='text/csv')
+    assert response.status_code == 400
+    assert sorted(game.users) == ['s2']
+
+
+def test_import_rejects_integer_ids(professor, game):
+    response = professor.post('/api/import_roster', json=[{'user_id': 7}])
+    assert response.status_code == 400
+    assert not game.users
@@ -0,0 +1,124 @@
+"""Tests for the steady-state loan market and AD/AS analytics."""
+import numpy as np
+import pytest
+
+from models.game_state import GameState
+from services import steady_state
+from services.steady_state import make_params
+
+# A normal economy clears at a positive rate; a tight borrowing limit pushes
+# the natural rate below zero, where the zero lower bound binds
+NORMAL = make_params(government_debt=5.0)
+TIGHT = make_params(income_old=10.0, borrowing_limit=10.0)
+
+
+def test_make_params_rejects_unknown_names():
+    assert make_params(beta=0.9)['beta'] == 0.9
+    with pytest.raises(ValueError, match='interest'):
+        make_params(interest=0.05)
+
+
+@pytest.mark.parametrize('overrides, message', [
+    ({'beta': 0.0}, 'beta must be positive'),
+    ({'borrowing_limit': float('nan')}, 'borrowing_limit must be a finite number'),
+    ({'wage_rigidity': 1.0}, r'wage_rigidity must be in \[0, 1\)'),
+    ({'population_growth': np.array([0.0, -1.0])}, 'population_growth must be above -1'),
+])
+def test_validate_params_names_the_offending_parameter(overrides, message):
+    with pytest.raises(ValueError, match=message):
+        steady_state.validate_params(make_params(**overrides))
+
+
+def test_params_from_game_reads_the_policy():
+    game = GameState()
+    game.borrowing_limit, game.tax_rate_middle = 40.0, 5.0
+    params = steady_state.params_from_game(game, beta=0.8)
+    assert (params['borrowing_limit'], params['tax_rate_middle'], params['beta']) == (40.0, 5.0, 0.8)
+
+
+def test_params_from_game_spreads_the_debt_over_the_young():
+    game = GameState()
+    game.government_debt = 12.0
+    assert steady_state.params_from_game(game)['government_debt'] == 12.0
+    for i in range(4):
+        game.add_user(f'young_{i}', age_stage='Y')
+    game.add_user('old', age_stage='O')
+    assert steady_state.params_from_game(game)['government_debt'] == 3.0
+
+
+def test_young_borrowing_is_capped_by_the_limit():
+    rates = np.array([0.0, 0.5])
+    assert steady_state.young_borrowing(rates, make_params()) == pytest.approx([20.0, 60.0 / 1.5 / 3])
+    assert steady_state.young_borrowing(rates, make_params(borrowing_limit=12.0)) == pytest.approx([12.0, 8.0])
+
+
+def test_middle_aged_saving_follows_the_euler_equation():
+    # With beta = 1 and no old-age income, half of what is left after repaying is saved
+    assert steady_state.desired_saving(20.0, 0.5, make_params()) == pytest.approx((60.0 - 1.5 * 20.0) / 2)
+    assert steady_state.middle_saving(np.array([0.0]), make_params(income_old=200.0))[0] == 0.0
+
+
+def test_equilibrium_clears_the_loan_market():
+    result = steady_state.loan_market_equilibrium(NORMAL)
+    assert float(steady_state.excess_demand(result['rate'], NORMAL)) == pytest.approx(0.0, abs=1e-9)
+    assert result['gross_rate'] == pytest.approx(1 + result['rate'])
+    assert result['loans'] == pytest.approx(steady_state.loan_demand(result['rate'], NORMAL))
+
+
+def test_parameter_grids_are_solved_at_once():
+    limits = np.array([10.0, 15.0, 50.0])
+    rates = steady_state.equilibrium_rate(make_params(borrowing_limit=limits))
+    assert rates.shape == (3,)
+    assert rates == pytest.approx([steady_state.natural_rate(make_params(borrowing_limit=limit)) for limit in limits])
+    # Tighter credit means less loan demand and a lower rate
+    assert np.all(np.diff(rates) > 0)
+
+
+def test_the_rate_stays_at_a_bound_when_the_market_cannot_clear():
+    # Without borrowing, saving exceeds demand at every rate
+    no_credit = make_params(borrowing_limit=0.0)
+    assert steady_state.natural_rate(no_credit) == pytest.approx(steady_state.RATE_BOUNDS[0])
+    heavy_debt = make_params(government_debt=1000.0)
+    assert steady_state.natural_rate(heavy_debt) == pytest.approx(steady_state.RATE_BOUNDS[1])
+    # Grids mix both with clearing markets
+    rates = steady_state.equilibrium_rate(make_params(borrowing_limit=np.array([0.0, 50.0])))
+    assert rates == pytest.approx([steady_state.RATE_BOUNDS[0], steady_state.natural_rate(make_params())], abs=1e-9)
+
+
+def test_bisect_refines_every_bracket_at_once():
+    roots = steady_state.bisect(lambda x: np.array([0.25, 0.75]) - x, [0.0, 0.0], [1.0, 1.0])
+    assert roots == pytest.approx([0.25, 0.75])
+    # Without a sign change the result is the upper bound
+    assert steady_state.bisect(lambda x: 10 - x, 0.0, 1.0) == pytest.approx(1.0)
+
+
+def test_schedules_share_the_rate_grid():
+    schedules = steady_state.loan_market_schedules(NORMAL)
+    assert len(schedules['rates']) == len(schedules['demand']) == len(schedules['supply']) == 301
+
+
+def test_policy_rate_respects_the_zero_lower_bound():
+    assert steady_state.policy_gross_nominal(1.0, NORMAL) == pytest.approx(1 + steady_state.natural_rate(NORMAL))
+    assert np.all(steady_state.policy_gross_nominal(np.linspace(0.5, 1.5, 11), TIGHT) >= 1.0)
+
+
+def test_aggregate_supply_is_vertical_at_and_above_target():
+    supply = steady_state.aggregate_supply(np.array([0.8, 0.95, 1.0, 1.2]), NORMAL)
+    assert supply[2:] == pytest.approx([60.0, 60.0])
+    assert supply[0] < supply[1] < 60.0
+
+
+def test_normal_economy_has_a_full_employment_steady_state():
+    (state,) = steady_state.ad_as_steady_states(NORMAL)
+    assert state['inflation'] == pytest.approx(1.0)
+    assert state['output'] == pytest.approx(60.0)
+    assert state['real_rate'] == pytest.approx(steady_state.natural_rate(NORMAL))
+
+
+def test_tight_credit_has_a_deflationary_steady_state():
+    assert steady_state.natural_rate(TIGHT) < 0
+    (state,) = steady_state.ad_as_steady_states(TIGHT)
+    assert state['inflation'] < 1.0
+    assert state['output'] < TIGHT['income_middle']
+    # At the zero lower bound the real rate is the deflation rate
+    assert 1 + state['real_rate'] == pytest.approx(1 / state['inflation'])
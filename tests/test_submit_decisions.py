@@ -0,0 +1,83 @@
+"""Tests for batched decisions: GameState.record_decisions and /api/submit_decisions."""
+import pytest
+
+import app as app_module
+
+CURVE = [{'interestRate': 0, 'borrowingAmount': 30}, {'interestRate': 10, 'borrowingAmount': 10}]
+
+
+@pytest.fixture
+def players(game):
+    for user_id, stage in (('y', 'Y'), ('m', 'M'), ('o', 'O')):
+        game.add_user(user_id, age_stage=stage)
+    return game
+
+
+def test_record_decisions_validates_each_decision(players):
+    results = players.record_decisions([
+        {'user_id': 'y', 'decision_type': 'borrow', 'amount': '20', 'demand_curve': CURVE},
+        {'user_id': 'm', 'decision_type': 'save', 'amount': 'lots'},
+        {'user_id': 'o', 'decision_type': 'consume'},
+        {'user_id': 'nobody', 'decision_type': 'save', 'amount': 1},
+        'not a decision',
+    ])
+    assert [result['success'] for result in results] == [True, False, False, False, False]
+    assert [result.get('error') for result in results[1:]] == [
+        'Amount must be a number', 'Missing required fields', 'Invalid decision', 'Invalid decision']
+    assert players.users['y'].current_borrowing == 20
+    assert players.users['y'].demand_curve.borrowing_at(5) == pytest.approx(20)
+    assert sorted(players.pending_decisions.ids()) == ['m', 'o']
+
+
+def test_an_invalid_curve_rejects_only_its_decision(players):
+    rising = [{'interestRate': 0, 'borrowingAmount': 1}, {'interestRate': 5, 'borrowingAmount': 9}]
+    results = players.record_decisions([
+        {'user_id': 'y', 'decision_type': 'borrow', 'amount': 1, 'demand_curve': rising},
+        {'user_id': 'o', 'decision_type': 'consume', 'amount': 0},
+    ])
+    assert results[0]['error'].startswith('Invalid demand curve')
+    assert results[1] == {'user_id': 'o', 'success': True}
+    assert players.users['y'].demand_curve is None
+
+
+def test_submit_decisions_announces_the_accepted_ones_once(client, players, emitted):
+    response = client.post('/api/submit_decisions', json={'decisions': [
+        {'user_id': 'y', 'decision_type': 'borrow', 'amount': 20, 'demand_curve': CURVE},
+        {'user_id': 'm', 'decision_type': 'save', 'amount': -5},
+        {'user_id': 'o', 'decision_type': 'consume', 'amount': 0},
+    ]})
+    data = response.get_json()
+    assert response.status_code == 200
+    assert data['success'] is False and data['accepted'] == 2
+    assert [event for event, _, _ in emitted] == ['decision_submitted']
+    payload = emitted[0][1]
+    assert payload['user_ids'] == ['y', 'o']
+    assert payload['waiting_count'] == 1
+    assert 'aggregate_demand' in payload
+
+
+def test_submit_decisions_without_curves_skips_the_aggregate_demand(client, players, emitted):
+    response = client.post('/api/submit_decisions', json=[{'user_id': 'o', 'decision_type': 'consume', 'amount': 0}])
+    assert response.get_json()['success'] is True
+    assert 'aggregate_demand' not in emitted[0][1]
+
+
+def test_nothing_is_announced_when_every_decision_fails(client, players, emitted):
+    response = client.post('/api/submit_decisions', json=[{'user_id': 'nobody', 'decision_type': 'save', 'amount': 1}])
+    assert response.get_json()['accepted'] == 0
+    assert emitted == []
+
+
+@pytest.mark.parametrize('body', [[], {'decisions': 'all'}, {'user_id': 'y'}])
+def test_submit_decisions_needs_a_list(client, body):
+    response = client.post('/api/submit_decisions', json=body)
+    assert response.status_code == 400
+    assert response.get_json()['error'] == 'Expected a list of decisions'
+
+
+def test_submit_decisions_limits_the_batch(client):
+    decisions = [{'user_id': f's{i}', 'decision_type': 'save', 'amount': 1}
+                 for i in range(app_module.MAX_DECISION_BATCH + 1)]
+    response = client.post('/api/submit_decisions', json=decisions)
+    assert response.status_code == 400
+    assert 'At most' in response.get_json()['error']
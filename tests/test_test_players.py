@@ -0,0 +1,52 @@
+"""Tests for the randomized test players' decisions."""
+import random
+
+import pytest
+
+from models.game_state import GameState
+from services import test_player_service
+
+
+def make_game(rate, players=30):
+    game = GameState()
+    game.interest_rate = rate
+    for i in range(players):
+        game.add_user(f'test_{i}', age_stage='YMO'[i % 3])
+    return game
+
+
+@pytest.mark.parametrize('rate', [0.05, 0.035, -0.02, 0.2])
+def test_young_borrowing_is_read_off_each_curve(rate):
+    game = make_game(rate)
+    random.seed(1)
+    game.generate_test_player_decisions()
+    assert list(game.pending_decisions.ids('test')) == []
+
+    # Within half a point of a curve point the point's amount is used, otherwise the curve is interpolated
+    percent = rate * 100
+    at = round(percent) if abs(percent - round(percent)) < 0.5 else percent
+    for user in game.users.values():
+        if user.age_stage == 'Y':
+            assert user.current_borrowing == pytest.approx(user.demand_curve.borrowing_at(at))
+
+
+def test_service_generates_a_decision_for_every_pending_test_player():
+    game = make_game(0.035)
+    game.add_user('human')
+    random.seed(2)
+    test_player_service.generate_test_player_decisions(game, False)
+    assert list(game.pending_decisions.ids('test')) == []
+    assert list(game.pending_decisions.ids('human')) == ['human']
+    for user in game.users.values():
+        if user.age_stage == 'Y' and user.user_id != 'human':
+            expected = round(user.demand_curve.borrowing_at(game.interest_rate * 100), 1)
+            assert user.current_borrowing == pytest.approx(expected)
+
+
+def test_added_test_players_decide_immediately():
+    game = GameState()
+    added = test_player_service.add_test_players(game, 7, optimal_decisions=False)
+    assert [player['stage'] for player in added].count('Y') == 2
+    assert list(game.pending_decisions.ids('test')) == []
+    assert all(game.users[player['id']].demand_curve is not None
+               for player in added if player['stage'] == 'Y')
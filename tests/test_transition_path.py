@@ -0,0 +1,114 @@
+"""Tests for the perfect-foresight transition path solver and /api/preview_policy."""
+import numpy as np
+import pytest
+
+from services.steady_state import make_params, middle_saving, params_from_game
+from services.transition_path import TransitionSolver, excess_demand, jacobian, solve_tridiagonal
+
+OLD = make_params(income_old=20.0)
+NEW = dict(OLD, borrowing_limit=10.0)
+
+
+def test_solve_tridiagonal_matches_a_dense_solve():
+    rng = np.random.default_rng(0)
+    n = 8
+    lower, upper = rng.normal(size=n), rng.normal(size=n)
+    diag = 5 + rng.random(n)
+    rhs = rng.normal(size=n)
+    dense = np.diag(diag) + np.diag(lower[1:], -1) + np.diag(upper[:-1], 1)
+    assert np.allclose(solve_tridiagonal(lower, diag, upper, rhs), np.linalg.solve(dense, rhs))
+
+
+def test_jacobian_matches_finite_differences():
+    rates = np.linspace(0.0, 0.1, 7)
+    lower, diag, upper = jacobian(rates, OLD, NEW)
+    base = excess_demand(rates, OLD, NEW)
+    for column in (0, 3, 6):
+        shifted = rates.copy()
+        shifted[column] += 1e-7
+        change = (excess_demand(shifted, OLD, NEW) - base) / 1e-7
+        assert change[column] == pytest.approx(diag[column], rel=1e-4, abs=1e-6)
+        if column > 0:
+            assert change[column - 1] == pytest.approx(upper[column - 1], rel=1e-4, abs=1e-6)
+        if column < len(rates) - 1:
+            assert change[column + 1] == pytest.approx(lower[column + 1], rel=1e-4, abs=1e-6)
+
+
+def test_transition_clears_every_market_and_ends_at_the_new_steady_state():
+    result = TransitionSolver().solve(OLD, NEW, periods=60)
+    assert result['converged']
+    assert max(abs(value) for value in result['excess_demand']) <= 1e-9
+    assert result['rates'][-1] == pytest.approx(result['new_steady_state'], abs=1e-6)
+    assert len(result['rates']) == len(result['young_borrowing']) == 60
+
+
+def test_solver_warm_starts_from_the_last_path():
+    solver = TransitionSolver()
+    cold = solver.solve(OLD, NEW, periods=40)
+    warm = solver.solve(OLD, NEW, periods=40)
+    assert warm['iterations'] == 0
+    assert warm['rates'] == pytest.approx(cold['rates'])
+
+
+def test_solver_needs_a_period():
+    with pytest.raises(ValueError):
+        TransitionSolver().solve(OLD, NEW, periods=0)
+
+
+def test_preview_needs_a_professor(client):
+    assert client.post('/api/preview_policy', json={'borrowing_limit': 40}).status_code == 403
+
+
+def test_preview_returns_the_path(professor, game):
+    response = professor.post('/api/preview_policy', json={'government_debt': 10, 'periods': 20})
+    assert response.status_code == 200
+    transition = response.get_json()['transition']
+    assert transition['converged'] and len(transition['rates']) == 20
+    # The game is only previewed, not changed
+    assert game.government_debt == 0.0
+
+
+@pytest.mark.parametrize('body', [
+    {'beta': -1},
+    {'borrowing_limit': 'nan'},
+    {'borrowing_limit': 'inf'},
+    {'income_middle': 'lots'},
+    {'borrowing_limit': True},
+    {'periods': 0},
+    {'periods': 2.5},
+    {'periods': '50'},
+    {'periods': 10 ** 6},
+    [1, 2],
+])
+def test_preview_rejects_invalid_input(professor, body):
+    response = professor.post('/api/preview_policy', json=body)
+    assert response.status_code == 400
+    assert response.get_json()['success'] is False
+
+
+def test_preview_without_a_clearing_path_is_a_bad_request(professor):
+    response = professor.post('/api/preview_policy', json={'beta': 0.5, 'periods': 20})
+    assert response.status_code == 400
+    data = response.get_json()
+    assert 'transition' not in data and data['max_imbalance'] > 0
+
+
+def test_previewed_steady_state_clears_the_games_loan_market(professor, game):
+    # government_debt is a game total: with three players per cohort each young one carries a third
+    game.borrowing_limit = 15.0
+    for i in range(3):
+        game.add_user(f'young_{i}', age_stage='Y')
+        game.add_user(f'middle_{i}', age_stage='M')
+    response = professor.post('/api/preview_policy', json={'government_debt': 6, 'periods': 50})
+    rate = response.get_json()['transition']['new_steady_state']
+
+    # Play the new steady state: the limit binds for the young, the middle-aged save as the model says
+    game.government_debt = 6.0
+    saving = float(middle_saving(rate, params_from_game(game)))
+    for user in game.users.values():
+        if user.age_stage == 'Y':
+            user.current_borrowing = 100.0
+        else:
+            user.current_saving = saving
+    assert params_from_game(game)['government_debt'] == pytest.approx(2.0)
+    assert game.calculate_equilibrium() == pytest.approx(rate, abs=1e-5)
@@ -0,0 +1,87 @@
+"""Tests for the compact Socket.IO wire formats and what broadcasts send."""
+import pytest
+
+import app as app_module
+from services import wire_format
+
+PAYLOAD = {
+    'user_ids': ['a', 'b'],
+    'waiting_count': 3,
+    'demand_curve': [{'interestRate': 1.0, 'borrowingAmount': 20.0},
+                     {'interestRate': 5.0, 'borrowingAmount': 12.5}]
+}
+
+
+def test_compact_encoding_round_trips():
+    compact = wire_format.encode(PAYLOAD, 'compact')
+    assert 'user_ids' not in compact
+    assert isinstance(compact[wire_format.FIELD_CODES['demand_curve']], bytes)
+    assert wire_format.decode(compact, 'compact') == PAYLOAD
+
+
+def test_data_keys_that_look_like_codes_round_trip():
+    # User ids key the users dict; some of them are codes, or names, of fields
+    payload = {'users': {'s': {'name': 'Sam'}, 'D': {'round': 2}, '~x': {}, 'round': {}}}
+    compact = wire_format.encode(payload, 'compact')
+    users = compact[wire_format.FIELD_CODES['users']]
+    assert {'~s', '~D', '~~x'} <= set(users)
+    assert wire_format.decode(compact, 'compact') == payload
+
+
+def test_the_escape_is_described_to_clients():
+    assert wire_format.describe('compact')['escape'] == wire_format.ESCAPE
+
+
+def test_compact_payloads_are_smaller():
+    assert (wire_format.wire_size('decision_submitted', wire_format.encode(PAYLOAD, 'compact'))
+            < wire_format.wire_size('decision_submitted', PAYLOAD))
+
+
+def test_envelope_size_is_the_packet_around_the_payload():
+    payload = '{"user_ids":["a","b"]}'
+    assert (wire_format.wire_size('decision_submitted', {'user_ids': ['a', 'b']})
+            == len(payload) + wire_format.envelope_size('decision_submitted'))
+
+
+@pytest.fixture
+def connected():
+    """One JSON client and one compact client."""
+    return {None: ['a', 'b'], wire_format.room('compact'): ['b']}
+
+
+def test_broadcast_sends_each_encoding_its_copy(emitted):
+    app_module.broadcast('wire_copies_test', PAYLOAD)
+    (_, compact, compact_kwargs), (_, data, json_kwargs) = emitted
+    assert compact_kwargs['to'] == wire_format.room('compact')
+    assert wire_format.decode(compact, 'compact') == PAYLOAD
+    assert data is PAYLOAD
+    assert json_kwargs['skip_sid'] == ['b']
+
+
+@pytest.mark.parametrize('connected', [{None: ['a']}])
+def test_broadcast_without_compact_clients_emits_json_once(emitted):
+    app_module.broadcast('wire_json_only_test', PAYLOAD)
+    assert emitted == [('wire_json_only_test', PAYLOAD, {})]
+
+
+def test_wire_sizes_are_measured_only_on_sampled_emits(emitted, monkeypatch):
+    calls = []
+    wire_size = wire_format.wire_size
+    monkeypatch.setattr(wire_format, 'wire_size', lambda event, payload: calls.append(event) or wire_size(event, payload))
+    for _ in range(app_module.EMIT_SIZE_SAMPLE):
+        app_module.broadcast('wire_sampling_test', PAYLOAD)
+    # Once per encoding on the first emit, then not until the next sample
+    assert len(calls) == 2
+    assert len(emitted) == 2 * app_module.EMIT_SIZE_SAMPLE
+
+
+def test_decision_submitted_sends_a_count_not_the_waiting_list(client, game, emitted):
+    for user_id in ('s1', 's2', 's3'):
+        game.add_user(user_id, age_stage='O')
+    response = client.post('/api/submit_decision',
+                           json={'user_id': 's1', 'decision_type': 'consume', 'amount': 0})
+    assert response.get_json()['success']
+    (_, data, _), = [sent for sent in emitted if sent[0] == 'decision_submitted' and 'to' not in sent[2]]
+    assert data['user_id'] == 's1'
+    assert data['waiting_count'] == 2
+    assert 'waiting_for' not in data